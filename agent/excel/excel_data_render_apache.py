@@ -1,6 +1,5 @@
 import json
 import logging
-import traceback
 from decimal import Decimal
 
 from agent.excel.excel_agent_state import ExcelAgentState, ExecutionResult
@@ -248,9 +247,8 @@ def get_column_comments(schema_inspector: list, table_name: str) -> list:
             else:
                 comments.append("")  # 如果列信息格式不正确，使用空字符串
         return comments
-    except Exception as e:
-        traceback.print_exception(e)
-        logger.info(f"处理表 {table_name} 的列注释时出错: {e}")
+    except (KeyError, AttributeError, TypeError):
+        logger.exception("处理表 %s 的列注释时出错", table_name)
         return []
 
 
@@ -1,6 +1,5 @@
 import json
 import logging
-import traceback
 from decimal import Decimal
 
 from agent.text2sql.state.agent_state import AgentState, ExecutionResult
@@ -182,7 +181,6 @@ def get_column_comments(schema_inspector: dict, table_name: str) -> list:
             else:
                 comments.append("")  # 如果列信息格式不正确，使用空字符串
         return comments
-    except Exception as e:
-        traceback.print_exception(e)
-        logger.info(f"处理表 {table_name} 的列注释时出错: {e}")
+    except (KeyError, AttributeError, TypeError):
+        logger.exception("处理表 %s 的列注释时出错", table_name)
         return []
@@ -10,7 +10,7 @@ from agent.text2sql.analysis.parallel_collector import (
 )
 from agent.text2sql.analysis.early_recommender_helper import start_early_recommender
 from agent.text2sql.analysis.unified_collector import unified_collect
-from agent.text2sql.database.db_service import DatabaseService
+from agent.text2sql.database.db_service import get_database_service
 from agent.text2sql.sql.generator import sql_generate
 from agent.text2sql.permission.filter_injector import permission_filter_injector
 from agent.text2sql.chart.generator import chart_generator
@@ -64,7 +64,7 @@ def create_graph(datasource_id: int = None):
     :return:
     """
     graph = StateGraph(AgentState)
-    db_service = DatabaseService(datasource_id)
+    db_service = get_database_service(datasource_id)
 
     graph.add_node("datasource_selector", datasource_selector)
     graph.add_node("error_handler", handle_datasource_error)
@@ -51,6 +51,33 @@ def remove_code_block_markers(text: str) -> str:
     return text
 
 
+def format_data_result(data_result) -> str:
+    """
+    将查询结果转换为提示词中的文本
+    行记录列表（list[dict]）渲染为 markdown 表格，token 数约为缩进 JSON 的一半；
+    其他结构仍使用 JSON 序列化
+
+    Args:
+        data_result: SQL 执行结果数据
+
+    Returns:
+        可直接填入提示词的字符串
+    """
+    if isinstance(data_result, list) and data_result and isinstance(data_result[0], dict):
+        try:
+            from tabulate import tabulate
+
+            # 关闭数值解析，避免 floatfmt="g" 截断精度或转为科学计数法
+            return tabulate(data_result, headers="keys", tablefmt="pipe", disable_numparse=True)
+        except ImportError:
+            logger.warning("tabulate 未安装，数据总结回退为 JSON 格式")
+
+    # 如果数据是字典或列表，转换为JSON字符串
+    if isinstance(data_result, (dict, list)):
+        return json.dumps(data_result, ensure_ascii=False, indent=2, cls=DecimalEncoder)
+    return str(data_result)
+
+
 def summarize(state: AgentState):
     """
     使用模板系统构建提示词并调用LLM进行数据总结
@@ -68,11 +95,7 @@ def summarize(state: AgentState):
         # 获取数据结果
         data_result = state["execution_result"].data
         
-        # 如果数据是字典或列表，转换为JSON字符串
-        if isinstance(data_result, (dict, list)):
-            data_result_str = json.dumps(data_result, ensure_ascii=False, indent=2, cls=DecimalEncoder)
-        else:
-            data_result_str = str(data_result)
+        data_result_str = format_data_result(data_result)
         
         # 获取当前时间
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1,23 +1,24 @@
 import warnings
 
-from sqlalchemy import create_engine
-
 from common.datasource_util import DatasourceConfigUtil, DatasourceConnectionUtil, DB, ConnectType
 from model import Datasource
 
 warnings.filterwarnings("ignore", message=".*pkg_resources.*deprecated.*")
 
+import hashlib
 import json
 import logging
 import os
 import re
+import tempfile
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
 from threading import Lock
 from concurrent.futures import ThreadPoolExecutor
 
 import faiss
-import jieba
 import numpy as np
 import pandas as pd
 import requests
@@ -25,6 +26,17 @@ import requests
 # Langfuse OpenAI 延迟导入，避免在模块加载时触发 Langfuse 客户端初始化
 # from langfuse.openai import OpenAI
 from rank_bm25 import BM25Okapi
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# jieba_fast 为 jieba 的 C 加速版本（接口一致），未安装时回退到 jieba
+try:
+    import jieba_fast as jieba
+except ImportError:
+    import jieba
 from sqlalchemy.inspection import inspect
 from sqlalchemy.sql.expression import text
 
@@ -42,6 +54,17 @@ logger = logging.getLogger(__name__)
 # 数据库连接池
 db_pool = get_db_pool()
 
+# 混合检索中向量检索使用的共享线程池，避免每次查询都创建线程池
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SCHEMA_RETRIEVAL_WORKERS", "8")), thread_name_prefix="schema-retrieval"
+)
+
+# 分词前过滤标点符号的正则（仅保留中文、英文和数字）
+_CLEAN_RE = re.compile(r"[^\u4e00-\u9fa5a-zA-Z0-9]")
+
+# 预加载 jieba 词典，避免首次查询时的延迟初始化
+jieba.initialize()
+
 
 # 返回表数量配置（可配置，默认 6 个）
 TABLE_RETURN_COUNT = int(os.getenv("TABLE_RETURN_COUNT", "6"))
@@ -51,6 +74,40 @@ _table_info_cache: Dict[Tuple[int, Optional[int]], Tuple[Dict[str, Dict], float]
 _cache_lock = Lock()
 CACHE_TTL = int(os.getenv("TABLE_INFO_CACHE_TTL", "300"))  # 缓存有效期（秒），默认5分钟
 
+# DatabaseService 实例缓存（按数据源 ID）
+_db_service_cache: Dict[int, Tuple["DatabaseService", float]] = {}
+_db_service_cache_lock = Lock()
+DB_SERVICE_CACHE_TTL = int(os.getenv("DB_SERVICE_CACHE_TTL", str(CACHE_TTL)))
+
+# 查询向量缓存（LRU，键为 (模型名, 查询文本)，值为归一化后的 float32 字节串）
+_query_embedding_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_query_embedding_lock = Lock()
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# 在线 embedding 每批提交的文本数量
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# 表数量达到该阈值时使用 HNSW 近似索引，否则使用精确的 IndexFlatIP
+HNSW_MIN_TABLES = int(os.getenv("HNSW_MIN_TABLES", "200"))
+# HNSW 索引是否使用 int8 标量量化存储向量
+VECTOR_INDEX_SQ8 = os.getenv("VECTOR_INDEX_SQ8", "true").lower() == "true"
+
+# 向量检索第一名相似度不低于该阈值、且领先第二名不少于该差值时跳过重排序
+RERANK_SKIP_SCORE = float(os.getenv("RERANK_SKIP_SCORE", "0.85"))
+RERANK_SKIP_MARGIN = float(os.getenv("RERANK_SKIP_MARGIN", "0.1"))
+
+# BM25 分词结果的磁盘缓存目录（按表结构指纹 + 分词器标识命名）
+BM25_CACHE_DIR = os.getenv("BM25_CACHE_DIR", "/tmp/aix_bm25_cache")
+# 分词结果格式版本：修改 _tokenize_text 的清洗/过滤规则时需递增，使旧缓存失效
+BM25_CACHE_VERSION = 2
+# 分词器标识：jieba / jieba_fast 及其版本不同，分词结果也不同
+BM25_TOKENIZER_TAG = f"{jieba.__name__}-{getattr(jieba, '__version__', '0')}-v{BM25_CACHE_VERSION}"
+# 缓存目录最多保留的文件数，超出时删除最久未修改的文件
+BM25_CACHE_MAX_FILES = int(os.getenv("BM25_CACHE_MAX_FILES", "256"))
+
+# 每个 DatabaseService 保留的检索索引快照数（按表集合区分），不同权限的用户交替查询时无需重建
+RETRIEVAL_INDEX_CACHE_SIZE = int(os.getenv("RETRIEVAL_INDEX_CACHE_SIZE", "8"))
+
 
 # 嵌入模型配置
 def get_embedding_model_config():
@@ -107,12 +164,60 @@ def get_rerank_model_config():
 # 但为了保持兼容性，这里我们使用 lazy initialization 或者 property
 
 
+def get_database_service(datasource_id: Optional[int] = None) -> "DatabaseService":
+    """
+    获取数据源对应的 DatabaseService（进程内缓存），避免每次请求重复创建 engine、
+    查询模型配置以及重建 FAISS/BM25 索引。缓存在 DB_SERVICE_CACHE_TTL 秒后过期，
+    以便感知预计算 embedding 和模型配置的变化。
+    """
+    cache_key = datasource_id or 0
+    with _db_service_cache_lock:
+        cached = _db_service_cache.get(cache_key)
+        if cached and time.time() - cached[1] < DB_SERVICE_CACHE_TTL:
+            return cached[0]
+
+    service = DatabaseService(datasource_id)
+    with _db_service_cache_lock:
+        _db_service_cache[cache_key] = (service, time.time())
+    return service
+
+
+def clear_database_service_cache(datasource_id: Optional[int] = None):
+    """
+    清除 DatabaseService 缓存及表结构缓存，数据源配置变更或删除后调用。
+    不传 datasource_id 时清除全部缓存。
+    """
+    with _db_service_cache_lock:
+        if datasource_id is None:
+            _db_service_cache.clear()
+        else:
+            _db_service_cache.pop(datasource_id, None)
+    with _cache_lock:
+        for key in [k for k in _table_info_cache if datasource_id is None or k[0] == datasource_id]:
+            _table_info_cache.pop(key, None)
+
+
+@dataclass(frozen=True)
+class _RetrievalIndex:
+    """
+    某一表集合的检索索引快照（FAISS 向量索引 + BM25），构建后只读，可被多个请求在锁外并发使用。
+    """
+
+    table_names: List[str]
+    faiss_index: Optional[faiss.Index]
+    bm25: Optional[BM25Okapi]
+    comment_tokens: List[set]
+
+
 class DatabaseService:
     """
     支持混合检索（BM25 + 向量）与索引持久化的数据库服务。
     提供表结构检索、SQL 执行、错误修正 SQL 执行等功能。
     """
 
+    # 批量接口不可用时，逐条请求在线 embedding 的并发线程数
+    embedding_max_workers: int = 8
+
     def __init__(self, datasource_id: int = None):
         self._engine = None
         self._datasource_id = datasource_id
@@ -132,12 +237,8 @@ class DatabaseService:
                         db_enum = DB.get_db(ds.type, default_if_none=True)
                         if db_enum.connect_type == ConnectType.sqlalchemy:
                             config = DatasourceConfigUtil.decrypt_config(ds.configuration)
-                            uri = DatasourceConnectionUtil.build_connection_uri(ds.type, config)
-                            # SQL Server 2022 需要禁用加密以兼容 pymssql
-                            if ds.type == "sqlServer":
-                                self._engine = create_engine(uri, connect_args={"encryption": "off"})
-                            else:
-                                self._engine = create_engine(uri)
+                            # 复用按连接参数缓存的带连接池 engine
+                            self._engine = DatasourceConnectionUtil._get_engine(ds.type, config)
                             logger.info(f"Initialized DatabaseService with datasource_id: {datasource_id}")
                         else:
                             # 对于使用原生驱动的数据库（如 Doris），不创建 SQLAlchemy engine
@@ -148,11 +249,9 @@ class DatabaseService:
         if not self._engine:
             self._engine = db_pool.get_engine()
 
-        self._faiss_index: Optional[faiss.Index] = None
-        self._table_names: List[str] = []
-        self._corpus: List[str] = []
-        self._tokenized_corpus: List[List[str]] = []
-        self._index_initialized: bool = False
+        # 检索索引快照（键为 (表名元组, 表结构指纹)，LRU 淘汰）；锁只保护字典的查找与替换，检索在锁外执行
+        self._retrieval_indexes: "OrderedDict[Tuple[Tuple[str, ...], str], _RetrievalIndex]" = OrderedDict()
+        self._retrieval_lock = Lock()
         self.USE_RERANKER: bool = True  # 是否启用重排序器
 
         # Initialize clients lazily or now
@@ -196,9 +295,9 @@ class DatabaseService:
         """
         对中文/英文文本进行分词，过滤标点符号。
         """
-        filtered_text = re.sub(r"[^\u4e00-\u9fa5a-zA-Z0-9]", " ", text_str)
-        tokens = jieba.lcut(filtered_text, cut_all=False)
-        return [token.strip() for token in tokens if token.strip()]
+        tokens = jieba.lcut(_CLEAN_RE.sub(" ", text_str), cut_all=False)
+        # 标点已替换为空格，分词结果中只会出现纯空白 token，无需逐个 strip
+        return [token for token in tokens if token and not token.isspace()]
 
     def _get_table_comment(self, table_name: str) -> str:
         """
@@ -303,6 +402,67 @@ class DatabaseService:
         # 兜底：没有注释或不支持，返回空字符串即可（不影响后续流程）
         return ""
 
+    def _get_all_table_comments(self, inspector=None) -> Optional[Dict[str, str]]:
+        """
+        一次性获取当前库所有表的注释，避免逐表查询产生 N 次数据库往返。
+        优先使用 SQLAlchemy Inspector 的批量接口，不支持时按方言执行单条元数据查询。
+
+        Returns:
+            {表名: 注释} 字典；当前方言不支持批量获取时返回 None，由调用方逐表兜底
+        """
+        # 1. SQLAlchemy 2.0 批量接口
+        try:
+            inspector = inspector or inspect(self._engine)
+            multi_comments = inspector.get_multi_table_comment()
+            comments = {}
+            for (_, table_name), info in multi_comments.items():
+                comment = info.get("text") if isinstance(info, dict) else info
+                comments[table_name] = str(comment or "").strip()
+            return comments
+        except Exception as e:
+            logger.debug(f"Inspector 批量获取表注释失败，尝试方言级兜底: {e}")
+
+        # 2. 根据方言执行一次性元数据查询
+        dialect_name = getattr(getattr(self._engine, "dialect", None), "name", "") or ""
+        dialect_name = dialect_name.lower()
+
+        if dialect_name in ("mysql", "mariadb"):
+            query = """
+                SELECT table_name, table_comment
+                FROM information_schema.tables
+                WHERE table_schema = DATABASE()
+            """
+        elif dialect_name in ("postgresql", "postgres"):
+            query = """
+                SELECT c.relname, obj_description(c.oid)
+                FROM pg_class c
+                WHERE c.relkind IN ('r','v','m','f','p')
+                  AND pg_table_is_visible(c.oid)
+            """
+        elif dialect_name in ("mssql", "sqlserver"):
+            query = """
+                SELECT t.name, CAST(ep.value AS NVARCHAR(4000))
+                FROM sys.tables t
+                LEFT JOIN sys.extended_properties ep
+                  ON ep.major_id = t.object_id
+                 AND ep.minor_id = 0
+                 AND ep.name = 'MS_Description'
+            """
+        elif "oracle" in dialect_name:
+            query = "SELECT table_name, comments FROM user_tab_comments"
+        elif "clickhouse" in dialect_name:
+            query = "SELECT name, comment FROM system.tables WHERE database = currentDatabase()"
+        else:
+            return None
+
+        try:
+            with self._engine.connect() as conn:
+                rows = conn.execute(text(query)).fetchall()
+            return {str(row[0]): (row[1] or "").strip() for row in rows}
+        except Exception as e:
+            logger.warning(f"⚠️ 批量获取表注释失败: {e}")
+            return None
+
     def _get_table_comment_from_metadata(self, table_name: str) -> str:
         """
         从 t_datasource_table 元数据表获取表注释。
@@ -332,6 +492,17 @@ class DatabaseService:
             logger.warning(f"⚠️ 从元数据获取表 {table_name} 注释失败: {e}")
             return ""
 
+    @staticmethod
+    def _generate_schema_fingerprint(table_info: Dict[str, Dict]) -> str:
+        """
+        生成表结构指纹，表结构（表名、字段、注释、外键）变化时指纹随之变化。
+        """
+        if orjson is not None:
+            payload = orjson.dumps(table_info, option=orjson.OPT_SORT_KEYS, default=str)
+        else:
+            payload = json.dumps(table_info, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        return hashlib.md5(payload, usedforsecurity=False).hexdigest()
+
     @staticmethod
     def _build_document(table_name: str, table_info: dict) -> str:
         """
@@ -467,11 +638,25 @@ class DatabaseService:
             except Exception as e:
                 logger.warning(f"⚠️ 获取列权限失败: {e}", exc_info=True)
 
+        # 一次性获取所有表注释，失败时退化为逐表查询
+        all_table_comments = self._get_all_table_comments(inspector)
+
+        # 使用 SQLAlchemy 2.0 批量反射接口一次性获取所有表的字段和外键，失败时退化为逐表查询
+        try:
+            multi_columns = {name: cols for (_, name), cols in inspector.get_multi_columns().items()}
+            multi_foreign_keys = {name: fks for (_, name), fks in inspector.get_multi_foreign_keys().items()}
+        except Exception as e:
+            logger.debug(f"Inspector 批量获取字段/外键失败，改为逐表获取: {e}")
+            multi_columns, multi_foreign_keys = {}, {}
+
         table_info = {}
         for table_name in table_names:
             try:
                 columns = {}
-                for col in inspector.get_columns(table_name):
+                table_columns = multi_columns.get(table_name)
+                if table_columns is None:
+                    table_columns = inspector.get_columns(table_name)
+                for col in table_columns:
                     # 权限过滤：如果配置了列权限，只返回有权限的字段
                     if table_name in column_permissions:
                         if col["name"] not in column_permissions[table_name]:
@@ -487,12 +672,21 @@ class DatabaseService:
                     logger.debug(f"⚠️ 表 {table_name} 无可用字段（权限过滤后），跳过")
                     continue
 
+                table_foreign_keys = multi_foreign_keys.get(table_name)
+                if table_foreign_keys is None:
+                    table_foreign_keys = inspector.get_foreign_keys(table_name)
                 foreign_keys = [
                     f"{fk['constrained_columns'][0]} -> {fk['referred_table']}.{fk['referred_columns'][0]}"
-                    for fk in inspector.get_foreign_keys(table_name)
+                    for fk in table_foreign_keys
                 ]
 
-                table_comment = self._get_table_comment(table_name)
+                if all_table_comments is not None:
+                    # Oracle 的 user_tab_comments 中表名为大写
+                    table_comment = all_table_comments.get(table_name) or all_table_comments.get(
+                        table_name.upper(), ""
+                    )
+                else:
+                    table_comment = self._get_table_comment(table_name)
 
                 table_info[table_name] = {
                     "columns": columns,
@@ -636,7 +830,8 @@ class DatabaseService:
                         missing_table_names.append(table_name)
 
                 if precomputed_embeddings:
-                    embeddings_array = np.array(precomputed_embeddings).astype("float32")
+                    # 直接按 float32 构建，避免先生成 float64 数组再复制带来的双倍内存峰值
+                    embeddings_array = np.array(precomputed_embeddings, dtype="float32")
                     faiss.normalize_L2(embeddings_array)
                     logger.info(f"✅ 从数据库加载了 {len(precomputed_embeddings)} 个预计算的 embedding")
                     return embeddings_array, precomputed_table_names, missing_table_names
@@ -690,39 +885,110 @@ class DatabaseService:
             logger.info(f"✅ 离线模型嵌入生成完成，耗时 {time.time() - start_time:.2f}s，维度: {embedding_dim}")
             return embeddings
 
-        # 使用在线模型
+        # 使用在线模型：按批提交，减少 HTTP 往返次数
         logger.info(f"🌐 调用在线嵌入模型 {self.embedding_model_name}...")
         start_time = time.time()
-        embeddings = []
-        for doc in texts:
+        embeddings = [None] * len(texts)
+        embedding_dim = 1024  # 默认维度，首个成功批次后更新
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = texts[start : start + EMBEDDING_BATCH_SIZE]
             try:
-                response = self.embedding_client.embeddings.create(model=self.embedding_model_name, input=doc)
-                embeddings.append(response.data[0].embedding)
+                response = self.embedding_client.embeddings.create(model=self.embedding_model_name, input=batch)
+                # 按 index 排序，保证与输入顺序一致
+                batch_data = sorted(response.data, key=lambda d: d.index)
+                if len(batch_data) != len(batch):
+                    raise ValueError(f"返回 {len(batch_data)} 条向量，期望 {len(batch)} 条")
+                embedding_dim = len(batch_data[0].embedding)
+                embeddings[start : start + len(batch)] = [d.embedding for d in batch_data]
             except Exception as e:
-                logger.error(f"❌ 在线模型嵌入生成失败 ({doc[:30]}...): {e}")
-                embeddings.append(np.zeros(1024))  # 占位符
+                # 服务端可能不支持列表输入，退化为并发逐条请求
+                logger.warning(f"⚠️ 批量嵌入失败 (批次 {start}-{start + len(batch) - 1})，改为并发逐条请求: {e}")
+                with ThreadPoolExecutor(max_workers=self.embedding_max_workers) as executor:
+                    batch_embeddings = list(executor.map(self._embed_one, batch))
+                for offset, vec in enumerate(batch_embeddings):
+                    if vec is not None:
+                        embedding_dim = len(vec)
+                        embeddings[start + offset] = vec
+
+        # 失败的文本使用零向量占位
+        embeddings = [vec if vec is not None else np.zeros(embedding_dim) for vec in embeddings]
 
         embeddings = np.array(embeddings).astype("float32")
         faiss.normalize_L2(embeddings)
         logger.info(f"✅ 在线模型嵌入生成完成，耗时 {time.time() - start_time:.2f}s")
         return embeddings
 
-    def _initialize_vector_index(self, table_info: Dict[str, Dict]):
+    def _embed_one(self, doc: str) -> Optional[List[float]]:
         """
-        初始化 FAISS 向量索引：从数据库读取预计算的 embedding 并构建内存索引。
-        仅使用预计算的 embedding，不在检索时做实时计算。
+        调用在线模型生成单条文本的嵌入向量，失败时返回 None。
         """
-        if self._index_initialized:
-            return
+        try:
+            response = self.embedding_client.embeddings.create(model=self.embedding_model_name, input=doc)
+            return response.data[0].embedding
+        except Exception as e:
+            logger.error(f"❌ 在线模型嵌入生成失败 ({doc[:30]}...): {e}")
+            return None
+
+    def _get_retrieval_index(self, table_info: Dict[str, Dict]) -> _RetrievalIndex:
+        """
+        获取当前表集合对应的检索索引快照，不存在时构建。
+        锁内只做查找与替换，构建和检索都在锁外进行；并发请求可能重复构建同一快照，结果一致，后写入者覆盖。
+        """
+        fingerprint = self._generate_schema_fingerprint(table_info)
+        # 指纹按键排序生成，表顺序需单独计入，保证索引下标与表顺序一致
+        key = (tuple(table_info.keys()), fingerprint)
+        with self._retrieval_lock:
+            index = self._retrieval_indexes.get(key)
+            if index is not None:
+                self._retrieval_indexes.move_to_end(key)
+                return index
+
+        index = self._build_retrieval_index(table_info, fingerprint)
+        with self._retrieval_lock:
+            self._retrieval_indexes[key] = index
+            self._retrieval_indexes.move_to_end(key)
+            while len(self._retrieval_indexes) > RETRIEVAL_INDEX_CACHE_SIZE:
+                self._retrieval_indexes.popitem(last=False)
+        return index
+
+    def _build_retrieval_index(self, table_info: Dict[str, Dict], fingerprint: str) -> _RetrievalIndex:
+        """
+        构建检索索引快照：FAISS 向量索引（仅使用预计算 embedding）与 BM25 模型。
+        """
+        faiss_index = self._build_vector_index(table_info)
+
+        bm25 = None
+        comment_tokens: List[set] = []
+        if table_info:
+            # 优先读取磁盘上的分词结果，避免冷启动时重复调用 jieba
+            cached = self._load_bm25_tokens(fingerprint)
+            if cached is not None:
+                tokenized_corpus, comment_tokens = cached
+            else:
+                tokenized_corpus = [
+                    self._tokenize_text(self._build_document(name, info)) for name, info in table_info.items()
+                ]
+                comment_tokens = [
+                    set(self._tokenize_text(info.get("table_comment", ""))) for info in table_info.values()
+                ]
+                self._save_bm25_tokens(fingerprint, tokenized_corpus, comment_tokens)
+            bm25 = BM25Okapi(tokenized_corpus)
+
+        return _RetrievalIndex(
+            table_names=list(table_info.keys()),
+            faiss_index=faiss_index,
+            bm25=bm25,
+            comment_tokens=comment_tokens,
+        )
 
-        # 构建新索引
+    def _build_vector_index(self, table_info: Dict[str, Dict]) -> Optional[faiss.Index]:
+        """
+        构建 FAISS 向量索引：从数据库读取预计算的 embedding 并构建内存索引。
+        仅使用预计算的 embedding，不在检索时做实时计算；无法构建时返回 None（仅使用 BM25）。
+        """
         logger.info("🏗️ 开始构建向量索引（从数据库读取 embedding）...")
         start_time = time.time()
 
-        # 记录所有表名和语料（用于 BM25 等）
-        self._table_names = list(table_info.keys())
-        self._corpus = [self._build_document(name, info) for name, info in table_info.items()]
-
         # 从数据库获取预计算的 embedding（不会做任何实时计算）
         precomputed_embeddings, precomputed_table_names, missing_table_names = self._get_precomputed_embeddings(
             table_info
@@ -731,9 +997,7 @@ class DatabaseService:
         # 如果没有任何预计算 embedding，则禁用向量索引（仅使用 BM25）
         if precomputed_embeddings is None or len(precomputed_table_names) == 0:
             logger.warning("⚠️ 未找到任何预计算的表结构 embedding，向量检索将被禁用，仅使用 BM25")
-            self._faiss_index = None
-            self._index_initialized = True
-            return
+            return None
 
         # 如果存在缺失的 embedding，为避免索引和表顺序不一致，这里直接禁用向量检索
         if len(missing_table_names) > 0:
@@ -741,91 +1005,145 @@ class DatabaseService:
                 f"⚠️ 共有 {len(missing_table_names)} 张表缺少预计算 embedding，"
                 "为保证索引与表顺序一致，本次禁用向量检索，仅使用 BM25"
             )
-            self._faiss_index = None
-            self._index_initialized = True
-            return
+            return None
 
-        # 此时说明所有表都存在预计算 embedding，顺序与 self._table_names 一致
+        # 此时说明所有表都存在预计算 embedding，顺序与 table_info 一致
         embeddings = precomputed_embeddings
 
         if embeddings.size == 0:
             logger.error("❌ 无法生成嵌入，索引构建失败")
-            return
+            return None
 
         # 初始化 FAISS 索引（仅在内存中）
-        dimension = embeddings.shape[1]
-        self._faiss_index = faiss.IndexFlatIP(dimension)  # 内积 = 余弦相似度
-        self._faiss_index.add(embeddings)
+        faiss_index = self._build_faiss_index(embeddings)
 
         elapsed = time.time() - start_time
-        logger.info(f"🎉 向量索引构建完成，共 {len(self._table_names)} 张表，耗时 {elapsed:.2f}s")
-        self._index_initialized = True
+        logger.info(f"🎉 向量索引构建完成，共 {len(table_info)} 张表，耗时 {elapsed:.2f}s")
+        return faiss_index
+
+    @staticmethod
+    def _build_faiss_index(embeddings: np.ndarray) -> faiss.Index:
+        """
+        根据表数量选择 FAISS 索引类型（向量已归一化，内积 = 余弦相似度）。
+        表数量较少时使用精确检索的 IndexFlatIP，否则使用近似检索的 HNSW 图索引，
+        并可将向量量化为 int8 存储，内存占用约为 FP32 的 1/4。
+        """
+        count, dimension = embeddings.shape
+        if count < HNSW_MIN_TABLES:
+            index = faiss.IndexFlatIP(dimension)
+        else:
+            if VECTOR_INDEX_SQ8:
+                index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, 32, faiss.METRIC_INNER_PRODUCT)
+                index.train(embeddings)
+            else:
+                index = faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = 64
+        index.add(embeddings)
+        return index
 
-    def _retrieve_by_vector(self, query: str, top_k: int = 10) -> List[int]:
+    def _embed_query_cached(self, query: str) -> Optional[np.ndarray]:
+        """
+        生成归一化后的查询向量（形状为 1 x d），结果按 (模型, 查询) 缓存，重复查询无需再次调用模型。
+        """
+        model_key = "local" if self.use_local_embedding or not self.embedding_client else self.embedding_model_name
+        cache_key = (model_key, query)
+        with _query_embedding_lock:
+            cached = _query_embedding_cache.get(cache_key)
+            if cached is not None:
+                _query_embedding_cache.move_to_end(cache_key)
+                return np.frombuffer(cached, dtype="float32").reshape(1, -1).copy()
+
+        if model_key == "local":
+            # 使用离线模型
+            from common.local_embedding import \
+                generate_embedding_local_array_sync
+            embedding = generate_embedding_local_array_sync(query)
+            if embedding is None or not embedding.size:
+                return None
+        else:
+            # 使用在线模型
+            response = self.embedding_client.embeddings.create(model=self.embedding_model_name, input=query)
+            embedding = response.data[0].embedding
+
+        query_vec = np.array([embedding]).astype("float32")
+        faiss.normalize_L2(query_vec)
+        with _query_embedding_lock:
+            _query_embedding_cache[cache_key] = query_vec.tobytes()
+            if len(_query_embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                _query_embedding_cache.popitem(last=False)
+        return query_vec
+
+    def _retrieve_by_vector(self, index: _RetrievalIndex, query: str, top_k: int = 10) -> List[int]:
         """
         使用向量相似度检索最相关的表。
         优先使用在线模型，如果没有配置则使用离线模型。
         """
-        if not self._faiss_index:
+        indices, _ = self._retrieve_by_vector_with_scores(index, query, top_k)
+        return indices
+
+    def _retrieve_by_vector_with_scores(
+        self, index: _RetrievalIndex, query: str, top_k: int = 10
+    ) -> Tuple[List[int], List[float]]:
+        """
+        使用向量相似度检索最相关的表，同时返回相似度分数（余弦相似度，降序）。
+        """
+        if not index.faiss_index:
             logger.error("❌ 向量索引未初始化")
-            return []
+            return [], []
 
         try:
             # 生成查询向量
-            if self.use_local_embedding or not self.embedding_client:
-                # 使用离线模型
-                from common.local_embedding import generate_embedding_local_sync
-                embedding = generate_embedding_local_sync(query)
-                if not embedding:
-                    logger.warning("⚠️ 离线模型生成 embedding 失败，跳过向量检索")
-                    return []
-                query_vec = np.array([embedding]).astype("float32")
-            else:
-                # 使用在线模型
-                response = self.embedding_client.embeddings.create(model=self.embedding_model_name, input=query)
-                query_vec = np.array([response.data[0].embedding]).astype("float32")
+            query_vec = self._embed_query_cached(query)
+            if query_vec is None:
+                logger.warning("⚠️ 离线模型生成 embedding 失败，跳过向量检索")
+                return [], []
 
             # 检查维度是否匹配
             query_dim = query_vec.shape[1]
-            index_dim = self._faiss_index.d
+            index_dim = index.faiss_index.d
             if query_dim != index_dim:
                 logger.error(
                     f"❌ 向量维度不匹配：查询向量维度={query_dim}，索引维度={index_dim}。"
                     f"这可能是因为索引使用的是在线模型的 embedding，而查询使用的是离线模型。"
                     f"建议：重新计算表的 embedding 或使用相同的模型。"
                 )
-                return []
+                return [], []
 
-            faiss.normalize_L2(query_vec)
-            _, indices = self._faiss_index.search(query_vec, top_k)
-            return indices[0].tolist()
+            scores, indices = index.faiss_index.search(query_vec, top_k)
+            return indices[0].tolist(), scores[0].tolist()
         except Exception as e:
             logger.error(f"❌ 向量检索失败: {e}", exc_info=True)
-            return []
+            return [], []
+
+    @staticmethod
+    def _is_vector_result_confident(vector_scores: List[float]) -> bool:
+        """
+        判断向量检索结果是否足够可信：第一名相似度超过阈值，且与第二名拉开足够差距。
+        """
+        if not vector_scores:
+            return False
+        top_score = vector_scores[0]
+        second_score = vector_scores[1] if len(vector_scores) > 1 else 0.0
+        return top_score >= RERANK_SKIP_SCORE and top_score - second_score >= RERANK_SKIP_MARGIN
 
-    def _retrieve_by_bm25(self, table_info: Dict[str, Dict], user_query: str) -> List[int]:
+    def _retrieve_by_bm25(self, index: _RetrievalIndex, user_query: str) -> List[int]:
         """
         使用 BM25 算法进行关键词匹配检索。
         """
-        if not user_query or not table_info:
-            return list(range(len(table_info)))
+        if not user_query or index.bm25 is None:
+            return list(range(len(index.table_names)))
 
         logger.info("🔄 执行 BM25 检索...")
-        self._corpus = [self._build_document(name, info) for name, info in table_info.items()]
-        self._tokenized_corpus = [self._tokenize_text(doc) for doc in self._corpus]
         query_tokens = self._tokenize_text(user_query)
-
-        bm25 = BM25Okapi(self._tokenized_corpus)
-        doc_scores = bm25.get_scores(query_tokens)
+        doc_scores = index.bm25.get_scores(query_tokens)
 
         # 增强：若查询词出现在表注释中，则提升分数
         enhanced_scores = doc_scores.copy()
-        table_comments = [info.get("table_comment", "") for info in table_info.values()]
-        for i, (comment, score) in enumerate(zip(table_comments, doc_scores)):
+        for i, (comment_tokens, score) in enumerate(zip(index.comment_tokens, doc_scores)):
             if score <= 0:
                 continue
-            comment_tokens = self._tokenize_text(comment)
-            overlap = set(query_tokens) & set(comment_tokens)
+            overlap = set(query_tokens) & comment_tokens
             if overlap:
                 overlap_ratio = len(overlap) / len(set(query_tokens))
                 enhanced_scores[i] += score * overlap_ratio * 1.5
@@ -833,18 +1151,97 @@ class DatabaseService:
         scored_indices = sorted(enumerate(enhanced_scores), key=lambda x: x[1], reverse=True)
         return [idx for idx, _ in scored_indices]
 
+    def _load_bm25_tokens(self, fingerprint: str) -> Optional[Tuple[List[List[str]], List[set]]]:
+        """
+        从磁盘加载指定表结构指纹对应的 BM25 分词结果，返回 (语料分词, 表注释分词)，不存在或读取失败时返回 None。
+        """
+        cache_file = self._bm25_cache_file(fingerprint)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            tokenized_corpus = cached["tokenized_corpus"]
+            comment_tokens = [set(tokens) for tokens in cached["comment_tokens"]]
+            logger.debug(f"✅ 从磁盘加载 BM25 分词缓存: {cache_file}")
+            return tokenized_corpus, comment_tokens
+        except Exception as e:
+            logger.warning(f"⚠️ 读取 BM25 分词缓存失败: {e}")
+            return None
+
+    @staticmethod
+    def _bm25_cache_file(fingerprint: str) -> str:
+        """分词缓存文件路径，分词器或分词规则变化后文件名随之变化"""
+        return os.path.join(BM25_CACHE_DIR, f"{fingerprint}.{BM25_TOKENIZER_TAG}.json")
+
+    def _save_bm25_tokens(self, fingerprint: str, tokenized_corpus: List[List[str]], comment_tokens: List[set]):
+        """
+        将 BM25 分词结果按表结构指纹写入磁盘，表结构变化后指纹不同，旧缓存自然失效。
+        """
+        cache_file = self._bm25_cache_file(fingerprint)
+        tmp_file = None
+        try:
+            os.makedirs(BM25_CACHE_DIR, exist_ok=True)
+            # 每次写入使用独立的临时文件，并发重建时互不覆盖
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=BM25_CACHE_DIR, suffix=".tmp", delete=False
+            ) as f:
+                tmp_file = f.name
+                json.dump(
+                    {
+                        "tokenized_corpus": tokenized_corpus,
+                        "comment_tokens": [sorted(tokens) for tokens in comment_tokens],
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_file, cache_file)
+            tmp_file = None
+            self._prune_bm25_cache()
+        except Exception as e:
+            logger.warning(f"⚠️ 写入 BM25 分词缓存失败: {e}")
+        finally:
+            if tmp_file is not None:
+                try:
+                    os.unlink(tmp_file)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _prune_bm25_cache():
+        """缓存文件数超过 BM25_CACHE_MAX_FILES 时，删除最久未修改的缓存文件"""
+        try:
+            entries = [e for e in os.scandir(BM25_CACHE_DIR) if e.is_file() and e.name.endswith(".json")]
+        except OSError:
+            return
+        if len(entries) <= BM25_CACHE_MAX_FILES:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[: len(entries) - BM25_CACHE_MAX_FILES]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
     @staticmethod
     def _rrf_fusion(bm25_indices: List[int], vector_indices: List[int], k: int = 60) -> List[int]:
         """
         使用 RRF（Reciprocal Rank Fusion）融合两种检索结果。
         """
-        scores = {}
-        for rank, idx in enumerate(bm25_indices):
-            scores[idx] = scores.get(idx, 0) + 1 / (k + rank + 1)
-        for rank, idx in enumerate(vector_indices):
-            scores[idx] = scores.get(idx, 0) + 1 / (k + rank + 1)
-        sorted_indices = sorted(scores.items(), key=lambda x: -x[1])
-        return [idx for idx, _ in sorted_indices]
+        bm25_arr = np.asarray(bm25_indices, dtype=np.int64)
+        vector_arr = np.asarray(vector_indices, dtype=np.int64)
+        size = int(max(bm25_arr.max(initial=-1), vector_arr.max(initial=-1))) + 1
+        if size <= 0:
+            return []
+
+        scores = np.zeros(size, dtype=np.float64)
+        for arr in (bm25_arr, vector_arr):
+            # FAISS 结果不足 top_k 时会用 -1 填充，需要排除
+            ranks = np.arange(len(arr))
+            valid = arr >= 0
+            np.add.at(scores, arr[valid], 1.0 / (k + ranks[valid] + 1))
+        order = np.argsort(-scores, kind="stable")
+        return order[scores[order] > 0].tolist()
 
     def _rerank_with_dashscope(self, query: str, candidate_tables: Dict[str, Dict]) -> List[Tuple[str, float]]:
         """
@@ -856,11 +1253,14 @@ class DatabaseService:
 
         try:
             documents = []
-            name_to_text = {}
-            for table_name, info in candidate_tables.items():
+            idx_to_name = {}
+            text_to_name = {}
+            for idx, (table_name, info) in enumerate(candidate_tables.items()):
+                # 只用本次请求的表信息构建文档，不同列权限下同名表的文档内容可能不同
                 doc_text = self._build_document(table_name, info)
                 documents.append(doc_text)
-                name_to_text[table_name] = doc_text
+                idx_to_name[idx] = table_name
+                text_to_name.setdefault(doc_text, table_name)
 
             if not documents:
                 return []
@@ -901,7 +1301,7 @@ class DatabaseService:
                     for item in result_data["output"]["results"]:
                         idx = item["index"]
                         score = item["relevance_score"]
-                        table_name = next(name for name, text in name_to_text.items() if text == documents[idx])
+                        table_name = idx_to_name[idx]
                         results.append((table_name, score))
 
                     results.sort(key=lambda x: x[1], reverse=True)
@@ -917,10 +1317,9 @@ class DatabaseService:
                             score = item["relevance_score"]  # 使用relevance_score字段
                             # 从document对象中提取文本
                             if "document" in item and "text" in item["document"]:
-                                doc_text = item["document"]["text"]
-                                table_name = next(name for name, text in name_to_text.items() if text == doc_text)
+                                table_name = text_to_name[item["document"]["text"]]
                             else:
-                                table_name = next(name for name, text in name_to_text.items() if text == documents[idx])
+                                table_name = idx_to_name[idx]
                             results.append((table_name, score))
                     results.sort(key=lambda x: x[1], reverse=True)
                     logger.info("✅ Rerank 完成")
@@ -932,7 +1331,7 @@ class DatabaseService:
                         if isinstance(item, dict) and "index" in item:
                             idx = item["index"]
                             score = item.get("score", 1.0 - i * 0.01)  # 默认分数递减
-                            table_name = next(name for name, text in name_to_text.items() if text == documents[idx])
+                            table_name = idx_to_name[idx]
                             results.append((table_name, score))
                     logger.info("✅ Rerank 完成")
                     return results
@@ -1178,20 +1577,16 @@ class DatabaseService:
             # 确保 user_query 也在返回的 state 中（虽然它应该已经在初始 state 中了）
             state["user_query"] = user_query
 
-            # 初始化向量索引
-            self._initialize_vector_index(all_table_info)
+            # 获取当前表集合的索引快照（锁内只取引用），检索全程在锁外执行，同一数据源的请求可并行
+            index = self._get_retrieval_index(all_table_info)
 
             # 混合检索 - 并行执行 BM25 和向量检索以提高性能
             logger.info("🔍 开始混合检索：BM25 + 向量检索（并行执行）")
 
-            # 使用线程池并行执行 BM25 和向量检索
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                bm25_future = executor.submit(self._retrieve_by_bm25, all_table_info, user_query)
-                vector_future = executor.submit(self._retrieve_by_vector, user_query, 20)
-
-                # 等待两个任务完成
-                bm25_top_indices = bm25_future.result()
-                vector_top_indices = vector_future.result()
+            # 向量检索（受网络延迟影响）提交到共享线程池，BM25（CPU 计算）在当前线程执行，两者重叠
+            vector_future = _retrieval_executor.submit(self._retrieve_by_vector_with_scores, index, user_query, 20)
+            bm25_top_indices = self._retrieve_by_bm25(index, user_query)
+            vector_top_indices, vector_scores = vector_future.result()
 
             logger.info(f"📊 BM25检索返回 {len(bm25_top_indices)} 个结果")
             logger.info(f"🔗 向量检索返回 {len(vector_top_indices)} 个结果")
@@ -1208,22 +1603,38 @@ class DatabaseService:
             fused_indices = self._rrf_fusion(bm25_top_indices, candidate_indices, k=60)
             logger.info(f"🔄 RRF融合后得到 {len(fused_indices)} 个结果")
 
+            # 预先计算名次映射，避免在循环中反复 list.index()
+            bm25_rank_map = {}
+            for rank, idx in enumerate(bm25_top_indices):
+                bm25_rank_map.setdefault(idx, rank)
+            vector_rank_map = {}
+            for rank, idx in enumerate(vector_top_indices):
+                vector_rank_map.setdefault(idx, rank)
+
             # 评分筛选
             selected_indices = []
             for idx in fused_indices:
-                bm25_rank = bm25_top_indices.index(idx) + 1 if idx in bm25_top_indices else len(all_table_info) + 1
-                vector_rank = (
-                    vector_top_indices.index(idx) + 1 if idx in vector_top_indices else len(all_table_info) + 1
-                )
+                bm25_rank = bm25_rank_map.get(idx, len(all_table_info)) + 1
+                vector_rank = vector_rank_map.get(idx, len(all_table_info)) + 1
                 score = 1 / (60 + bm25_rank) + 1 / (60 + vector_rank)
                 if score >= 0.01 and len(selected_indices) < 10:
                     selected_indices.append(idx)
 
-            candidate_table_names = [self._table_names[i] for i in selected_indices]
+            table_names = index.table_names
+            candidate_table_names = [table_names[i] for i in selected_indices]
             candidate_table_info = {name: all_table_info[name] for name in candidate_table_names}
 
-            # 重排序
-            reranked_results = self._rerank_with_dashscope(user_query, candidate_table_info)
+            # 重排序：向量检索结果置信度足够高时直接采用向量排序，省去一次重排 API 调用
+            if self._is_vector_result_confident(vector_scores):
+                vector_score_map = dict(zip(vector_top_indices, vector_scores))
+                reranked_results = sorted(
+                    ((table_names[i], vector_score_map.get(i, 0.0)) for i in selected_indices),
+                    key=lambda x: x[1],
+                    reverse=True,
+                )
+                logger.info("⏭️ 向量检索置信度高，跳过重排序")
+            else:
+                reranked_results = self._rerank_with_dashscope(user_query, candidate_table_info)
             final_table_names = [name for name, _ in reranked_results][:TABLE_RETURN_COUNT]  # 取 top N（可配置）
 
             # 去重
@@ -1235,11 +1646,12 @@ class DatabaseService:
             # 打印结果摘要（使用 logger 以便统一格式化）
             logger.info("🔍 用户查询: %s", user_query)
             logger.info("📊 检索与排序结果:")
+            table_name_index = {name: i for i, name in enumerate(table_names)}
             for i, table_name in enumerate(final_table_names[:TABLE_RETURN_COUNT]):
-                if table_name in self._table_names:
-                    bm25_idx = self._table_names.index(table_name)
-                    bm25_rank = bm25_top_indices.index(bm25_idx) + 1 if bm25_idx in bm25_top_indices else "-"
-                    vector_rank = vector_top_indices.index(bm25_idx) + 1 if bm25_idx in vector_top_indices else "-"
+                if table_name in table_name_index:
+                    bm25_idx = table_name_index[table_name]
+                    bm25_rank = bm25_rank_map[bm25_idx] + 1 if bm25_idx in bm25_rank_map else "-"
+                    vector_rank = vector_rank_map[bm25_idx] + 1 if bm25_idx in vector_rank_map else "-"
                     rerank_score = next((score for name, score in reranked_results if name == table_name), 0.0)
                     logger.info(
                         "  %s. %-15s | BM25: %2s | Vector: %2s | Rerank: %.3f",
@@ -72,11 +72,11 @@ def sql_generate(state: AgentState) -> AgentState:
         # 表关系补充：在 SQL 生成阶段补充缺失的关联表，并生成外键关系信息
         # 这样可以在 SQL 生成时根据实际需要补充关联表，而不是在检索阶段就补充
         try:
-            from agent.text2sql.database.db_service import DatabaseService
+            from agent.text2sql.database.db_service import get_database_service
             user_id = state.get("user_id")
             
-            # 创建 DatabaseService 实例用于表关系补充
-            db_service = DatabaseService(datasource_id)
+            # 获取（缓存的）DatabaseService 实例用于表关系补充
+            db_service = get_database_service(datasource_id)
             
             # 获取所有表信息（用于补充关联表，使用缓存避免重复查询）
             all_table_info = db_service._fetch_all_table_info(user_id=user_id, use_cache=True)
@@ -4,7 +4,7 @@ Schema 格式化工具
 """
 
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -43,37 +43,36 @@ def format_schema_to_m_schema(
     if not db_info:
         return ""
     
-    schema_str = f"【DB_ID】 {db_name}\n【Schema】\n"
+    # 累积到列表中最后统一 join，避免在循环中反复拼接字符串
+    parts: List[str] = ["【DB_ID】 ", db_name, "\n【Schema】\n"]
+
+    # 以下判断对每次调用都是不变的，提前到循环外计算
+    db_type_lower = db_type.lower()
+    # Oracle: 统一在提示词中使用“全大写对象名”，避免 LLM 生成 "t_products" 这种与实际表名大小写不一致的写法；
+    # Oracle 中实际列名默认大写，列名也统一展示为大写，便于 LLM 生成正确的带引号标识符
+    case_fn = str.upper if db_type_lower == "oracle" else str
+    # 根据数据库类型判断是否需要使用 schema.table 格式：
+    # 需要 Schema 的数据库使用 schema.table 格式，
+    # MySQL、ClickHouse、Doris、StarRocks、Elasticsearch 等不使用 schema 前缀
+    table_prefix = f"# Table: {db_name}." if db_type_lower in NEED_SCHEMA_TYPES else "# Table: "
     
     for table_name, table_info in db_info.items():
-        # Oracle: 统一在提示词中使用“全大写对象名”，避免 LLM 生成 "t_products" 这种与实际表名大小写不一致的写法
-        if db_type.lower() == "oracle":
-            display_table_name = table_name.upper()
-        else:
-            display_table_name = table_name
         # 构建表定义行
-        # 根据数据库类型判断是否需要使用 schema.table 格式
-        if db_type.lower() in NEED_SCHEMA_TYPES:
-            # 需要 Schema 的数据库使用 schema.table 格式
-            schema_table = f"# Table: {db_name}.{display_table_name}"
-        else:
-            # MySQL、ClickHouse、Doris、StarRocks、Elasticsearch 等不使用 schema 前缀
-            schema_table = f"# Table: {display_table_name}"
+        parts.append(table_prefix + case_fn(table_name))
         
         # 添加表注释
         table_comment = table_info.get("table_comment", "").strip()
         if table_comment:
-            schema_table += f", {table_comment}"
+            parts.append(f", {table_comment}")
         
-        schema_table += "\n[\n"
+        parts.append("\n[\n")
         
         # 添加字段定义
         columns = table_info.get("columns", {})
         if columns:
             field_list = []
             for column_name, column_info in columns.items():
-                # Oracle 中实际列名默认大写，这里在提示词中也统一展示为大写，便于 LLM 生成正确的带引号标识符
-                display_column_name = column_name.upper() if db_type.lower() == "oracle" else column_name
+                display_column_name = case_fn(column_name)
                 column_type = column_info.get("type", "VARCHAR")
                 column_comment = column_info.get("comment", "").strip()
 
@@ -82,20 +81,18 @@ def format_schema_to_m_schema(
                 else:
                     field_list.append(f"({display_column_name}:{column_type})")
             
-            schema_table += ",\n".join(field_list)
+            parts.append(",\n".join(field_list))
         
-        schema_table += "\n]\n"
+        parts.append("\n]\n")
 
         # 添加表级外键关系（由 db_service.supplement_related_tables 写入）
         foreign_keys = table_info.get("foreign_keys") or []
         if foreign_keys:
             # 直接以 table1.field1=table2.field2 的形式输出给 LLM
             for fk in foreign_keys:
-                schema_table += f"{fk}\n"
-
-        schema_str += schema_table
+                parts.append(f"{fk}\n")
     
-    return schema_str
+    return "".join(parts)
 
 
 def get_database_engine_info(
@@ -2,36 +2,525 @@
 数据源工具类
 """
 
+import datetime
+import hashlib
+import importlib
 import json
 import logging
+import os
 import platform
+import threading
+import time
 import urllib.parse
 from base64 import b64encode
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from decimal import Decimal
 from enum import Enum
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
-import pymysql
-import psycopg2
-import requests
-from elasticsearch import Elasticsearch
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 
-# 达梦数据库驱动（可选依赖）
+# 原生驱动连接池（DBUtils，已在依赖中声明；缺失时退化为每次调用直接建立连接）
 try:
-    import dmPython
+    from dbutils.pooled_db import PooledDB, TooManyConnectionsError
 except ImportError:
-    dmPython = None
+    PooledDB = None
+    TooManyConnectionsError = None
 
-# AWS Redshift 驱动
 try:
-    import redshift_connector
+    import orjson
 except ImportError:
-    redshift_connector = None
+    orjson = None
+
+# 数据源配置加密使用 cryptography 的 AES-GCM（OpenSSL 实现，支持 AES-NI；已在依赖中声明），未安装时沿用 AES-ECB
+# 注意："v2:" 前缀的 AES-GCM 密文写入后，读取方必须安装 cryptography，回退到旧版本将无法解密这些配置
+try:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+except ImportError:
+    AESGCM = None
 
 logger = logging.getLogger(__name__)
 
+if PooledDB is None:
+    logger.warning("未安装 DBUtils，原生驱动（达梦/Doris/StarRocks/Redshift/Kingbase）连接将不使用连接池")
+
+# JSON 编解码：优先使用 orjson（输出 UTF-8 bytes），未安装时回退标准库
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: Any, default=None) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, default=default).encode("utf-8")
+
+    _json_loads = json.loads
+
+# SQLAlchemy engine 缓存：键为 (数据源类型, 连接 URI, 超时时间)，超出容量时淘汰最久未使用的 engine
+ENGINE_CACHE_SIZE = 128
+_engine_cache: "OrderedDict[Tuple[str, str, Any], Engine]" = OrderedDict()
+_engine_cache_lock = threading.Lock()
+
+# 原生驱动连接池缓存：键为 (驱动模块名, 连接参数)
+NATIVE_POOL_CACHE_SIZE = 64
+# 单个原生连接池的最大连接数，超出时立即报错（非阻塞），避免工作线程无限期挂起
+NATIVE_POOL_MAX_CONNECTIONS = int(os.getenv("NATIVE_POOL_MAX_CONNECTIONS", "20"))
+_native_pool_cache: "OrderedDict[Tuple[str, Tuple], Any]" = OrderedDict()
+_native_pool_lock = threading.Lock()
+
+# Elasticsearch 客户端缓存：键为 (host, 用户名, 密码)，客户端内部持有连接池，跨请求复用
+ES_CLIENT_CACHE_SIZE = 32
+_es_client_cache: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+_es_client_lock = threading.Lock()
+
+# Elasticsearch SQL API 的 HTTP 会话缓存：键为 host，复用 keep-alive 连接
+_es_sessions: Dict[str, Any] = {}
+_es_session_lock = threading.Lock()
+
+
+# 并发获取多张表字段时的最大线程数（不超过 engine 连接池容量 pool_size + max_overflow）
+METADATA_MAX_WORKERS = 8
+
+# 表/字段元数据结果缓存：键为 (类型, host, port, 用户名, 库, schema, 表名)，值为 (写入时间, 结果)
+METADATA_CACHE_TTL = int(os.getenv("DATASOURCE_METADATA_CACHE_TTL", "60"))
+METADATA_CACHE_SIZE = 1024
+_metadata_cache: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_metadata_cache_lock = threading.Lock()
+
+# 元数据查询分批拉取的行数，避免一次性物化全部结果
+FETCH_BATCH_SIZE = 1000
+
+# SQLAlchemy 连接 URI 模板：(模板, 额外 JDBC 参数的拼接分隔符)
+_URI_TEMPLATES: Dict[Any, Tuple[str, str]] = {
+    "mysql": ("mysql+pymysql://{u}:{p}@{h}:{port}/{db}{q}", "?"),
+    "pg": ("postgresql+psycopg2://{u}:{p}@{h}:{port}/{db}{q}", "?"),
+    ("oracle", "service_name"): ("oracle+oracledb://{u}:{p}@{h}:{port}?service_name={db}{q}", "&"),
+    "oracle": ("oracle+oracledb://{u}:{p}@{h}:{port}/{db}{q}", "?"),
+    "sqlServer": ("mssql+pymssql://{u}:{p}@{h}:{port}/{db}{q}", "?"),
+    "ck": ("clickhouse+http://{u}:{p}@{h}:{port}/{db}{q}", "?"),
+}
+
+
+# 查询表列表的 SQL：类型 -> (SQL, 参数来源)，参数来源为 "database" 或 "db_schema"
+_PG_TABLE_SQL = """
+                SELECT c.relname AS TABLE_NAME,
+                       COALESCE(d.description, obj_description(c.oid)) AS TABLE_COMMENT
+                FROM pg_class c
+                LEFT JOIN pg_namespace n ON n.oid = c.relnamespace
+                LEFT JOIN pg_description d ON d.objoid = c.oid AND d.objsubid = 0
+                WHERE n.nspname = {param}
+                    AND c.relkind IN ('r', 'v', 'p', 'm')
+                    AND c.relname NOT LIKE {pg_like}
+                    AND c.relname NOT LIKE {sql_like}
+                ORDER BY c.relname
+            """
+
+_INFORMATION_SCHEMA_TABLE_SQL = """
+                SELECT TABLE_NAME, TABLE_COMMENT
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = {param}
+            """
+
+_TABLE_SQL: Dict[str, Tuple[str, Optional[str]]] = {
+    "mysql": (_INFORMATION_SCHEMA_TABLE_SQL.format(param=":param"), "database"),
+    "sqlServer": ("""
+                SELECT
+                    TABLE_NAME AS [TABLE_NAME],
+                    ISNULL(ep.value, '') AS [TABLE_COMMENT]
+                FROM INFORMATION_SCHEMA.TABLES t
+                LEFT JOIN sys.extended_properties ep
+                    ON ep.major_id = OBJECT_ID(t.TABLE_SCHEMA + '.' + t.TABLE_NAME)
+                    AND ep.minor_id = 0
+                    AND ep.name = 'MS_Description'
+                WHERE t.TABLE_TYPE IN ('BASE TABLE', 'VIEW')
+                    AND t.TABLE_SCHEMA = :param
+            """, "db_schema"),
+    "pg": (_PG_TABLE_SQL.format(param=":param", pg_like="'pg_%'", sql_like="'sql_%'"), "db_schema"),
+    "oracle": ("""
+                SELECT DISTINCT
+                    t.TABLE_NAME AS "TABLE_NAME",
+                    NVL(c.COMMENTS, '') AS "TABLE_COMMENT"
+                FROM (
+                    SELECT TABLE_NAME, 'TABLE' AS OBJECT_TYPE FROM ALL_TABLES WHERE OWNER = :param
+                    UNION ALL
+                    SELECT VIEW_NAME AS TABLE_NAME, 'VIEW' AS OBJECT_TYPE FROM ALL_VIEWS WHERE OWNER = :param
+                    UNION ALL
+                    SELECT MVIEW_NAME AS TABLE_NAME, 'MATERIALIZED VIEW' AS OBJECT_TYPE FROM ALL_MVIEWS WHERE OWNER = :param
+                ) t
+                LEFT JOIN ALL_TAB_COMMENTS c
+                    ON t.TABLE_NAME = c.TABLE_NAME
+                    AND c.TABLE_TYPE = t.OBJECT_TYPE
+                    AND c.OWNER = :param
+                ORDER BY t.TABLE_NAME
+            """, "db_schema"),
+    "ck": ("""
+                SELECT name, comment
+                FROM system.tables
+                WHERE database = :param
+                    AND engine NOT IN ('Dictionary')
+                ORDER BY name
+            """, "database"),
+    "dm": ("""
+                SELECT table_name, comments
+                FROM all_tab_comments
+                WHERE owner = :param
+                    AND (table_type = 'TABLE' OR table_type = 'VIEW')
+            """, "db_schema"),
+    "redshift": ("""
+                SELECT relname AS TableName,
+                       obj_description(relfilenode::regclass, 'pg_class') AS TableDescription
+                FROM pg_class
+                WHERE relkind IN ('r', 'p', 'f')
+                    AND relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = %s)
+            """, "db_schema"),
+    "doris": (_INFORMATION_SCHEMA_TABLE_SQL.format(param="%s"), "database"),
+    "starrocks": (_INFORMATION_SCHEMA_TABLE_SQL.format(param="%s"), "database"),
+    # psycopg2 参数绑定下字面量 % 需写作 %%
+    "kingbase": (_PG_TABLE_SQL.format(param="%s", pg_like="'pg_%%'", sql_like="'sql_%%'"), "db_schema"),
+    "es": ("", None),
+}
+
+# 查询字段列表的 SQL：类型 -> (SQL, 按表名过滤的条件, 参数来源)
+_PG_FIELD_SQL = """
+                SELECT a.attname AS COLUMN_NAME,
+                       pg_catalog.format_type(a.atttypid, a.atttypmod) AS DATA_TYPE,
+                       col_description(c.oid, a.attnum) AS COLUMN_COMMENT
+                FROM pg_catalog.pg_attribute a
+                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
+                JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = {param}
+                    AND a.attnum > 0
+                    AND NOT a.attisdropped
+            """
+
+_INFORMATION_SCHEMA_FIELD_SQL = """
+                SELECT COLUMN_NAME, DATA_TYPE, COLUMN_COMMENT
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = {param}
+            """
+
+_FIELD_SQL: Dict[str, Tuple[str, str, Optional[str]]] = {
+    "mysql": (_INFORMATION_SCHEMA_FIELD_SQL.format(param=":param1"), " AND TABLE_NAME = :param2", "database"),
+    "sqlServer": ("""
+                SELECT
+                    COLUMN_NAME AS [COLUMN_NAME],
+                    DATA_TYPE AS [DATA_TYPE],
+                    ISNULL(EP.value, '') AS [COLUMN_COMMENT]
+                FROM INFORMATION_SCHEMA.COLUMNS C
+                LEFT JOIN sys.extended_properties EP
+                    ON EP.major_id = OBJECT_ID(C.TABLE_SCHEMA + '.' + C.TABLE_NAME)
+                    AND EP.minor_id = C.ORDINAL_POSITION
+                    AND EP.name = 'MS_Description'
+                WHERE C.TABLE_SCHEMA = :param1
+            """, " AND C.TABLE_NAME = :param2", "db_schema"),
+    "pg": (_PG_FIELD_SQL.format(param=":param1"), " AND c.relname = :param2", "db_schema"),
+    "oracle": ("""
+                SELECT
+                    col.COLUMN_NAME AS "COLUMN_NAME",
+                    (CASE
+                        WHEN col.DATA_TYPE IN ('VARCHAR2', 'CHAR', 'NVARCHAR2', 'NCHAR')
+                            THEN col.DATA_TYPE || '(' || col.DATA_LENGTH || ')'
+                        WHEN col.DATA_TYPE = 'NUMBER' AND col.DATA_PRECISION IS NOT NULL
+                            THEN col.DATA_TYPE || '(' || col.DATA_PRECISION ||
+                                 CASE WHEN col.DATA_SCALE > 0 THEN ',' || col.DATA_SCALE END || ')'
+                        ELSE col.DATA_TYPE
+                    END) AS "DATA_TYPE",
+                    NVL(com.COMMENTS, '') AS "COLUMN_COMMENT"
+                FROM ALL_TAB_COLUMNS col
+                LEFT JOIN ALL_COL_COMMENTS com
+                    ON col.OWNER = com.OWNER
+                    AND col.TABLE_NAME = com.TABLE_NAME
+                    AND col.COLUMN_NAME = com.COLUMN_NAME
+                WHERE col.OWNER = :param1
+            """, " AND col.TABLE_NAME = :param2", "db_schema"),
+    "ck": ("""
+                SELECT name AS COLUMN_NAME, type AS DATA_TYPE, comment AS COLUMN_COMMENT
+                FROM system.columns
+                WHERE database = :param1
+            """, " AND table = :param2", "database"),
+    "dm": ("""
+                SELECT
+                    c.COLUMN_NAME AS "COLUMN_NAME",
+                    c.DATA_TYPE AS "DATA_TYPE",
+                    COALESCE(com.COMMENTS, '') AS "COMMENTS"
+                FROM ALL_TAB_COLS c
+                LEFT JOIN ALL_COL_COMMENTS com
+                    ON c.OWNER = com.OWNER
+                    AND c.TABLE_NAME = com.TABLE_NAME
+                    AND c.COLUMN_NAME = com.COLUMN_NAME
+                WHERE c.OWNER = :param1
+            """, " AND c.TABLE_NAME = :param2", "db_schema"),
+    "redshift": (_PG_FIELD_SQL.format(param="%s"), " AND c.relname = %s", "db_schema"),
+    "doris": (_INFORMATION_SCHEMA_FIELD_SQL.format(param="%s"), " AND TABLE_NAME = %s", "database"),
+    "starrocks": (_INFORMATION_SCHEMA_FIELD_SQL.format(param="%s"), " AND TABLE_NAME = %s", "database"),
+    "kingbase": (_PG_FIELD_SQL.format(param="%s"), " AND c.relname = %s", "db_schema"),
+    "es": ("", "", None),
+}
+
+# 批量查询多张表字段的 SQL（仅 SQLAlchemy 驱动的数据库）：类型 -> (SQL, 参数来源)
+# 返回列依次为 表名、字段名、字段类型、字段注释，:tables 为 expanding 参数
+_FIELD_BATCH_SQL: Dict[str, Tuple[str, str]] = {
+    "mysql": ("""
+                SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, COLUMN_COMMENT
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = :param AND TABLE_NAME IN :tables
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """, "database"),
+    "sqlServer": ("""
+                SELECT
+                    C.TABLE_NAME,
+                    C.COLUMN_NAME,
+                    C.DATA_TYPE,
+                    ISNULL(EP.value, '')
+                FROM INFORMATION_SCHEMA.COLUMNS C
+                LEFT JOIN sys.extended_properties EP
+                    ON EP.major_id = OBJECT_ID(C.TABLE_SCHEMA + '.' + C.TABLE_NAME)
+                    AND EP.minor_id = C.ORDINAL_POSITION
+                    AND EP.name = 'MS_Description'
+                WHERE C.TABLE_SCHEMA = :param AND C.TABLE_NAME IN :tables
+                ORDER BY C.TABLE_NAME, C.ORDINAL_POSITION
+            """, "db_schema"),
+    "pg": ("""
+                SELECT c.relname,
+                       a.attname,
+                       pg_catalog.format_type(a.atttypid, a.atttypmod),
+                       col_description(c.oid, a.attnum)
+                FROM pg_catalog.pg_attribute a
+                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
+                JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = :param
+                    AND c.relname IN :tables
+                    AND a.attnum > 0
+                    AND NOT a.attisdropped
+                ORDER BY c.relname, a.attnum
+            """, "db_schema"),
+    "oracle": ("""
+                SELECT
+                    col.TABLE_NAME,
+                    col.COLUMN_NAME,
+                    (CASE
+                        WHEN col.DATA_TYPE IN ('VARCHAR2', 'CHAR', 'NVARCHAR2', 'NCHAR')
+                            THEN col.DATA_TYPE || '(' || col.DATA_LENGTH || ')'
+                        WHEN col.DATA_TYPE = 'NUMBER' AND col.DATA_PRECISION IS NOT NULL
+                            THEN col.DATA_TYPE || '(' || col.DATA_PRECISION ||
+                                 CASE WHEN col.DATA_SCALE > 0 THEN ',' || col.DATA_SCALE END || ')'
+                        ELSE col.DATA_TYPE
+                    END),
+                    NVL(com.COMMENTS, '')
+                FROM ALL_TAB_COLUMNS col
+                LEFT JOIN ALL_COL_COMMENTS com
+                    ON col.OWNER = com.OWNER
+                    AND col.TABLE_NAME = com.TABLE_NAME
+                    AND col.COLUMN_NAME = com.COLUMN_NAME
+                WHERE col.OWNER = :param AND col.TABLE_NAME IN :tables
+                ORDER BY col.TABLE_NAME, col.COLUMN_ID
+            """, "db_schema"),
+    "ck": ("""
+                SELECT table, name, type, comment
+                FROM system.columns
+                WHERE database = :param AND table IN :tables
+                ORDER BY table, position
+            """, "database"),
+}
+
+# 批量字段查询每批的表数量（Oracle IN 列表上限为 1000）
+FIELD_BATCH_SIZE = 500
+
+
+@lru_cache(maxsize=None)
+def _load_driver(module_name: str):
+    """
+    按需导入数据库驱动模块（每个进程只导入一次）
+    各驱动仅在对应数据源类型被使用时才加载，达梦（dmPython）、Redshift 等可选驱动未安装时返回 None
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+# 凭据 URL 编码结果缓存（同一数据源的用户名/密码会反复出现）
+_quote = lru_cache(maxsize=4096)(urllib.parse.quote)
+
+
+@lru_cache(maxsize=256)
+def _format_uri(ds_type: str, host: str, port: Any, username: str, password: str,
+                database: str, extra_jdbc: str, mode: str) -> str:
+    """按模板拼装 SQLAlchemy 连接 URI，连接参数不变时直接命中缓存"""
+    # Oracle 区分 service_name / sid 两种连接模式
+    template_key = (ds_type, mode) if ds_type == "oracle" and mode == "service_name" else ds_type
+    try:
+        template, query_sep = _URI_TEMPLATES[template_key]
+    except KeyError:
+        raise ValueError(f"不支持使用 SQLAlchemy 连接的数据源类型: {ds_type}") from None
+
+    # URL编码用户名和密码
+    query = f"{query_sep}{extra_jdbc}" if extra_jdbc else ""
+    return template.format(u=_quote(username), p=_quote(password), h=host, port=port, db=database, q=query)
+
+
+def _metadata_cache_key(ds_type: str, config: Dict[str, Any], table_name: Optional[str] = None) -> Tuple:
+    """
+    元数据缓存键（table_name 为 None 表示表列表）
+
+    包含密码与连接参数的摘要：凭据不同的请求不能命中他人连接成功后写入的缓存
+    """
+    credential_digest = hashlib.sha256(
+        f"{config.get('password', '')}\x00{config.get('extraJdbc', '')}".encode("utf-8")
+    ).digest()
+    return (
+        ds_type,
+        config.get("host", ""),
+        str(config.get("port", "")),
+        config.get("username", ""),
+        config.get("database", ""),
+        config.get("dbSchema") or "",
+        credential_digest,
+        table_name,
+    )
+
+
+def _get_cached_metadata(cache_key: Tuple) -> Optional[List[Dict[str, Any]]]:
+    """读取未过期的元数据缓存，返回列表及行字典的副本（调用方修改不影响缓存）"""
+    if METADATA_CACHE_TTL <= 0:
+        return None
+    with _metadata_cache_lock:
+        cached = _metadata_cache.get(cache_key)
+        if cached is None:
+            return None
+        if time.time() - cached[0] >= METADATA_CACHE_TTL:
+            del _metadata_cache[cache_key]
+            return None
+        _metadata_cache.move_to_end(cache_key)
+        return [dict(row) for row in cached[1]]
+
+
+def _put_cached_metadata(cache_key: Tuple, result: List[Dict[str, Any]]):
+    """写入元数据缓存，超出容量时淘汰最久未使用的条目"""
+    if METADATA_CACHE_TTL <= 0:
+        return
+    with _metadata_cache_lock:
+        _metadata_cache[cache_key] = (time.time(), [dict(row) for row in result])
+        _metadata_cache.move_to_end(cache_key)
+        while len(_metadata_cache) > METADATA_CACHE_SIZE:
+            _metadata_cache.popitem(last=False)
+
+
+def _iter_rows(cursor, size: int = FETCH_BATCH_SIZE):
+    """按批次（fetchmany）迭代游标结果"""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            break
+        yield from rows
+
+
+def _limit_rows(rows, fetch_limit: Optional[int] = None):
+    """按 fetch_limit 截断行迭代器（为空时不限制）"""
+    return rows if fetch_limit is None else islice(rows, fetch_limit)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat()
+
+
+def _decode_bytes(value: bytes) -> str:
+    return value.decode('utf-8', errors='ignore')
+
+
+# 常见值类型的处理函数（按 type 精确匹配，一次哈希查找即可分派）
+_VALUE_DISPATCH = {
+    int: _identity,
+    str: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    Decimal: float,
+    datetime.datetime: _isoformat,
+    datetime.date: _isoformat,
+    datetime.time: _isoformat,
+    bytes: _decode_bytes,
+}
+
+
+def _process_row_value(value: Any) -> Any:
+    """处理行数据中的值"""
+    fn = _VALUE_DISPATCH.get(type(value))
+    if fn is not None:
+        return fn(value)
+    return _process_row_value_fallback(value)
+
+
+def _process_row_value_fallback(value: Any) -> Any:
+    """未命中分派表的类型（子类、驱动自定义类型等）按原有规则处理"""
+    if isinstance(value, Decimal):
+        return float(value)
+    elif hasattr(value, "isoformat"):
+        return value.isoformat()
+    elif hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(value, bytes):
+        return value.decode('utf-8', errors='ignore')
+    return value
+
+
+def _iter_dicts(rows, columns: List[str]) -> Iterator[Dict[str, Any]]:
+    """将查询结果行逐行转换为字典（zip/map 在 C 层完成逐列处理）"""
+    pv = _process_row_value
+    for row in rows:
+        yield dict(zip(columns, map(pv, row)))
+
+
+def _to_str(value: Any) -> str:
+    """将驱动返回的值转为字符串：None 转为空串，bytes 按 UTF-8 解码（非法字节替换，不抛异常）"""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+@lru_cache(maxsize=128)
+def _basic_auth_header(username: str, password: str) -> str:
+    """生成 HTTP Basic 认证头（按用户名/密码缓存，避免每次请求重复 base64 编码）"""
+    return "Basic " + b64encode(f"{username}:{password}".encode()).decode("ascii")
+
+
+@lru_cache(maxsize=256)
+def _parse_extra(jdbc: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    解析额外 JDBC 参数字符串（如 "charset=utf8&connect_timeout=10"）
+    同一数据源的参数字符串会反复出现，按原始字符串缓存解析结果；空键、空值会被忽略
+    """
+    return tuple((k, v) for k, v in urllib.parse.parse_qsl(jdbc, keep_blank_values=False) if k)
+
+
+# Doris/StarRocks（MySQL 协议）驱动：设置 AIX_USE_CYMYSQL=1 时优先使用 Cython 加速的 CyMySQL，未安装则回退 PyMySQL
+USE_CYMYSQL = os.getenv("AIX_USE_CYMYSQL", "0") == "1"
+
+
+@lru_cache(maxsize=None)
+def _load_mysql_driver():
+    """获取 MySQL 协议驱动模块（CyMySQL 为可选加速，与 PyMySQL 接口兼容）"""
+    if USE_CYMYSQL:
+        driver = _load_driver("cymysql")
+        if driver is not None:
+            return driver
+        logger.warning("已设置 AIX_USE_CYMYSQL=1 但未安装 cymysql，回退使用 pymysql")
+    return _load_driver("pymysql")
+
 
 class ConnectType(Enum):
     """数据库连接类型"""
@@ -63,19 +552,23 @@ class DB(Enum):
     @classmethod
     def get_db(cls, ds_type: str, default_if_none: bool = False):
         """根据类型代码获取数据库枚举"""
-        for db in cls:
-            if db.type_code.lower() == ds_type.lower():
-                return db
+        db = _DB_BY_CODE.get(ds_type.lower())
+        if db is not None:
+            return db
         if default_if_none:
             return DB.pg
         raise ValueError(f"不支持的数据库类型: {ds_type}")
 
 
+# 类型代码（小写）到数据库枚举的映射，导入时构建一次
+_DB_BY_CODE: Dict[str, DB] = {db.type_code.lower(): db for db in DB}
+
+
 class DatasourceConnectionUtil:
     """数据源连接工具类"""
 
     # 需要 Schema 的数据库类型
-    NEED_SCHEMA_TYPES = ['sqlServer', 'pg', 'oracle', 'dm', 'redshift', 'kingbase']
+    NEED_SCHEMA_TYPES = frozenset(['sqlServer', 'pg', 'oracle', 'dm', 'redshift', 'kingbase'])
 
     @staticmethod
     def build_connection_uri(ds_type: str, config: Dict[str, Any]) -> str:
@@ -88,88 +581,189 @@ class DatasourceConnectionUtil:
         extra_jdbc = config.get("extraJdbc", "")
         mode = config.get("mode", "service_name")
 
-        # URL编码用户名和密码
-        username_encoded = urllib.parse.quote(username)
-        password_encoded = urllib.parse.quote(password)
-
-        if ds_type == "mysql":
-            if extra_jdbc:
-                return f"mysql+pymysql://{username_encoded}:{password_encoded}@{host}:{port}/{database}?{extra_jdbc}"
-            return f"mysql+pymysql://{username_encoded}:{password_encoded}@{host}:{port}/{database}"
-
-        elif ds_type == "pg":
-            if extra_jdbc:
-                return (
-                    f"postgresql+psycopg2://{username_encoded}:{password_encoded}@{host}:{port}/{database}?{extra_jdbc}"
-                )
-            return f"postgresql+psycopg2://{username_encoded}:{password_encoded}@{host}:{port}/{database}"
-
-        elif ds_type == "oracle":
-            if mode == "service_name":
-                if extra_jdbc:
-                    return f"oracle+oracledb://{username_encoded}:{password_encoded}@{host}:{port}?service_name={database}&{extra_jdbc}"
-                return f"oracle+oracledb://{username_encoded}:{password_encoded}@{host}:{port}?service_name={database}"
-            else:
-                if extra_jdbc:
-                    return (
-                        f"oracle+oracledb://{username_encoded}:{password_encoded}@{host}:{port}/{database}?{extra_jdbc}"
-                    )
-                return f"oracle+oracledb://{username_encoded}:{password_encoded}@{host}:{port}/{database}"
+        return _format_uri(ds_type, host, port, username, password, database, extra_jdbc, mode)
 
+    @staticmethod
+    def _create_engine(ds_type: str, uri: str, timeout: int) -> Engine:
+        """创建带连接池的 SQLAlchemy engine"""
+        pool_kwargs = {"pool_pre_ping": True, "pool_size": 5, "max_overflow": 10, "pool_recycle": 1800}
+        # 注意：部分驱动（如 oracledb）不支持 connect_timeout 关键字参数
+        if ds_type == "oracle":
+            return create_engine(uri, **pool_kwargs)
         elif ds_type == "sqlServer":
-            if extra_jdbc:
-                return f"mssql+pymssql://{username_encoded}:{password_encoded}@{host}:{port}/{database}?{extra_jdbc}"
-            return f"mssql+pymssql://{username_encoded}:{password_encoded}@{host}:{port}/{database}"
+            # SQL Server 2022 需要禁用加密以兼容 pymssql
+            # pymssql 不支持 connect_timeout，使用 login_timeout 和 timeout
+            return create_engine(
+                uri, connect_args={"timeout": timeout, "login_timeout": timeout, "encryption": "off"}, **pool_kwargs
+            )
+        return create_engine(uri, connect_args={"connect_timeout": timeout}, **pool_kwargs)
+
+    @staticmethod
+    def _get_engine(ds_type: str, config: Dict[str, Any]) -> Engine:
+        """
+        获取数据源对应的 SQLAlchemy engine（按连接 URI 和超时时间缓存复用），
+        避免每次调用都重新解析 URL、初始化方言并建立新连接
+        """
+        uri = DatasourceConnectionUtil.build_connection_uri(ds_type, config)
+        timeout = config.get("timeout", 30)
+        cache_key = (ds_type, uri, timeout)
+
+        with _engine_cache_lock:
+            engine = _engine_cache.get(cache_key)
+            if engine is not None:
+                _engine_cache.move_to_end(cache_key)
+                return engine
+
+        engine = DatasourceConnectionUtil._create_engine(ds_type, uri, timeout)
+        with _engine_cache_lock:
+            existing = _engine_cache.get(cache_key)
+            if existing is not None:
+                # 并发创建时保留先缓存的 engine
+                engine.dispose()
+                return existing
+            _engine_cache[cache_key] = engine
+            if len(_engine_cache) > ENGINE_CACHE_SIZE:
+                _, evicted = _engine_cache.popitem(last=False)
+                evicted.dispose()
+        return engine
 
-        elif ds_type == "ck":
-            if extra_jdbc:
-                return f"clickhouse+http://{username_encoded}:{password_encoded}@{host}:{port}/{database}?{extra_jdbc}"
-            return f"clickhouse+http://{username_encoded}:{password_encoded}@{host}:{port}/{database}"
+    @staticmethod
+    def dispose_all_engines():
+        """释放所有缓存的 SQLAlchemy engine、原生驱动连接池和 Elasticsearch 客户端/会话（服务停止时调用）"""
+        with _engine_cache_lock:
+            engines = list(_engine_cache.values())
+            _engine_cache.clear()
+        for engine in engines:
+            engine.dispose()
+
+        with _native_pool_lock:
+            pools = list(_native_pool_cache.values())
+            _native_pool_cache.clear()
+        for pool in pools:
+            pool.close()
+
+        with _es_client_lock:
+            clients = list(_es_client_cache.values())
+            _es_client_cache.clear()
+        for client in clients:
+            client.close()
+
+        with _es_session_lock:
+            sessions = list(_es_sessions.values())
+            _es_sessions.clear()
+        for session in sessions:
+            session.close()
+
+    @staticmethod
+    def _get_native_pool(creator, connect_kwargs: Dict[str, Any]):
+        """获取（或创建）原生驱动的 DBUtils 连接池，未安装 DBUtils 时返回 None"""
+        if PooledDB is None:
+            return None
+        cache_key = (creator.__name__, tuple(sorted((k, str(v)) for k, v in connect_kwargs.items())))
+        with _native_pool_lock:
+            pool = _native_pool_cache.get(cache_key)
+            if pool is not None:
+                _native_pool_cache.move_to_end(cache_key)
+                return pool
+            pool = PooledDB(
+                creator,
+                mincached=0,
+                maxcached=5,
+                maxconnections=NATIVE_POOL_MAX_CONNECTIONS,
+                blocking=False,
+                ping=1,
+                **connect_kwargs,
+            )
+            _native_pool_cache[cache_key] = pool
+            if len(_native_pool_cache) > NATIVE_POOL_CACHE_SIZE:
+                _, evicted = _native_pool_cache.popitem(last=False)
+                evicted.close()
+            return pool
 
+    @staticmethod
+    @contextmanager
+    def _native_connection(creator, **connect_kwargs):
+        """从连接池获取原生驱动连接，使用完毕后归还连接池（未启用连接池时关闭连接）"""
+        pool = DatasourceConnectionUtil._get_native_pool(creator, connect_kwargs)
+        if pool is None:
+            conn = creator.connect(**connect_kwargs)
         else:
-            raise ValueError(f"不支持使用 SQLAlchemy 连接的数据源类型: {ds_type}")
+            try:
+                conn = pool.connection()
+            except TooManyConnectionsError:
+                logger.warning(f"{creator.__name__} 连接池已满（{NATIVE_POOL_MAX_CONNECTIONS}），拒绝新的连接请求")
+                raise Exception(f"数据源连接数已达上限（{NATIVE_POOL_MAX_CONNECTIONS}），请稍后重试") from None
+        try:
+            yield conn
+        finally:
+            conn.close()
 
     @staticmethod
     def _get_extra_config(config: Dict[str, Any]) -> Dict[str, Any]:
         """解析额外的JDBC参数"""
-        config_dict = {}
         extra_jdbc = config.get("extraJdbc", "")
-        if extra_jdbc:
-            config_arr = extra_jdbc.split("&")
-            for item in config_arr:
-                kv = item.split("=")
-                if len(kv) == 2 and kv[0] and kv[1]:
-                    config_dict[kv[0]] = kv[1]
-        return config_dict
+        # 返回副本，避免调用方修改缓存中的结果
+        return dict(_parse_extra(extra_jdbc)) if extra_jdbc else {}
 
     @staticmethod
     def _get_es_auth(config: Dict[str, Any]) -> Dict[str, str]:
-        """获取 Elasticsearch 认证头"""
-        username = config.get("username", "")
-        password = config.get("password", "")
-        credentials = f"{username}:{password}"
-        encoded_credentials = b64encode(credentials.encode()).decode()
+        """获取 Elasticsearch 认证头（供 requests 直接调用 SQL API 使用）"""
         return {
             "Content-Type": "application/json",
-            "Authorization": f"Basic {encoded_credentials}"
+            "Authorization": _basic_auth_header(config.get("username", ""), config.get("password", ""))
         }
 
     @staticmethod
-    def _get_es_connect(config: Dict[str, Any]) -> Elasticsearch:
-        """获取 Elasticsearch 连接"""
+    def _get_es_connect(config: Dict[str, Any]):
+        """获取 Elasticsearch 连接（按 host/账号缓存客户端，由客户端自身根据 basic_auth 生成认证头）"""
         host = config.get("host", "")
         username = config.get("username", "")
         password = config.get("password", "")
+        cache_key = (host, username, password)
+
+        with _es_client_lock:
+            es_client = _es_client_cache.get(cache_key)
+            if es_client is not None:
+                _es_client_cache.move_to_end(cache_key)
+                return es_client
+
+        from elasticsearch import Elasticsearch
 
         es_client = Elasticsearch(
             [host],
             basic_auth=(username, password),
             verify_certs=False,
-            compatibility_mode=True,
-            headers=DatasourceConnectionUtil._get_es_auth(config)
+            compatibility_mode=True
         )
+
+        with _es_client_lock:
+            existing = _es_client_cache.get(cache_key)
+            if existing is not None:
+                es_client.close()
+                return existing
+            _es_client_cache[cache_key] = es_client
+            if len(_es_client_cache) > ES_CLIENT_CACHE_SIZE:
+                _, evicted = _es_client_cache.popitem(last=False)
+                evicted.close()
         return es_client
 
+    @staticmethod
+    def _get_es_session(host_url: str):
+        """获取（或创建）指定 host 的 requests.Session，复用 TCP/TLS 连接"""
+        with _es_session_lock:
+            session = _es_sessions.get(host_url)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=Retry(total=2))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _es_sessions[host_url] = session
+            return session
+
     @staticmethod
     def test_connection(ds_type: str, config: Dict[str, Any]) -> Tuple[bool, str]:
         """测试数据库连接"""
@@ -180,22 +774,10 @@ class DatasourceConnectionUtil:
 
             if db.connect_type == ConnectType.sqlalchemy:
                 # SQLAlchemy 驱动的数据库
-                uri = DatasourceConnectionUtil.build_connection_uri(ds_type, config)
-                # 注意：部分驱动（如 oracledb）不支持 connect_timeout 关键字参数
-                if ds_type in ("oracle"):
-                    engine = create_engine(uri, pool_pre_ping=True)
-                elif ds_type == "sqlServer":
-                    # SQL Server 2022 需要禁用加密以兼容 pymssql
-                    # pymssql 不支持 connect_timeout，使用 login_timeout 和 timeout
-                    engine = create_engine(
-                        uri, pool_pre_ping=True, connect_args={"timeout": timeout, "login_timeout": timeout, "encryption": "off"}
-                    )
-                else:
-                    engine = create_engine(uri, pool_pre_ping=True, connect_args={"connect_timeout": timeout})
-                with engine.connect() as conn:
-                    # Oracle 要求 SELECT 必须有 FROM 子句
-                    test_sql = "SELECT 1 FROM DUAL" if ds_type in ("oracle") else "SELECT 1"
-                    conn.execute(text(test_sql))
+                engine = DatasourceConnectionUtil._get_engine(ds_type, config)
+                # 新建连接即完成握手，复用池中连接时 pool_pre_ping 会先行探活，无需再执行 SELECT 1
+                with engine.connect():
+                    pass
                 return True, ""
 
             else:
@@ -208,10 +790,12 @@ class DatasourceConnectionUtil:
 
                 if ds_type == "dm":
                     # 达梦数据库
+                    dmPython = _load_driver("dmPython")
                     if dmPython is None:
                         return False, "未安装达梦数据库驱动 dmPython"
-                    with dmPython.connect(user=username, password=password, server=host,
-                                          port=port, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        dmPython, user=username, password=password, server=host, port=port, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute('SELECT 1', timeout=timeout)
                             cursor.fetchall()
@@ -220,8 +804,10 @@ class DatasourceConnectionUtil:
                 elif ds_type in ("doris", "starrocks"):
                     # Apache Doris / StarRocks（使用 MySQL 协议）
                     # 使用优化的连接参数以提高连接稳定性
-                    connect_timeout = max(timeout, 60)  # 至少 60 秒连接超时
-                    with pymysql.connect(
+                    # 连接超时默认沿用调用方的 timeout，可通过 connectTimeout 单独配置
+                    connect_timeout = config.get("connectTimeout", timeout)
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_mysql_driver(),
                         user=username,
                         passwd=password,
                         host=host,
@@ -240,20 +826,23 @@ class DatasourceConnectionUtil:
 
                 elif ds_type == "redshift":
                     # AWS Redshift
+                    redshift_connector = _load_driver("redshift_connector")
                     if redshift_connector is None:
                         return False, "未安装 redshift_connector 驱动"
-                    with redshift_connector.connect(host=host, port=port, database=database,
-                                                    user=username, password=password,
-                                                    timeout=timeout, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        redshift_connector, host=host, port=port, database=database,
+                        user=username, password=password, timeout=timeout, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute('SELECT 1')
                     return True, ""
 
                 elif ds_type == "kingbase":
                     # 人大金仓（使用 PostgreSQL 协议）
-                    with psycopg2.connect(host=host, port=port, database=database,
-                                          user=username, password=password,
-                                          connect_timeout=timeout, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_driver("psycopg2"), host=host, port=port, database=database,
+                        user=username, password=password, connect_timeout=timeout, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute('SELECT 1')
                     return True, ""
@@ -279,116 +868,21 @@ class DatasourceConnectionUtil:
         database = config.get("database", "")
         db_schema = config.get("dbSchema") or database
 
-        if ds_type == "mysql":
-            return """
-                SELECT TABLE_NAME, TABLE_COMMENT
-                FROM information_schema.TABLES
-                WHERE TABLE_SCHEMA = :param
-            """, database
-
-        elif ds_type == "sqlServer":
-            return """
-                SELECT
-                    TABLE_NAME AS [TABLE_NAME],
-                    ISNULL(ep.value, '') AS [TABLE_COMMENT]
-                FROM INFORMATION_SCHEMA.TABLES t
-                LEFT JOIN sys.extended_properties ep
-                    ON ep.major_id = OBJECT_ID(t.TABLE_SCHEMA + '.' + t.TABLE_NAME)
-                    AND ep.minor_id = 0
-                    AND ep.name = 'MS_Description'
-                WHERE t.TABLE_TYPE IN ('BASE TABLE', 'VIEW')
-                    AND t.TABLE_SCHEMA = :param
-            """, db_schema
-
-        elif ds_type == "pg":
-            return """
-                SELECT c.relname AS TABLE_NAME,
-                       COALESCE(d.description, obj_description(c.oid)) AS TABLE_COMMENT
-                FROM pg_class c
-                LEFT JOIN pg_namespace n ON n.oid = c.relnamespace
-                LEFT JOIN pg_description d ON d.objoid = c.oid AND d.objsubid = 0
-                WHERE n.nspname = :param
-                    AND c.relkind IN ('r', 'v', 'p', 'm')
-                    AND c.relname NOT LIKE 'pg_%'
-                    AND c.relname NOT LIKE 'sql_%'
-                ORDER BY c.relname
-            """, db_schema
-
-        elif ds_type == "oracle":
-            return """
-                SELECT DISTINCT
-                    t.TABLE_NAME AS "TABLE_NAME",
-                    NVL(c.COMMENTS, '') AS "TABLE_COMMENT"
-                FROM (
-                    SELECT TABLE_NAME, 'TABLE' AS OBJECT_TYPE FROM ALL_TABLES WHERE OWNER = :param
-                    UNION ALL
-                    SELECT VIEW_NAME AS TABLE_NAME, 'VIEW' AS OBJECT_TYPE FROM ALL_VIEWS WHERE OWNER = :param
-                    UNION ALL
-                    SELECT MVIEW_NAME AS TABLE_NAME, 'MATERIALIZED VIEW' AS OBJECT_TYPE FROM ALL_MVIEWS WHERE OWNER = :param
-                ) t
-                LEFT JOIN ALL_TAB_COMMENTS c
-                    ON t.TABLE_NAME = c.TABLE_NAME
-                    AND c.TABLE_TYPE = t.OBJECT_TYPE
-                    AND c.OWNER = :param
-                ORDER BY t.TABLE_NAME
-            """, db_schema
-
-        elif ds_type == "ck":
-            return """
-                SELECT name, comment
-                FROM system.tables
-                WHERE database = :param
-                    AND engine NOT IN ('Dictionary')
-                ORDER BY name
-            """, database
-
-        elif ds_type == "dm":
-            return """
-                SELECT table_name, comments
-                FROM all_tab_comments
-                WHERE owner = :param
-                    AND (table_type = 'TABLE' OR table_type = 'VIEW')
-            """, db_schema
-
-        elif ds_type == "redshift":
-            return """
-                SELECT relname AS TableName,
-                       obj_description(relfilenode::regclass, 'pg_class') AS TableDescription
-                FROM pg_class
-                WHERE relkind IN ('r', 'p', 'f')
-                    AND relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = %s)
-            """, db_schema
-
-        elif ds_type in ("doris", "starrocks"):
-            return """
-                SELECT TABLE_NAME, TABLE_COMMENT
-                FROM information_schema.TABLES
-                WHERE TABLE_SCHEMA = %s
-            """, database
-
-        elif ds_type == "kingbase":
-            return """
-                SELECT c.relname AS TABLE_NAME,
-                       COALESCE(d.description, obj_description(c.oid)) AS TABLE_COMMENT
-                FROM pg_class c
-                LEFT JOIN pg_namespace n ON n.oid = c.relnamespace
-                LEFT JOIN pg_description d ON d.objoid = c.oid AND d.objsubid = 0
-                WHERE n.nspname = '{0}'
-                    AND c.relkind IN ('r', 'v', 'p', 'm')
-                    AND c.relname NOT LIKE 'pg_%'
-                    AND c.relname NOT LIKE 'sql_%'
-                ORDER BY c.relname
-            """, db_schema
-
-        elif ds_type == "es":
-            return "", None
-
-        else:
+        if ds_type not in _TABLE_SQL:
             raise ValueError(f"不支持的数据源类型: {ds_type}")
+        sql, param_key = _TABLE_SQL[ds_type]
+        if param_key is None:
+            return sql, None
+        return sql, database if param_key == "database" else db_schema
 
     @staticmethod
     def get_tables(ds_type: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """获取数据库表列表"""
+        """获取数据库表列表（结果缓存 METADATA_CACHE_TTL 秒）"""
+        cache_key = _metadata_cache_key(ds_type, config)
+        cached = _get_cached_metadata(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             db = DB.get_db(ds_type)
             timeout = config.get("timeout", 30)
@@ -399,43 +893,14 @@ class DatasourceConnectionUtil:
 
             if db.connect_type == ConnectType.sqlalchemy:
                 # SQLAlchemy 驱动的数据库
-                uri = DatasourceConnectionUtil.build_connection_uri(ds_type, config)
-                if ds_type == "oracle":
-                    engine = create_engine(uri, pool_pre_ping=True)
-                elif ds_type == "sqlServer":
-                    # SQL Server 2022 需要禁用加密以兼容 pymssql
-                    # pymssql 不支持 connect_timeout，使用 login_timeout 和 timeout
-                    engine = create_engine(
-                        uri, pool_pre_ping=True, connect_args={"timeout": timeout, "login_timeout": timeout, "encryption": "off"}
-                    )
-                else:
-                    engine = create_engine(uri, pool_pre_ping=True, connect_args={"connect_timeout": timeout})
+                engine = DatasourceConnectionUtil._get_engine(ds_type, config)
                 with engine.connect() as conn:
                     result = conn.execute(text(sql), {"param": sql_param})
-                    for row in result.fetchall():
-                        # 处理 bytes 类型（SQL Server 可能返回 bytes）
-                        table_name = row[0]
-                        table_comment = row[1] or ""
-                        if isinstance(table_comment, bytes):
-                            try:
-                                table_comment = table_comment.decode('utf-8')
-                            except UnicodeDecodeError:
-                                try:
-                                    table_comment = table_comment.decode('latin-1')
-                                except:
-                                    table_comment = ""
-                        if isinstance(table_name, bytes):
-                            try:
-                                table_name = table_name.decode('utf-8')
-                            except UnicodeDecodeError:
-                                try:
-                                    table_name = table_name.decode('latin-1')
-                                except:
-                                    table_name = str(table_name)
-                        tables.append({
-                            "tableName": table_name,
-                            "tableComment": table_comment,
-                        })
+                    # 处理 bytes 类型（SQL Server 可能返回 bytes）
+                    tables.extend({
+                        "tableName": _to_str(row[0]),
+                        "tableComment": _to_str(row[1]),
+                    } for row in result.yield_per(FETCH_BATCH_SIZE))
             else:
                 # Python 原生驱动的数据库
                 host = config.get("host", "")
@@ -445,22 +910,25 @@ class DatasourceConnectionUtil:
                 database = config.get("database", "")
 
                 if ds_type == "dm":
+                    dmPython = _load_driver("dmPython")
                     if dmPython is None:
                         raise Exception("未安装达梦数据库驱动 dmPython")
-                    with dmPython.connect(user=username, password=password, server=host,
-                                          port=port, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        dmPython, user=username, password=password, server=host, port=port, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(sql, {"param": sql_param}, timeout=timeout)
-                            for row in cursor.fetchall():
-                                tables.append({
-                                    "tableName": row[0],
-                                    "tableComment": row[1] or "",
-                                })
+                            tables.extend({
+                                "tableName": row[0],
+                                "tableComment": row[1] or "",
+                            } for row in _iter_rows(cursor))
 
                 elif ds_type in ("doris", "starrocks"):
                     # 使用优化的连接参数以提高连接稳定性
-                    connect_timeout = max(timeout, 60)  # 至少 60 秒连接超时
-                    with pymysql.connect(
+                    # 连接超时默认沿用调用方的 timeout，可通过 connectTimeout 单独配置
+                    connect_timeout = config.get("connectTimeout", timeout)
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_mysql_driver(),
                         user=username,
                         passwd=password,
                         host=host,
@@ -475,61 +943,61 @@ class DatasourceConnectionUtil:
                     ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(sql, (sql_param,))
-                            for row in cursor.fetchall():
-                                tables.append({
-                                    "tableName": row[0],
-                                    "tableComment": row[1] or "",
-                                })
+                            tables.extend({
+                                "tableName": row[0],
+                                "tableComment": row[1] or "",
+                            } for row in _iter_rows(cursor))
 
                 elif ds_type == "redshift":
+                    redshift_connector = _load_driver("redshift_connector")
                     if redshift_connector is None:
                         raise Exception("未安装 redshift_connector 驱动")
-                    with redshift_connector.connect(host=host, port=port, database=database,
-                                                    user=username, password=password,
-                                                    timeout=timeout, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        redshift_connector, host=host, port=port, database=database,
+                        user=username, password=password, timeout=timeout, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(sql, (sql_param,))
-                            for row in cursor.fetchall():
-                                tables.append({
-                                    "tableName": row[0],
-                                    "tableComment": row[1] or "",
-                                })
+                            tables.extend({
+                                "tableName": row[0],
+                                "tableComment": row[1] or "",
+                            } for row in _iter_rows(cursor))
 
                 elif ds_type == "kingbase":
-                    db_schema = config.get("dbSchema") or database
-                    with psycopg2.connect(host=host, port=port, database=database,
-                                          user=username, password=password,
-                                          options=f"-c statement_timeout={timeout * 1000}",
-                                          **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_driver("psycopg2"), host=host, port=port, database=database,
+                        user=username, password=password,
+                        options=f"-c statement_timeout={timeout * 1000}", **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
-                            cursor.execute(sql.format(db_schema))
-                            for row in cursor.fetchall():
-                                tables.append({
-                                    "tableName": row[0],
-                                    "tableComment": row[1] or "",
-                                })
+                            cursor.execute(sql, (sql_param,))
+                            tables.extend({
+                                "tableName": row[0],
+                                "tableComment": row[1] or "",
+                            } for row in _iter_rows(cursor))
 
                 elif ds_type == "es":
                     # Elasticsearch：获取索引列表
                     es_client = DatasourceConnectionUtil._get_es_connect(config)
                     indices = es_client.cat.indices(format="json")
                     if indices:
+                        # 一次请求获取全部索引的 mapping，避免逐个索引发起 HTTP 请求
+                        try:
+                            all_mappings = es_client.indices.get_mapping(index="*") or {}
+                        except Exception as e:
+                            logger.warning(f"获取 Elasticsearch 索引 mapping 失败，索引描述将为空: {e}")
+                            all_mappings = {}
                         for idx in indices:
                             index_name = idx.get('index')
-                            desc = ''
                             # 获取 mapping 中的描述
-                            try:
-                                mapping = es_client.indices.get_mapping(index=index_name)
-                                mappings = mapping.get(index_name, {}).get("mappings", {})
-                                if mappings.get('_meta'):
-                                    desc = mappings.get('_meta', {}).get('description', '')
-                            except Exception:
-                                pass
+                            mappings = all_mappings.get(index_name, {}).get("mappings", {})
+                            desc = (mappings.get('_meta') or {}).get('description', '')
                             tables.append({
                                 "tableName": index_name,
                                 "tableComment": desc,
                             })
 
+            _put_cached_metadata(cache_key, tables)
             return tables
         except Exception as e:
             logger.error(f"获取表列表失败: {e}")
@@ -541,151 +1009,23 @@ class DatasourceConnectionUtil:
         database = config.get("database", "")
         db_schema = config.get("dbSchema") or database
 
-        if ds_type == "mysql":
-            sql = """
-                SELECT COLUMN_NAME, DATA_TYPE, COLUMN_COMMENT
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = :param1
-            """
-            if table_name:
-                sql += " AND TABLE_NAME = :param2"
-            return sql, database, table_name
-
-        elif ds_type == "sqlServer":
-            sql = """
-                SELECT
-                    COLUMN_NAME AS [COLUMN_NAME],
-                    DATA_TYPE AS [DATA_TYPE],
-                    ISNULL(EP.value, '') AS [COLUMN_COMMENT]
-                FROM INFORMATION_SCHEMA.COLUMNS C
-                LEFT JOIN sys.extended_properties EP
-                    ON EP.major_id = OBJECT_ID(C.TABLE_SCHEMA + '.' + C.TABLE_NAME)
-                    AND EP.minor_id = C.ORDINAL_POSITION
-                    AND EP.name = 'MS_Description'
-                WHERE C.TABLE_SCHEMA = :param1
-            """
-            if table_name:
-                sql += " AND C.TABLE_NAME = :param2"
-            return sql, db_schema, table_name
-
-        elif ds_type == "pg":
-            sql = """
-                SELECT a.attname AS COLUMN_NAME,
-                       pg_catalog.format_type(a.atttypid, a.atttypmod) AS DATA_TYPE,
-                       col_description(c.oid, a.attnum) AS COLUMN_COMMENT
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-                WHERE n.nspname = :param1
-                    AND a.attnum > 0
-                    AND NOT a.attisdropped
-            """
-            if table_name:
-                sql += " AND c.relname = :param2"
-            return sql, db_schema, table_name
-
-        elif ds_type == "oracle":
-            sql = """
-                SELECT
-                    col.COLUMN_NAME AS "COLUMN_NAME",
-                    (CASE
-                        WHEN col.DATA_TYPE IN ('VARCHAR2', 'CHAR', 'NVARCHAR2', 'NCHAR')
-                            THEN col.DATA_TYPE || '(' || col.DATA_LENGTH || ')'
-                        WHEN col.DATA_TYPE = 'NUMBER' AND col.DATA_PRECISION IS NOT NULL
-                            THEN col.DATA_TYPE || '(' || col.DATA_PRECISION ||
-                                 CASE WHEN col.DATA_SCALE > 0 THEN ',' || col.DATA_SCALE END || ')'
-                        ELSE col.DATA_TYPE
-                    END) AS "DATA_TYPE",
-                    NVL(com.COMMENTS, '') AS "COLUMN_COMMENT"
-                FROM ALL_TAB_COLUMNS col
-                LEFT JOIN ALL_COL_COMMENTS com
-                    ON col.OWNER = com.OWNER
-                    AND col.TABLE_NAME = com.TABLE_NAME
-                    AND col.COLUMN_NAME = com.COLUMN_NAME
-                WHERE col.OWNER = :param1
-            """
-            if table_name:
-                sql += " AND col.TABLE_NAME = :param2"
-            return sql, db_schema, table_name
-
-        elif ds_type == "ck":
-            sql = """
-                SELECT name AS COLUMN_NAME, type AS DATA_TYPE, comment AS COLUMN_COMMENT
-                FROM system.columns
-                WHERE database = :param1
-            """
-            if table_name:
-                sql += " AND table = :param2"
-            return sql, database, table_name
-
-        elif ds_type == "dm":
-            sql = """
-                SELECT
-                    c.COLUMN_NAME AS "COLUMN_NAME",
-                    c.DATA_TYPE AS "DATA_TYPE",
-                    COALESCE(com.COMMENTS, '') AS "COMMENTS"
-                FROM ALL_TAB_COLS c
-                LEFT JOIN ALL_COL_COMMENTS com
-                    ON c.OWNER = com.OWNER
-                    AND c.TABLE_NAME = com.TABLE_NAME
-                    AND c.COLUMN_NAME = com.COLUMN_NAME
-                WHERE c.OWNER = :param1
-            """
-            if table_name:
-                sql += " AND c.TABLE_NAME = :param2"
-            return sql, db_schema, table_name
-
-        elif ds_type == "redshift":
-            sql = """
-                SELECT a.attname AS COLUMN_NAME,
-                       pg_catalog.format_type(a.atttypid, a.atttypmod) AS DATA_TYPE,
-                       col_description(c.oid, a.attnum) AS COLUMN_COMMENT
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-                WHERE n.nspname = %s
-                    AND a.attnum > 0
-                    AND NOT a.attisdropped
-            """
-            if table_name:
-                sql += " AND c.relname = %s"
-            return sql, db_schema, table_name
-
-        elif ds_type in ("doris", "starrocks"):
-            sql = """
-                SELECT COLUMN_NAME, DATA_TYPE, COLUMN_COMMENT
-                FROM INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = %s
-            """
-            if table_name:
-                sql += " AND TABLE_NAME = %s"
-            return sql, database, table_name
-
-        elif ds_type == "kingbase":
-            sql = """
-                SELECT a.attname AS COLUMN_NAME,
-                       pg_catalog.format_type(a.atttypid, a.atttypmod) AS DATA_TYPE,
-                       col_description(c.oid, a.attnum) AS COLUMN_COMMENT
-                FROM pg_catalog.pg_attribute a
-                JOIN pg_catalog.pg_class c ON a.attrelid = c.oid
-                JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-                WHERE n.nspname = '{0}'
-                    AND a.attnum > 0
-                    AND NOT a.attisdropped
-            """
-            if table_name:
-                sql += " AND c.relname = '{1}'"
-            return sql, db_schema, table_name
-
-        elif ds_type == "es":
-            return "", None, None
-
-        else:
+        if ds_type not in _FIELD_SQL:
             raise ValueError(f"不支持的数据源类型: {ds_type}")
+        sql, table_filter, param_key = _FIELD_SQL[ds_type]
+        if param_key is None:
+            return sql, None, None
+        if table_name:
+            sql += table_filter
+        return sql, database if param_key == "database" else db_schema, table_name
 
     @staticmethod
     def get_fields(ds_type: str, config: Dict[str, Any], table_name: str) -> List[Dict[str, Any]]:
-        """获取指定表的字段列表（名称/类型/注释）"""
+        """获取指定表的字段列表（名称/类型/注释，结果缓存 METADATA_CACHE_TTL 秒）"""
+        cache_key = _metadata_cache_key(ds_type, config, table_name or "")
+        cached = _get_cached_metadata(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             db = DB.get_db(ds_type)
             timeout = config.get("timeout", 30)
@@ -696,38 +1036,16 @@ class DatasourceConnectionUtil:
 
             if db.connect_type == ConnectType.sqlalchemy:
                 # SQLAlchemy 驱动的数据库
-                uri = DatasourceConnectionUtil.build_connection_uri(ds_type, config)
-                if ds_type == "oracle":
-                    engine = create_engine(uri, pool_pre_ping=True)
-                elif ds_type == "sqlServer":
-                    # SQL Server 2022 需要禁用加密以兼容 pymssql
-                    # pymssql 不支持 connect_timeout，使用 login_timeout 和 timeout
-                    engine = create_engine(
-                        uri, pool_pre_ping=True, connect_args={"timeout": timeout, "login_timeout": timeout, "encryption": "off"}
-                    )
-                else:
-                    engine = create_engine(uri, pool_pre_ping=True, connect_args={"connect_timeout": timeout})
+                engine = DatasourceConnectionUtil._get_engine(ds_type, config)
                 with engine.connect() as conn:
                     result = conn.execute(text(sql), {"param1": p1, "param2": p2})
-                    for idx, row in enumerate(result.fetchall()):
-                        # 处理 bytes 类型（SQL Server 可能返回 bytes）
-                        def _decode_value(value):
-                            if isinstance(value, bytes):
-                                try:
-                                    return value.decode('utf-8')
-                                except UnicodeDecodeError:
-                                    try:
-                                        return value.decode('latin-1')
-                                    except:
-                                        return str(value)
-                            return value or ""
-
-                        fields.append({
-                            "fieldName": _decode_value(row[0]),
-                            "fieldType": _decode_value(row[1]),
-                            "fieldComment": _decode_value(row[2]),
-                            "fieldIndex": idx
-                        })
+                    # 处理 bytes 类型（SQL Server 可能返回 bytes）
+                    fields.extend({
+                        "fieldName": _to_str(row[0]),
+                        "fieldType": _to_str(row[1]),
+                        "fieldComment": _to_str(row[2]),
+                        "fieldIndex": idx
+                    } for idx, row in enumerate(result))
             else:
                 # Python 原生驱动的数据库
                 host = config.get("host", "")
@@ -737,24 +1055,27 @@ class DatasourceConnectionUtil:
                 database = config.get("database", "")
 
                 if ds_type == "dm":
+                    dmPython = _load_driver("dmPython")
                     if dmPython is None:
                         raise Exception("未安装达梦数据库驱动 dmPython")
-                    with dmPython.connect(user=username, password=password, server=host,
-                                          port=port, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        dmPython, user=username, password=password, server=host, port=port, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(sql, {"param1": p1, "param2": p2}, timeout=timeout)
-                            for idx, row in enumerate(cursor.fetchall()):
-                                fields.append({
-                                    "fieldName": row[0],
-                                    "fieldType": row[1] or "",
-                                    "fieldComment": row[2] or "",
-                                    "fieldIndex": idx
-                                })
+                            fields.extend({
+                                "fieldName": row[0],
+                                "fieldType": row[1] or "",
+                                "fieldComment": row[2] or "",
+                                "fieldIndex": idx
+                            } for idx, row in enumerate(_iter_rows(cursor)))
 
                 elif ds_type in ("doris", "starrocks"):
                     # 使用优化的连接参数以提高连接稳定性
-                    connect_timeout = max(timeout, 60)  # 至少 60 秒连接超时
-                    with pymysql.connect(
+                    # 连接超时默认沿用调用方的 timeout，可通过 connectTimeout 单独配置
+                    connect_timeout = config.get("connectTimeout", timeout)
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_mysql_driver(),
                         user=username,
                         passwd=password,
                         host=host,
@@ -770,91 +1091,190 @@ class DatasourceConnectionUtil:
                         with conn.cursor() as cursor:
                             params = (p1, p2) if p2 else (p1,)
                             cursor.execute(sql, params)
-                            for idx, row in enumerate(cursor.fetchall()):
-                                fields.append({
-                                    "fieldName": row[0],
-                                    "fieldType": row[1] or "",
-                                    "fieldComment": row[2] or "",
-                                    "fieldIndex": idx
-                                })
+                            fields.extend({
+                                "fieldName": row[0],
+                                "fieldType": row[1] or "",
+                                "fieldComment": row[2] or "",
+                                "fieldIndex": idx
+                            } for idx, row in enumerate(_iter_rows(cursor)))
 
                 elif ds_type == "redshift":
+                    redshift_connector = _load_driver("redshift_connector")
                     if redshift_connector is None:
                         raise Exception("未安装 redshift_connector 驱动")
-                    with redshift_connector.connect(host=host, port=port, database=database,
-                                                    user=username, password=password,
-                                                    timeout=timeout, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        redshift_connector, host=host, port=port, database=database,
+                        user=username, password=password, timeout=timeout, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             params = (p1, p2) if p2 else (p1,)
                             cursor.execute(sql, params)
-                            for idx, row in enumerate(cursor.fetchall()):
-                                fields.append({
-                                    "fieldName": row[0],
-                                    "fieldType": row[1] or "",
-                                    "fieldComment": row[2] or "",
-                                    "fieldIndex": idx
-                                })
+                            fields.extend({
+                                "fieldName": row[0],
+                                "fieldType": row[1] or "",
+                                "fieldComment": row[2] or "",
+                                "fieldIndex": idx
+                            } for idx, row in enumerate(_iter_rows(cursor)))
 
                 elif ds_type == "kingbase":
-                    with psycopg2.connect(host=host, port=port, database=database,
-                                          user=username, password=password,
-                                          options=f"-c statement_timeout={timeout * 1000}",
-                                          **extra_config) as conn:
-                        with conn.cursor() as cursor:
-                            formatted_sql = sql.format(p1, p2) if p2 else sql.format(p1)
-                            cursor.execute(formatted_sql)
-                            for idx, row in enumerate(cursor.fetchall()):
-                                fields.append({
-                                    "fieldName": row[0],
-                                    "fieldType": row[1] or "",
-                                    "fieldComment": row[2] or "",
-                                    "fieldIndex": idx
-                                })
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_driver("psycopg2"), host=host, port=port, database=database,
+                        user=username, password=password,
+                        options=f"-c statement_timeout={timeout * 1000}", **extra_config
+                    ) as conn:
+                        # 全库字段探测（未指定表名）时使用服务端命名游标，由 fetchmany 分批拉取，避免客户端缓冲全部行
+                        cursor_kwargs = {} if p2 else {"name": "aix_fields_cursor"}
+                        with conn.cursor(**cursor_kwargs) as cursor:
+                            params = (p1, p2) if p2 else (p1,)
+                            cursor.execute(sql, params)
+                            fields.extend({
+                                "fieldName": row[0],
+                                "fieldType": row[1] or "",
+                                "fieldComment": row[2] or "",
+                                "fieldIndex": idx
+                            } for idx, row in enumerate(_iter_rows(cursor)))
 
                 elif ds_type == "es":
                     # Elasticsearch：获取索引的字段
                     es_client = DatasourceConnectionUtil._get_es_connect(config)
                     mapping = es_client.indices.get_mapping(index=table_name)
-                    properties = mapping.get(table_name, {}).get("mappings", {}).get("properties", {})
+                    # 通过别名查询时返回的键为实际索引名，此时取唯一的一项
+                    mapping_root = mapping.get(table_name) or next(iter(mapping.values()), {})
+                    properties = mapping_root.get("mappings", {}).get("properties", {})
                     for idx, (field, field_config) in enumerate(properties.items()):
-                        field_type = field_config.get("type", "")
-                        desc = ""
-                        if field_config.get("_meta"):
-                            desc = field_config.get("_meta", {}).get('description', '')
+                        field_type = field_config.get("type")
                         if not field_type:
                             # object、nested 等类型
-                            field_type = ','.join(list(field_config.keys()))
+                            field_type = ','.join(field_config)
+                        meta = field_config.get("_meta")
                         fields.append({
                             "fieldName": field,
                             "fieldType": field_type,
-                            "fieldComment": desc,
+                            "fieldComment": meta.get('description', '') if meta else "",
                             "fieldIndex": idx
                         })
 
+            _put_cached_metadata(cache_key, fields)
             return fields
         except Exception as e:
             logger.error(f"获取表 {table_name} 字段失败: {e}")
             raise
 
     @staticmethod
-    def _process_row_value(value: Any) -> Any:
-        """处理行数据中的值"""
-        if isinstance(value, Decimal):
-            return float(value)
-        elif hasattr(value, "isoformat"):
-            return value.isoformat()
-        elif hasattr(value, "strftime"):
-            return value.strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(value, bytes):
-            return value.decode('utf-8', errors='ignore')
-        return value
+    def invalidate_metadata_cache(ds_type: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        """清除表/字段元数据缓存；不传参数时清空全部，否则仅清除该数据源连接相关的条目"""
+        with _metadata_cache_lock:
+            if ds_type is None or config is None:
+                _metadata_cache.clear()
+                return
+            prefix = _metadata_cache_key(ds_type, config)[:-1]
+            for key in [k for k in _metadata_cache if k[:-1] == prefix]:
+                del _metadata_cache[key]
+
+    @staticmethod
+    def _get_fields_batch(ds_type: str, config: Dict[str, Any], table_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """用 IN 查询一次获取多张表的字段（每 FIELD_BATCH_SIZE 张表一次往返）"""
+        database = config.get("database", "")
+        sql, param_key = _FIELD_BATCH_SQL[ds_type]
+        schema = database if param_key == "database" else (config.get("dbSchema") or database)
+        statement = text(sql).bindparams(bindparam("tables", expanding=True))
+
+        fields_by_table: Dict[str, List[Dict[str, Any]]] = {name: [] for name in table_names}
+        engine = DatasourceConnectionUtil._get_engine(ds_type, config)
+        with engine.connect() as conn:
+            for start in range(0, len(table_names), FIELD_BATCH_SIZE):
+                chunk = table_names[start:start + FIELD_BATCH_SIZE]
+                for row in conn.execute(statement, {"param": schema, "tables": chunk}):
+                    fields = fields_by_table.get(_to_str(row[0]))
+                    if fields is None:
+                        continue
+                    fields.append({
+                        "fieldName": _to_str(row[1]),
+                        "fieldType": _to_str(row[2]),
+                        "fieldComment": _to_str(row[3]),
+                        "fieldIndex": len(fields)
+                    })
+
+        for table_name, fields in fields_by_table.items():
+            _put_cached_metadata(_metadata_cache_key(ds_type, config, table_name), fields)
+        return fields_by_table
+
+    @staticmethod
+    def get_fields_for_tables(ds_type: str, config: Dict[str, Any], table_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        获取多张表的字段列表
+        支持批量查询的数据库用 IN 查询合并为少量往返；其余数据库（或批量查询失败时）按表并发获取
+        （元数据查询以网络 IO 为主，多线程可显著缩短总耗时），单张表获取失败时返回空列表，不影响其他表
+        """
+        if table_names and ds_type in _FIELD_BATCH_SQL:
+            try:
+                return DatasourceConnectionUtil._get_fields_batch(ds_type, config, table_names)
+            except Exception as e:
+                logger.warning(f"批量获取字段失败，改为逐表获取: {e}")
+
+        def _probe_one(table_name: str) -> List[Dict[str, Any]]:
+            try:
+                return DatasourceConnectionUtil.get_fields(ds_type, config, table_name)
+            except Exception:
+                return []
+
+        if not table_names:
+            return {}
+        max_workers = min(METADATA_MAX_WORKERS, len(table_names))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_probe_one, table_names))
+        return dict(zip(table_names, results))
+
+    # 兼容旧调用方式
+    _process_row_value = staticmethod(_process_row_value)
+
+    @staticmethod
+    def execute_query(ds_type: str, config: Dict[str, Any], sql: str,
+                      fetch_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        执行SQL查询并返回结果
+        各驱动均以流式游标分批拉取结果，fetch_limit 不为空时读取到指定行数即停止
+        """
+        with closing(DatasourceConnectionUtil.execute_query_iter(ds_type, config, sql)) as rows:
+            return list(_limit_rows(rows, fetch_limit))
+
+    @staticmethod
+    def execute_queries(tasks: List[Tuple[str, Dict[str, Any], str]], max_workers: int = METADATA_MAX_WORKERS) -> List[List[Dict[str, Any]]]:
+        """
+        并发执行多条查询（可跨数据源），tasks 为 (数据源类型, 配置, SQL) 列表，结果顺序与 tasks 一致
+        驱动在网络 IO 期间释放 GIL，总耗时约为最慢一条查询的耗时；任一查询失败时抛出其异常
+        """
+        if not tasks:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            return list(executor.map(lambda task: DatasourceConnectionUtil.execute_query(*task), tasks))
+
+    @staticmethod
+    def execute_query_to_json_bytes(ds_type: str, config: Dict[str, Any], sql: str) -> bytes:
+        """
+        执行查询并直接序列化为 JSON 数组字节串（逐行编码后追加，不保留整份 list[dict]）
+        适用于直接作为 HTTP 响应体返回的场景
+        """
+        buf = bytearray(b"[")
+        with closing(DatasourceConnectionUtil.execute_query_iter(ds_type, config, sql)) as rows:
+            for i, row in enumerate(rows):
+                if i:
+                    buf += b","
+                buf += _json_dumps(row, default=str)
+        buf += b"]"
+        return bytes(buf)
 
     @staticmethod
-    def execute_query(ds_type: str, config: Dict[str, Any], sql: str) -> List[Dict[str, Any]]:
-        """执行SQL查询并返回结果"""
+    def execute_query_iter(ds_type: str, config: Dict[str, Any], sql: str,
+                           chunk_size: int = FETCH_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        流式执行SQL查询，逐行产出结果字典（底层按 chunk_size 分批拉取）
+        连接在迭代结束或生成器关闭时归还；提前停止迭代时建议配合 contextlib.closing 使用：
+            with closing(DatasourceConnectionUtil.execute_query_iter(...)) as rows:
+                for row in rows: ...
+        """
         # 移除末尾的分号
-        while sql.endswith(';'):
-            sql = sql[:-1]
+        sql = sql.rstrip().rstrip(';')
 
         try:
             db = DB.get_db(ds_type)
@@ -863,28 +1283,12 @@ class DatasourceConnectionUtil:
 
             if db.connect_type == ConnectType.sqlalchemy:
                 # SQLAlchemy 驱动的数据库
-                uri = DatasourceConnectionUtil.build_connection_uri(ds_type, config)
-                if ds_type == "oracle":
-                    engine = create_engine(uri, pool_pre_ping=True)
-                elif ds_type == "sqlServer":
-                    # SQL Server 2022 需要禁用加密以兼容 pymssql
-                    # pymssql 不支持 connect_timeout，使用 login_timeout 和 timeout
-                    engine = create_engine(
-                        uri, pool_pre_ping=True, connect_args={"timeout": timeout, "login_timeout": timeout, "encryption": "off"}
-                    )
-                else:
-                    engine = create_engine(uri, pool_pre_ping=True, connect_args={"connect_timeout": timeout})
+                engine = DatasourceConnectionUtil._get_engine(ds_type, config)
                 with engine.connect() as conn:
-                    result = conn.execute(text(sql))
-                    rows = result.fetchall()
+                    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(text(sql))
+                    rows = result
                     columns = list(result.keys())
-                    data = []
-                    for row in rows:
-                        row_dict = {}
-                        for i, col in enumerate(columns):
-                            row_dict[col] = DatasourceConnectionUtil._process_row_value(row[i])
-                        data.append(row_dict)
-                    return data
+                    yield from _iter_dicts(rows, columns)
             else:
                 # Python 原生驱动的数据库
                 host = config.get("host", "")
@@ -894,30 +1298,29 @@ class DatasourceConnectionUtil:
                 database = config.get("database", "")
 
                 if ds_type == "dm":
+                    dmPython = _load_driver("dmPython")
                     if dmPython is None:
                         raise Exception("未安装达梦数据库驱动 dmPython")
-                    with dmPython.connect(user=username, password=password, server=host,
-                                          port=port, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        dmPython, user=username, password=password, server=host, port=port, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(sql, timeout=timeout)
-                            rows = cursor.fetchall()
+                            rows = _iter_rows(cursor, chunk_size)
                             columns = [field[0] for field in cursor.description]
-                            data = []
-                            for row in rows:
-                                row_dict = {}
-                                for i, col in enumerate(columns):
-                                    row_dict[col] = DatasourceConnectionUtil._process_row_value(row[i])
-                                data.append(row_dict)
-                            return data
+                            yield from _iter_dicts(rows, columns)
 
                 elif ds_type in ("doris", "starrocks"):
                     # StarRocks/Doris 连接参数优化：
-                    # 1. 增加 connect_timeout 到至少 60 秒（连接建立可能需要更长时间）
+                    # 1. connect_timeout 遵循调用方的超时设置，避免不可达主机长时间占用 worker
                     # 2. 添加 write_timeout 防止写入超时
                     # 3. 设置 charset 确保编码正确
                     # 4. 设置 autocommit 提高兼容性
-                    connect_timeout = max(timeout, 60)  # 至少 60 秒连接超时
-                    with pymysql.connect(
+                    # 连接超时默认沿用调用方的 timeout，可通过 connectTimeout 单独配置
+                    connect_timeout = config.get("connectTimeout", timeout)
+                    mysql_driver = _load_mysql_driver()
+                    with DatasourceConnectionUtil._native_connection(
+                        mysql_driver,
                         user=username,
                         passwd=password,
                         host=host,
@@ -930,77 +1333,62 @@ class DatasourceConnectionUtil:
                         autocommit=True,
                         **extra_config
                     ) as conn:
-                        with conn.cursor() as cursor:
+                        # 无缓冲游标（SSCursor）边读边处理，避免一次性缓冲全部结果（驱动不提供时使用默认游标）
+                        ss_cursor = getattr(getattr(mysql_driver, "cursors", None), "SSCursor", None)
+                        with conn.cursor(*((ss_cursor,) if ss_cursor else ())) as cursor:
                             cursor.execute(sql)
-                            rows = cursor.fetchall()
+                            rows = _iter_rows(cursor, chunk_size)
                             columns = [field[0] for field in cursor.description]
-                            data = []
-                            for row in rows:
-                                row_dict = {}
-                                for i, col in enumerate(columns):
-                                    row_dict[col] = DatasourceConnectionUtil._process_row_value(row[i])
-                                data.append(row_dict)
-                            return data
+                            yield from _iter_dicts(rows, columns)
 
                 elif ds_type == "redshift":
+                    redshift_connector = _load_driver("redshift_connector")
                     if redshift_connector is None:
                         raise Exception("未安装 redshift_connector 驱动")
-                    with redshift_connector.connect(host=host, port=port, database=database,
-                                                    user=username, password=password,
-                                                    timeout=timeout, **extra_config) as conn:
+                    with DatasourceConnectionUtil._native_connection(
+                        redshift_connector, host=host, port=port, database=database,
+                        user=username, password=password, timeout=timeout, **extra_config
+                    ) as conn:
                         with conn.cursor() as cursor:
                             cursor.execute(sql)
-                            rows = cursor.fetchall()
+                            rows = _iter_rows(cursor, chunk_size)
                             columns = [field[0] for field in cursor.description]
-                            data = []
-                            for row in rows:
-                                row_dict = {}
-                                for i, col in enumerate(columns):
-                                    row_dict[col] = DatasourceConnectionUtil._process_row_value(row[i])
-                                data.append(row_dict)
-                            return data
+                            yield from _iter_dicts(rows, columns)
 
                 elif ds_type == "kingbase":
-                    with psycopg2.connect(host=host, port=port, database=database,
-                                          user=username, password=password,
-                                          options=f"-c statement_timeout={timeout * 1000}",
-                                          **extra_config) as conn:
-                        with conn.cursor() as cursor:
+                    with DatasourceConnectionUtil._native_connection(
+                        _load_driver("psycopg2"), host=host, port=port, database=database,
+                        user=username, password=password,
+                        options=f"-c statement_timeout={timeout * 1000}", **extra_config
+                    ) as conn:
+                        # 查询语句使用服务端命名游标分批拉取（DECLARE CURSOR 仅支持 SELECT/WITH）
+                        is_query = sql.lstrip()[:6].lower().startswith(("select", "with"))
+                        cursor_kwargs = {"name": "aixdb_stream"} if is_query else {}
+                        with conn.cursor(**cursor_kwargs) as cursor:
                             cursor.execute(sql)
-                            rows = cursor.fetchall()
+                            # 命名游标在首次拉取后才有 description
+                            first_batch = cursor.fetchmany(chunk_size)
                             columns = [field[0] for field in cursor.description]
-                            data = []
-                            for row in rows:
-                                row_dict = {}
-                                for i, col in enumerate(columns):
-                                    row_dict[col] = DatasourceConnectionUtil._process_row_value(row[i])
-                                data.append(row_dict)
-                            return data
+                            rows = chain(first_batch, _iter_rows(cursor, chunk_size))
+                            yield from _iter_dicts(rows, columns)
 
                 elif ds_type == "es":
                     # Elasticsearch：通过 SQL API 执行查询
-                    host_url = config.get("host", "")
-                    while host_url.endswith('/'):
-                        host_url = host_url[:-1]
+                    host_url = config.get("host", "").rstrip('/')
                     url = f'{host_url}/_sql?format=json'
-                    response = requests.post(
+                    response = DatasourceConnectionUtil._get_es_session(host_url).post(
                         url,
-                        data=json.dumps({"query": sql}),
+                        data=_json_dumps({"query": sql}),
                         headers=DatasourceConnectionUtil._get_es_auth(config),
-                        verify=False
+                        verify=False,
+                        timeout=timeout
                     )
-                    res = response.json()
+                    res = _json_loads(response.content)
                     if res.get('error'):
                         raise Exception(json.dumps(res))
                     columns = [col.get('name') for col in res.get('columns', [])]
                     rows = res.get('rows', [])
-                    data = []
-                    for row in rows:
-                        row_dict = {}
-                        for i, col in enumerate(columns):
-                            row_dict[col] = DatasourceConnectionUtil._process_row_value(row[i])
-                        data.append(row_dict)
-                    return data
+                    yield from _iter_dicts(rows, columns)
 
                 else:
                     raise Exception(f"不支持的数据源类型: {ds_type}")
@@ -1010,56 +1398,84 @@ class DatasourceConnectionUtil:
             raise
 
 
+@lru_cache(maxsize=4)
+def _config_aead(key: bytes):
+    """由配置密钥经 HKDF 派生 256 位密钥并构造 AES-GCM 实例（按密钥缓存）"""
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"aix-db datasource config")
+    return AESGCM(hkdf.derive(key))
+
+
+@lru_cache(maxsize=4)
+def _config_ecb_cipher(key: bytes):
+    """旧版 AES-ECB cipher（ECB 各分组之间无状态，可跨调用复用，避免重复密钥扩展）"""
+    from Crypto.Cipher import AES
+
+    return AES.new(key, AES.MODE_ECB)
+
+
 class DatasourceConfigUtil:
     """数据源配置工具类 - 加密/解密"""
 
     # 简单的加密密钥（生产环境应使用更安全的方式）
     KEY = b"AixDB12345678901"  # 16字节密钥
 
+    # AES-GCM 密文前缀：旧版 AES-ECB 密文为纯 base64，不含 ":"，解密时据此区分
+    GCM_PREFIX = "v2:"
+    GCM_NONCE_SIZE = 12
+
     @staticmethod
     def encrypt_config(config: Dict[str, Any]) -> str:
-        """加密配置信息"""
+        """加密配置信息（AES-GCM，带认证；未安装 cryptography 时回退 AES-ECB）"""
         try:
+            import base64
+
+            if AESGCM is not None:
+                nonce = os.urandom(DatasourceConfigUtil.GCM_NONCE_SIZE)
+                encrypted = _config_aead(DatasourceConfigUtil.KEY).encrypt(nonce, _json_dumps(config), None)
+                return DatasourceConfigUtil.GCM_PREFIX + base64.b64encode(nonce + encrypted).decode("ascii")
+
             from Crypto.Cipher import AES
             from Crypto.Util.Padding import pad
-            import base64
 
-            config_str = json.dumps(config)
-            cipher = AES.new(DatasourceConfigUtil.KEY, AES.MODE_ECB)
-            padded_data = pad(config_str.encode("utf-8"), AES.block_size)
-            encrypted = cipher.encrypt(padded_data)
+            padded_data = pad(_json_dumps(config), AES.block_size)
+            encrypted = _config_ecb_cipher(DatasourceConfigUtil.KEY).encrypt(padded_data)
             return base64.b64encode(encrypted).decode("utf-8")
         except ImportError:
             # 如果没有安装pycryptodome，使用简单的base64编码（不安全，仅用于开发）
             logger.warning("pycryptodome未安装，使用base64编码（不安全）")
             import base64
 
-            config_str = json.dumps(config)
-            return base64.b64encode(config_str.encode("utf-8")).decode("utf-8")
+            return base64.b64encode(_json_dumps(config)).decode("utf-8")
         except Exception as e:
             logger.error(f"加密配置失败: {e}")
             raise
 
     @staticmethod
     def decrypt_config(encrypted_config: str) -> Dict[str, Any]:
-        """解密配置信息"""
+        """解密配置信息（兼容旧版 AES-ECB 密文）"""
         try:
+            import base64
+
+            if encrypted_config.startswith(DatasourceConfigUtil.GCM_PREFIX):
+                if AESGCM is None:
+                    raise RuntimeError("解密 AES-GCM 配置需要安装 cryptography")
+                blob = base64.b64decode(encrypted_config[len(DatasourceConfigUtil.GCM_PREFIX):])
+                nonce, encrypted = blob[:DatasourceConfigUtil.GCM_NONCE_SIZE], blob[DatasourceConfigUtil.GCM_NONCE_SIZE:]
+                return _json_loads(_config_aead(DatasourceConfigUtil.KEY).decrypt(nonce, encrypted, None))
+
             from Crypto.Cipher import AES
             from Crypto.Util.Padding import unpad
-            import base64
 
             encrypted_data = base64.b64decode(encrypted_config)
-            cipher = AES.new(DatasourceConfigUtil.KEY, AES.MODE_ECB)
-            decrypted = cipher.decrypt(encrypted_data)
+            decrypted = _config_ecb_cipher(DatasourceConfigUtil.KEY).decrypt(encrypted_data)
             unpadded = unpad(decrypted, AES.block_size)
-            return json.loads(unpadded.decode("utf-8"))
+            return _json_loads(unpadded)
         except ImportError:
             # 如果没有安装pycryptodome，使用简单的base64解码
             logger.warning("pycryptodome未安装，使用base64解码")
             import base64
 
-            config_str = base64.b64decode(encrypted_config).decode("utf-8")
-            return json.loads(config_str)
+            return _json_loads(base64.b64decode(encrypted_config))
         except Exception as e:
             logger.error(f"解密配置失败: {e}")
             raise
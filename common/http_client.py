@@ -0,0 +1,48 @@
+"""
+出站 HTTP 客户端
+
+Dify 等外部接口共用一个 worker 级别的 httpx.AsyncClient，复用 TCP/TLS 连接，
+安装了 h2 时启用 HTTP/2 多路复用
+"""
+
+import importlib.util
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# httpx 的 HTTP/2 支持依赖可选的 h2 包
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DIFY_HTTP_MAX_CONNECTIONS = int(os.getenv("DIFY_HTTP_MAX_CONNECTIONS", "100"))
+DIFY_HTTP_MAX_KEEPALIVE = int(os.getenv("DIFY_HTTP_MAX_KEEPALIVE", "50"))
+DIFY_HTTP_TIMEOUT = float(os.getenv("DIFY_HTTP_TIMEOUT", "60"))
+
+_dify_client: Optional[httpx.AsyncClient] = None
+
+
+def get_dify_client() -> httpx.AsyncClient:
+    """获取共享的 Dify 异步客户端，未初始化时按需创建"""
+    global _dify_client
+    if _dify_client is None or _dify_client.is_closed:
+        _dify_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=DIFY_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=DIFY_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=DIFY_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+    return _dify_client
+
+
+async def close_dify_client():
+    """关闭共享的 Dify 异步客户端，释放连接池"""
+    global _dify_client
+    if _dify_client is not None and not _dify_client.is_closed:
+        await _dify_client.aclose()
+        logger.info("Dify HTTP client closed")
+    _dify_client = None
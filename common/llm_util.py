@@ -1,5 +1,9 @@
 import json
 import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 from model.db_connection_pool import get_db_pool
 from model.db_models import TAiModel
@@ -11,15 +15,27 @@ pool = get_db_pool()
 # 超时链路：LLM(15min) < TASK(30min) < Sanic RESPONSE(35min) < 前端 fetch(36min)
 DEFAULT_LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", 30 * 60))
 
+# 默认 LLM 配置缓存时间（秒），模型增删改/切换默认模型时会主动清除
+DEFAULT_MODEL_CACHE_TTL = int(os.getenv("DEFAULT_MODEL_CACHE_TTL", "60"))
+_default_model_cache: Optional[Tuple[Dict[str, Any], float]] = None
+_default_model_cache_lock = threading.Lock()
+
+
+def clear_default_model_cache():
+    """清除默认 LLM 配置缓存（模型配置变更后调用）"""
+    global _default_model_cache
+    with _default_model_cache_lock:
+        _default_model_cache = None
+
+
+def _get_default_model_config() -> Dict[str, Any]:
+    """查询默认 LLM 配置（带 TTL 缓存，避免每次获取模型都查询数据库）"""
+    global _default_model_cache
+    with _default_model_cache_lock:
+        cached = _default_model_cache
+        if cached and time.time() - cached[1] < DEFAULT_MODEL_CACHE_TTL:
+            return cached[0]
 
-def get_llm(temperature=0.75, timeout=None, max_tokens=None):
-    """
-    获取LLM模型
-    :param temperature: 温度参数
-    :param timeout: 超时时间（秒），默认使用环境变量 LLM_TIMEOUT 或 30分钟
-    :param max_tokens: 单次输出 token 上限，默认 None（使用模型默认值）
-    :return: LLM模型实例
-    """
     with pool.get_session() as session:
         # Fetch default model
         model = (
@@ -30,89 +46,101 @@ def get_llm(temperature=0.75, timeout=None, max_tokens=None):
         if not model:
             raise ValueError("No default AI model configured in database.")
 
-        # Map supplier to model type string used in map
-        # 1:OpenAI, 2:Azure, 3:Ollama, 4:vLLM, 5:DeepSeek, 6:Qwen, 7:Moonshot, 8:ZhipuAI, 9:Other
-        supplier = model.supplier
+        config = {
+            "supplier": model.supplier,
+            "base_model": model.base_model,
+            "api_key": model.api_key,
+            "api_domain": model.api_domain,
+        }
 
-        # 目前统一将 Qwen 也视为通过 OpenAI 协议接入，避免 ChatTongyi 及其 LangSmith/OpenTelemetry 依赖
-        if supplier == 3:
-            model_type = "ollama"
-        else:
-            # Default to openai for others (OpenAI, Qwen, DeepSeek, Moonshot, Zhipu, vLLM, etc.)
-            model_type = "openai"
+    with _default_model_cache_lock:
+        _default_model_cache = (config, time.time())
+    return config
 
-        model_name = model.base_model
-        model_api_key = model.api_key
-        model_base_url = model.api_domain
 
+@lru_cache(maxsize=None)
+def _load_chat_class(model_type: str):
+    """
+    延迟导入并缓存各类模型的 Chat 类（每个进程只导入一次）
+    为了避免在模块加载时就触发第三方依赖（如 OpenTelemetry/LangSmith）的副作用，导入推迟到首次获取模型时。
+    ChatOpenAI 导入失败直接抛异常（导入失败不会被缓存，下次调用会重试）；ChatOllama 导入失败时返回 None，由调用方降级为 ChatOpenAI。
+    """
+    if model_type == "ollama":
         try:
-            temperature = float(temperature)
-        except ValueError:
-            temperature = 0.75
+            from langchain_ollama import ChatOllama
+        except Exception as e:
+            print(
+                f"[WARN] Failed to import ChatOllama, fallback to ChatOpenAI: {e}"
+            )
+            return None
+        return ChatOllama
+
+    try:
+        from langchain_openai import ChatOpenAI
+    except Exception as e:
+        # 这里打印日志而不是在导入阶段崩溃
+        print(
+            f"[ERROR] Failed to import ChatOpenAI, please check langchain-openai/langsmith/opentelemetry installation: {e}"
+        )
+        raise
+    return ChatOpenAI
+
 
-        # 确定超时时间：优先使用参数，其次环境变量，最后使用默认值
-        if timeout is None:
+def get_llm(temperature=0.75, timeout=None, max_tokens=None):
+    """
+    获取LLM模型
+    :param temperature: 温度参数
+    :param timeout: 超时时间（秒），默认使用环境变量 LLM_TIMEOUT 或 30分钟
+    :param max_tokens: 单次输出 token 上限，默认 None（使用模型默认值）
+    :return: LLM模型实例
+    """
+    model = _get_default_model_config()
+
+    # Map supplier to model type string used in map
+    # 1:OpenAI, 2:Azure, 3:Ollama, 4:vLLM, 5:DeepSeek, 6:Qwen, 7:Moonshot, 8:ZhipuAI, 9:Other
+    # 目前统一将 Qwen 也视为通过 OpenAI 协议接入，避免 ChatTongyi 及其 LangSmith/OpenTelemetry 依赖
+    if model["supplier"] == 3:
+        model_type = "ollama"
+    else:
+        # Default to openai for others (OpenAI, Qwen, DeepSeek, Moonshot, Zhipu, vLLM, etc.)
+        model_type = "openai"
+
+    model_name = model["base_model"]
+    model_api_key = model["api_key"]
+    model_base_url = model["api_domain"]
+
+    try:
+        temperature = float(temperature)
+    except ValueError:
+        temperature = 0.75
+
+    # 确定超时时间：优先使用参数，其次环境变量，最后使用默认值
+    if timeout is None:
+        timeout = DEFAULT_LLM_TIMEOUT
+    else:
+        try:
+            timeout = int(timeout)
+        except (ValueError, TypeError):
             timeout = DEFAULT_LLM_TIMEOUT
-        else:
-            try:
-                timeout = int(timeout)
-            except (ValueError, TypeError):
-                timeout = DEFAULT_LLM_TIMEOUT
-
-        # 为了避免在模块加载时就触发第三方依赖（如 OpenTelemetry/LangSmith）的副作用，
-        # 对各类模型做统一的延迟导入和降级处理
-        def _get_openai():
-            """
-            延迟导入 ChatOpenAI，避免在应用启动阶段因 langsmith/opentelemetry 初始化失败导致进程退出。
-            如果导入失败，直接抛异常，由上层决定如何处理（通常是显式配置问题）。
-            """
-            try:
-                from langchain_openai import ChatOpenAI
-            except Exception as e:
-                # 这里打印日志而不是在导入阶段崩溃
-                print(
-                    f"[ERROR] Failed to import ChatOpenAI, please check langchain-openai/langsmith/opentelemetry installation: {e}"
-                )
-                raise
-
-            kwargs = dict(
-                model=model_name,
-                temperature=temperature,
-                base_url=model_base_url,
-                api_key=model_api_key or "empty",  # Ensure not None
-                timeout=timeout,  # 设置超时时间（秒）
-            )
-            if max_tokens is not None:
-                kwargs["max_tokens"] = max_tokens
-            return ChatOpenAI(**kwargs)
-
-        def _get_ollama():
-            """
-            延迟导入 ChatOllama，避免在模块加载阶段触发不必要的依赖。
-            """
-            try:
-                from langchain_ollama import ChatOllama
-            except Exception as e:
-                print(
-                    f"[WARN] Failed to import ChatOllama, fallback to ChatOpenAI: {e}"
-                )
-                return _get_openai()
-
-            return ChatOllama(
+
+    if model_type == "ollama":
+        chat_ollama = _load_chat_class("ollama")
+        if chat_ollama is not None:
+            return chat_ollama(
                 model=model_name,
                 temperature=temperature,
                 base_url=model_base_url,
                 timeout=timeout,  # 设置超时时间（秒）
             )
 
-        # Qwen 也统一走 OpenAI 协议客户端，避免引入 ChatTongyi 及其 LangSmith/OpenTelemetry 依赖
-        model_map = {
-            "openai": _get_openai,
-            "ollama": _get_ollama,
-        }
-
-        if model_type in model_map:
-            return model_map[model_type]()
-        else:
-            # Should not happen given logic above, but fallback to openai
-            return model_map["openai"]()
+    chat_openai = _load_chat_class("openai")
+    kwargs = dict(
+        model=model_name,
+        temperature=temperature,
+        base_url=model_base_url,
+        api_key=model_api_key or "empty",  # Ensure not None
+        timeout=timeout,  # 设置超时时间（秒）
+    )
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+    return chat_openai(**kwargs)
@@ -3,27 +3,88 @@
 当没有配置在线 embedding 模型时，使用本地 CPU 模式模型作为回退
 """
 
+import asyncio
 import logging
 import os
 import threading
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, List, Optional
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 # 全局锁，用于线程安全的模型初始化
 _lock = threading.Lock()
 _embedding_model: Optional[object] = None
+# 模型发布完成标记，在 _embedding_model 赋值之后置为 True
+_initialized = False
+# 缓存模型的 embed_query 绑定方法，热路径只需一次全局变量读取
+_embed_query_fn: Optional[Callable[[str], List[float]]] = None
 
 # 默认模型配置
 DEFAULT_LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "./models")
 DEFAULT_EMBEDDING_MODEL_ID = os.getenv(
     "DEFAULT_EMBEDDING_MODEL", "shibing624/text2vec-base-chinese"
 )
+# 批量生成 embedding 时每批文本数量
+DEFAULT_EMBED_BATCH_SIZE = 32
+# 是否对本地模型的 Linear 层做 INT8 动态量化（CPU 推理约 2 倍提速，向量会有微小差异）
+EMBED_QUANTIZE = os.getenv("EMBED_QUANTIZE", "0").lower() in ("1", "true", "yes")
+# 本地模型推理后端：torch（默认）或 onnx（ONNX Runtime，需安装 optimum[onnxruntime]）
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+# 本地 embedding 专用线程池大小，避免与数据库、MinIO 等阻塞调用共用默认线程池
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", str(os.cpu_count() or 4)))
+# torch 算子内线程数，未设置时使用 torch 默认值；
+# 并发请求较多时可设为 1，让并行度来自请求级线程，避免线程超额订阅
+EMBED_TORCH_THREADS = os.getenv("EMBED_TORCH_THREADS")
+# 单条文本 embedding 结果的 LRU 缓存容量，设为 0 关闭缓存
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+
+_embed_executor = ThreadPoolExecutor(
+    max_workers=max(1, EMBED_THREADS), thread_name_prefix="embed"
+)
+
+# HuggingFace 缓存目录，固定使用 /tmp/huggingface_cache（容器内可写）
+HF_CACHE_DIR = "/tmp/huggingface_cache"
+
+
+def _setup_hf_environment():
+    """
+    设置 HuggingFace 相关环境变量并创建缓存目录
+
+    与运行时参数无关，在模块导入时执行一次，避免在模型初始化的锁内执行
+    """
+    # 设置环境变量，避免 tokenizers 并行警告
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    # 禁用 HuggingFace Hub 连接，避免网络不可达时的连接错误
+    # 使用离线模式，仅使用本地缓存的模型
+    os.environ["HF_HUB_OFFLINE"] = "1"
+
+    # 设置 HuggingFace 缓存目录到可写位置，避免在只读文件系统中写入错误
+    os.environ["HF_HOME"] = HF_CACHE_DIR
+    os.environ["HF_HUB_CACHE"] = HF_CACHE_DIR  # 设置 Hub 缓存目录
+    os.environ["TRANSFORMERS_CACHE"] = HF_CACHE_DIR
+    os.environ["SENTENCE_TRANSFORMERS_HOME"] = (
+        HF_CACHE_DIR  # Sentence Transformers 缓存目录
+    )
+    # 确保缓存目录存在
+    try:
+        os.makedirs(HF_CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Failed to create HuggingFace cache directory {HF_CACHE_DIR}: {e}")
+
+
+_setup_hf_environment()
 
 
 # 模型会下载到: {LOCAL_MODEL_PATH}/embedding/{model_name}/ 或标准 HuggingFace 缓存目录
+@lru_cache(maxsize=1)
 def _get_local_model_path():
-    """获取本地模型路径，支持多种路径格式"""
+    """获取本地模型路径，支持多种路径格式（输入来自导入时的环境变量，结果缓存）"""
     model_id = DEFAULT_EMBEDDING_MODEL_ID
 
     # 1. 检查 HuggingFace 标准缓存目录结构: models/models--namespace--name/
@@ -35,14 +96,11 @@ def _get_local_model_path():
         # 查找 snapshots 目录下的实际模型路径
         snapshots_dir = os.path.join(hf_cache_path, "snapshots")
         if os.path.exists(snapshots_dir):
-            # 获取第一个快照目录
-            snapshots = [
-                d
-                for d in os.listdir(snapshots_dir)
-                if os.path.isdir(os.path.join(snapshots_dir, d))
-            ]
-            if snapshots:
-                return os.path.join(snapshots_dir, snapshots[0])
+            # 获取第一个快照目录，scandir 直接使用目录项类型，无需逐项 stat
+            with os.scandir(snapshots_dir) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        return os.path.join(snapshots_dir, entry.name)
         return hf_cache_path
 
     # 2. 检查自定义路径: models/embedding/shibing624_text2vec-base-chinese/
@@ -57,6 +115,59 @@ def _get_local_model_path():
     return None
 
 
+def _quantize_embedding_model(model) -> None:
+    """对底层 SentenceTransformer 的 Linear 层做 INT8 动态量化，失败时保持 FP32"""
+    try:
+        import torch
+
+        client = getattr(model, "client", None)
+        if client is None:
+            return
+        model.client = torch.quantization.quantize_dynamic(
+            client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        logger.info("✅ Local embedding model quantized to INT8")
+    except Exception as e:
+        logger.warning(f"INT8 quantization skipped, using FP32 model: {e}")
+
+
+def _apply_torch_threads() -> None:
+    """按 EMBED_TORCH_THREADS 设置 torch 算子内线程数"""
+    if not EMBED_TORCH_THREADS:
+        return
+    try:
+        import torch
+
+        torch.set_num_threads(max(1, int(EMBED_TORCH_THREADS)))
+    except Exception as e:
+        logger.warning(f"Failed to set torch threads: {e}")
+
+
+def _create_onnx_embeddings(embeddings_cls, model_name: str, cache_folder: str):
+    """
+    使用 sentence-transformers 的 ONNX Runtime 后端创建模型，失败时返回 None
+
+    ONNX Runtime 默认启用全部图优化（算子融合、常量折叠等），
+    池化与归一化仍由 sentence-transformers 负责，输出与 torch 后端一致
+    """
+    try:
+        model = embeddings_cls(
+            model_name=model_name,
+            cache_folder=cache_folder,
+            model_kwargs={
+                "device": "cpu",
+                "backend": "onnx",
+                "model_kwargs": {"provider": "CPUExecutionProvider"},
+            },
+            encode_kwargs={"normalize_embeddings": True},
+        )
+        logger.info("✅ Local embedding model loaded with ONNX Runtime backend")
+        return model
+    except Exception as e:
+        logger.warning(f"ONNX Runtime backend unavailable, falling back to torch: {e}")
+        return None
+
+
 def _get_local_embedding_model():
     """
     获取本地 embedding 模型实例（单例模式，线程安全）
@@ -64,42 +175,22 @@ def _get_local_embedding_model():
     Returns:
         Embeddings 实例，如果加载失败则返回 None
     """
-    global _embedding_model
+    global _embedding_model, _embed_query_fn, _initialized
 
-    if _embedding_model is not None:
+    # 快速路径只检查布尔标记，不依赖模型对象的真值语义
+    if _initialized:
         return _embedding_model
 
     with _lock:
         # 双重检查锁定
-        if _embedding_model is not None:
+        if _initialized:
             return _embedding_model
 
         try:
-            # 设置环境变量，避免 tokenizers 并行警告
-            os.environ["TOKENIZERS_PARALLELISM"] = "false"
-
-            # 禁用 HuggingFace Hub 连接，避免网络不可达时的连接错误
-            # 使用离线模式，仅使用本地缓存的模型
-            os.environ["HF_HUB_OFFLINE"] = "1"
-            logger.debug("Set HF_HUB_OFFLINE=1 to disable HuggingFace Hub connections")
-
-            # 设置 HuggingFace 缓存目录到可写位置，避免在只读文件系统中写入错误
-            # 固定使用 /tmp/huggingface_cache 作为缓存目录（容器内可写）
-            cache_dir = "/tmp/huggingface_cache"
-            os.environ["HF_HOME"] = cache_dir
-            os.environ["HF_HUB_CACHE"] = cache_dir  # 设置 Hub 缓存目录
-            os.environ["TRANSFORMERS_CACHE"] = cache_dir
-            os.environ["SENTENCE_TRANSFORMERS_HOME"] = (
-                cache_dir  # Sentence Transformers 缓存目录
-            )
-            # 确保缓存目录存在
-            os.makedirs(cache_dir, exist_ok=True)
-            logger.debug(f"Set HuggingFace cache directory to: {cache_dir}")
-
             # 优先使用本地路径，如果不存在则使用模型 ID（会自动下载）
             local_model_path = _get_local_model_path()
             # 将 cache_folder 设置为可写目录，避免在只读模型目录中写入缓存文件
-            cache_folder = cache_dir
+            cache_folder = HF_CACHE_DIR
             model_id = DEFAULT_EMBEDDING_MODEL_ID
 
             # 检查本地路径是否存在
@@ -152,15 +243,30 @@ def _get_local_embedding_model():
             # - 如果 model_name 是本地路径，直接使用
             # - 如果 model_name 是模型 ID，会自动下载到 cache_folder
             try:
-                _embedding_model = HuggingFaceEmbeddings(
-                    model_name=model_name,
-                    cache_folder=cache_folder,
-                    model_kwargs={"device": "cpu"},
-                    encode_kwargs={"normalize_embeddings": True},
-                )
+                model = None
+                if EMBED_BACKEND == "onnx":
+                    model = _create_onnx_embeddings(
+                        HuggingFaceEmbeddings, model_name, cache_folder
+                    )
 
+                if model is None:
+                    model = HuggingFaceEmbeddings(
+                        model_name=model_name,
+                        cache_folder=cache_folder,
+                        model_kwargs={"device": "cpu"},
+                        encode_kwargs={"normalize_embeddings": True},
+                    )
+                    if EMBED_QUANTIZE:
+                        _quantize_embedding_model(model)
+
+                _apply_torch_threads()
+
+                # 模型完全构建后再发布到全局变量
+                _embed_query_fn = model.embed_query
+                _embedding_model = model
+                _initialized = True
                 logger.info("✅ Local embedding model loaded successfully")
-                return _embedding_model
+                return model
             except ImportError as import_err:
                 # 捕获缺少依赖的错误（如 sentence-transformers）
                 error_msg = str(import_err)
@@ -183,6 +289,46 @@ def _get_local_embedding_model():
             return None
 
 
+def preload_local_embedding_model() -> bool:
+    """
+    仅加载本地模型权重、不执行推理（主进程 fork 前调用，避免继承已启动的算子线程池）
+    :return: 是否加载成功
+    """
+    return _get_local_embedding_model() is not None
+
+
+def _ensure_embed_query_fn() -> Optional[Callable[[str], List[float]]]:
+    """初始化本地模型并返回其 embed_query 绑定方法，加载失败时返回 None"""
+    model = _get_local_embedding_model()
+    if model is None:
+        return None
+    return model.embed_query
+
+
+@lru_cache(maxsize=max(0, EMBED_CACHE_SIZE))
+def _cached_embed(text: str) -> np.ndarray:
+    """
+    按文本缓存 embed_query 结果，重复文本无需再次前向计算
+
+    以只读的连续 float32 数组存储，内存约为 Python float 列表的 1/7，
+    需要列表时在序列化边界通过 tolist() 转换（模型输出本身即为 float32，转换无损）
+    """
+    vec = np.asarray(_embed_query_fn(text), dtype=np.float32)
+    vec.flags.writeable = False
+    return vec
+
+
+def _safe_embed(text: str) -> Optional[np.ndarray]:
+    """生成（或从缓存读取）embedding 数组，异常时记录日志并返回 None"""
+    try:
+        return _cached_embed(text)
+    except Exception as e:
+        logger.error(
+            f"Failed to generate embedding with local model: {e}", exc_info=True
+        )
+        return None
+
+
 async def generate_embedding_local(text: str) -> Optional[List[float]]:
     """
     使用本地模型生成 embedding（异步包装）
@@ -196,18 +342,15 @@ async def generate_embedding_local(text: str) -> Optional[List[float]]:
     if not text:
         return None
 
-    model = _get_local_embedding_model()
-    if not model:
+    if (_embed_query_fn or _ensure_embed_query_fn()) is None:
         logger.warning("Local embedding model not available")
         return None
 
     try:
         # embed_query 是同步方法，在异步环境中需要在线程池中执行
-        import asyncio
-
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(None, model.embed_query, text)
-        return embedding
+        loop = asyncio.get_running_loop()
+        embedding = await loop.run_in_executor(_embed_executor, _cached_embed, text)
+        return embedding.tolist()
     except Exception as e:
         logger.error(
             f"Failed to generate embedding with local model: {e}", exc_info=True
@@ -228,17 +371,113 @@ def generate_embedding_local_sync(text: str) -> Optional[List[float]]:
     if not text:
         return None
 
+    embedding = generate_embedding_local_array_sync(text)
+    if embedding is None:
+        return None
+    return embedding.tolist()
+
+
+def generate_embedding_local_array_sync(text: str) -> Optional[np.ndarray]:
+    """
+    使用本地模型生成 embedding（同步版本，返回只读 float32 数组）
+
+    供直接做向量计算的调用方使用，避免 list 与数组之间的来回转换
+
+    Args:
+        text: 要生成 embedding 的文本
+
+    Returns:
+        一维 float32 数组（只读），如果失败则返回 None
+    """
+    if not text:
+        return None
+
+    if (_embed_query_fn or _ensure_embed_query_fn()) is None:
+        logger.warning("Local embedding model not available")
+        return None
+
+    return _safe_embed(text)
+
+
+def _iter_text_batches(texts: List[str], batch_size: int):
+    """按 batch_size 切分文本列表"""
+    it = iter(texts)
+    while True:
+        chunk = list(islice(it, max(1, batch_size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def generate_embeddings_local_batch(
+    texts: List[str], batch_size: int = DEFAULT_EMBED_BATCH_SIZE
+) -> Optional[List[List[float]]]:
+    """
+    使用本地模型批量生成 embedding（异步包装）
+
+    每批调用一次 embed_documents，由模型在一次前向计算中处理整批文本，
+    避免逐条调用 embed_query 的额外开销
+
+    Args:
+        texts: 要生成 embedding 的文本列表
+        batch_size: 每批文本数量
+
+    Returns:
+        与 texts 顺序一致的 embedding 向量列表，如果失败则返回 None
+    """
+    if not texts:
+        return []
+
     model = _get_local_embedding_model()
-    if not model:
+    if model is None:
         logger.warning("Local embedding model not available")
         return None
 
     try:
-        embedding = model.embed_query(text)
-        return embedding
+        loop = asyncio.get_running_loop()
+        embeddings: List[List[float]] = []
+        for chunk in _iter_text_batches(texts, batch_size):
+            embeddings.extend(
+                await loop.run_in_executor(
+                    _embed_executor, model.embed_documents, chunk
+                )
+            )
+        return embeddings
     except Exception as e:
         logger.error(
-            f"Failed to generate embedding with local model: {e}", exc_info=True
+            f"Failed to generate batch embeddings with local model: {e}", exc_info=True
         )
         return None
+
+
+def generate_embeddings_local_batch_sync(
+    texts: List[str], batch_size: int = DEFAULT_EMBED_BATCH_SIZE
+) -> Optional[List[List[float]]]:
+    """
+    使用本地模型批量生成 embedding（同步版本）
+
+    Args:
+        texts: 要生成 embedding 的文本列表
+        batch_size: 每批文本数量
+
+    Returns:
+        与 texts 顺序一致的 embedding 向量列表，如果失败则返回 None
+    """
+    if not texts:
+        return []
+
+    model = _get_local_embedding_model()
+    if model is None:
+        logger.warning("Local embedding model not available")
+        return None
+
+    try:
+        embeddings: List[List[float]] = []
+        for chunk in _iter_text_batches(texts, batch_size):
+            embeddings.extend(model.embed_documents(chunk))
+        return embeddings
+    except Exception as e:
+        logger.error(
+            f"Failed to generate batch embeddings with local model: {e}", exc_info=True
+        )
         return None
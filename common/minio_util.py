@@ -4,7 +4,10 @@ import json
 import logging
 import mimetypes
 import os
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from datetime import timedelta
 from uuid import uuid4
 
@@ -12,6 +15,7 @@ import pandas as pd
 import pymupdf
 import pymupdf4llm
 import requests
+import urllib3
 from docx import Document
 from minio import Minio, S3Error
 from sanic import Request
@@ -21,6 +25,28 @@ from constants.code_enum import SysCodeEnum as SysCode
 
 logger = logging.getLogger(__name__)
 
+# 预签名 URL 缓存：有效期 7 天，缓存 1 小时内重复请求直接复用，避免重复签名与区域查询
+PRESIGNED_URL_CACHE_TTL = int(os.getenv("MINIO_PRESIGNED_URL_CACHE_TTL", "3600"))
+PRESIGNED_URL_CACHE_SIZE = 1024
+_presigned_url_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_presigned_url_lock = threading.Lock()
+
+# 进程内共享的 MinIO 客户端与 urllib3 连接池：各处 MinioUtils() 复用同一组长连接和 bucket 区域缓存
+MINIO_POOL_MAXSIZE = int(os.getenv("MINIO_POOL_MAXSIZE", "32"))
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def _reset_shared_client():
+    """fork 出的子进程丢弃继承的客户端，避免多个进程在同一条 keep-alive 连接上交错读写"""
+    global _shared_client, _shared_client_lock
+    _shared_client = None
+    _shared_client_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_shared_client)
+
 
 class MinioUtils:
     """
@@ -33,16 +59,30 @@ class MinioUtils:
 
     @staticmethod
     def _build_client():
-        """初始化MinIO客户端（内置默认值，开箱即用）"""
-        minio_endpoint = os.getenv("MINIO_ENDPOINT", "127.0.0.1:9000")
-        access_key = os.getenv("MINIO_ACCESS_KEY", "admin")
-        secret_key = os.getenv("MINIO_SECRET_KEY", "admin123")
-        return Minio(
-            endpoint=minio_endpoint,
-            access_key=access_key,
-            secret_key=secret_key,
-            secure=False,
-        )
+        """初始化MinIO客户端（内置默认值，开箱即用），进程内只创建一次"""
+        global _shared_client
+        if _shared_client is not None:
+            return _shared_client
+        with _shared_client_lock:
+            if _shared_client is None:
+                minio_endpoint = os.getenv("MINIO_ENDPOINT", "127.0.0.1:9000")
+                access_key = os.getenv("MINIO_ACCESS_KEY", "admin")
+                secret_key = os.getenv("MINIO_SECRET_KEY", "admin123")
+                http_client = urllib3.PoolManager(
+                    num_pools=4,
+                    maxsize=MINIO_POOL_MAXSIZE,
+                    block=False,
+                    timeout=urllib3.Timeout(connect=10, read=300),
+                    retries=urllib3.Retry(total=2, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+                )
+                _shared_client = Minio(
+                    endpoint=minio_endpoint,
+                    access_key=access_key,
+                    secret_key=secret_key,
+                    secure=False,
+                    http_client=http_client,
+                )
+        return _shared_client
 
     def ensure_bucket(self, bucket_name: str, public: bool = True) -> None:
         """确保bucket存在，不存在则创建，并设置为public（如果指定）"""
@@ -176,11 +216,26 @@ class MinioUtils:
         try:
             if not object_key:
                 raise MyException(SysCode.c_9999, "object_key不能为空")
-            return self.client.presigned_get_object(
+
+            cache_key = (bucket_name, object_key)
+            now = time.monotonic()
+            with _presigned_url_lock:
+                cached = _presigned_url_cache.get(cache_key)
+                if cached is not None and cached[0] > now:
+                    _presigned_url_cache.move_to_end(cache_key)
+                    return cached[1]
+
+            url = self.client.presigned_get_object(
                 bucket_name=bucket_name,
                 object_name=object_key,
                 expires=timedelta(days=7),
             )
+            with _presigned_url_lock:
+                _presigned_url_cache[cache_key] = (now + PRESIGNED_URL_CACHE_TTL, url)
+                _presigned_url_cache.move_to_end(cache_key)
+                if len(_presigned_url_cache) > PRESIGNED_URL_CACHE_SIZE:
+                    _presigned_url_cache.popitem(last=False)
+            return url
         except Exception as err:
             logger.error(f"Error getting file URL by key: {err}")
             traceback.print_exception(err)
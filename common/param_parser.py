@@ -30,45 +30,21 @@ def parse_params(handler):
         # name 是可选参数
         pass
     """
+    # 函数签名与类型注解在装饰时解析一次，避免每次请求重复反射
+    param_specs = _build_param_specs(handler)
+
     @wraps(handler)
     async def wrapper(request: Request, *args, **kwargs):
-        # 获取函数签名
-        sig = signature(handler)
-        type_hints = get_type_hints(handler)
-        
         # 解析参数
         parsed_kwargs = {}
-        
-        for param_name, param in sig.parameters.items():
-            # 跳过 request 参数
-            if param_name == 'request':
-                continue
-            
+
+        for param_name, actual_type, is_model, default_value, required in param_specs:
             # 跳过已经传入的参数
             if param_name in kwargs:
                 continue
-            
-            # 获取参数类型
-            param_type = type_hints.get(param_name, str)
-            
-            # 通过类型判断是否为 Request 对象
-            if param_type is Request or (isinstance(param_type, type) and issubclass(param_type, Request)):
-                continue
-            
-            # 检查是否是 Optional 类型
-            is_optional = get_origin(param_type) is type(Optional[int])
-            if is_optional:
-                actual_type = get_args(param_type)[0]
-            else:
-                actual_type = param_type
-            
-            # 获取默认值
-            has_default = param.default != Parameter.empty
-            default_value = param.default if has_default else None
-            required = not has_default and not is_optional
-            
+
             # 判断参数来源并解析
-            if isinstance(actual_type, type) and issubclass(actual_type, BaseModel):
+            if is_model:
                 # Pydantic 模型，从请求体解析
                 parsed_kwargs[param_name] = _parse_body(request, actual_type, required)
             else:
@@ -86,6 +62,46 @@ def parse_params(handler):
     return wrapper
 
 
+def _build_param_specs(handler) -> list:
+    """
+    根据函数签名生成参数解析规格列表
+
+    :return: [(参数名, 实际类型, 是否为 Pydantic 模型, 默认值, 是否必填), ...]
+    """
+    # 获取函数签名
+    sig = signature(handler)
+    type_hints = get_type_hints(handler)
+
+    specs = []
+    for param_name, param in sig.parameters.items():
+        # 跳过 request 参数
+        if param_name == 'request':
+            continue
+
+        # 获取参数类型
+        param_type = type_hints.get(param_name, str)
+
+        # 通过类型判断是否为 Request 对象
+        if param_type is Request or (isinstance(param_type, type) and issubclass(param_type, Request)):
+            continue
+
+        # 检查是否是 Optional 类型
+        is_optional = get_origin(param_type) is type(Optional[int])
+        if is_optional:
+            actual_type = get_args(param_type)[0]
+        else:
+            actual_type = param_type
+
+        # 获取默认值
+        has_default = param.default != Parameter.empty
+        default_value = param.default if has_default else None
+        required = not has_default and not is_optional
+
+        is_model = isinstance(actual_type, type) and issubclass(actual_type, BaseModel)
+        specs.append((param_name, actual_type, is_model, default_value, required))
+    return specs
+
+
 def _parse_body(request: Request, model: Type[BaseModel], required: bool = True) -> Optional[BaseModel]:
     """解析请求体为 Pydantic 模型"""
     try:
@@ -1,5 +1,7 @@
+import asyncio
 import json
 import logging
+import os
 import traceback
 from datetime import date, datetime
 from decimal import Decimal
@@ -8,10 +10,16 @@ from functools import wraps
 import numpy as np
 from pydantic import BaseModel
 from sanic import response
+from sanic.response import ResponseStream
 
 from common.exception import MyException
 from constants.code_enum import SysCodeEnum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class CustomJSONEncoder(json.JSONEncoder):
     """
@@ -57,6 +65,127 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+_json_encoder = CustomJSONEncoder()
+
+# orjson 选项：日期交由 CustomJSONEncoder.default 按原格式输出，允许非字符串键
+_ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def json_dumps(obj) -> bytes | str:
+    """
+    序列化响应体：优先使用 orjson（直接输出 UTF-8 字节），类型转换规则与 CustomJSONEncoder 一致；
+    orjson 不支持的情况（如超出 64 位的整数）回退到标准库
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_json_encoder.default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass
+    return _json_encoder.encode(obj)
+
+
+# SSE 长连接准入控制：每个 worker 同时进行的流式响应数上限，超出时排队等待空位
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "64"))
+# 排队等待名额的最长时间（秒），超时返回 503
+SSE_QUEUE_TIMEOUT = float(os.getenv("SSE_QUEUE_TIMEOUT", "30"))
+_sse_active = 0
+_sse_cond = None
+
+# 服务停止时需要主动结束的 SSE 任务
+_sse_tasks: set = set()
+_sse_shutting_down = False
+SSE_CLOSE_EVENT = "event: close\n\n"
+
+
+def _get_sse_cond() -> asyncio.Condition:
+    """延迟创建条件变量，确保绑定到 worker 的事件循环"""
+    global _sse_cond
+    if _sse_cond is None:
+        _sse_cond = asyncio.Condition()
+    return _sse_cond
+
+
+async def acquire_sse_slot(timeout: float = SSE_QUEUE_TIMEOUT) -> bool:
+    """等待并占用一个 SSE 流式响应名额，超时未获得返回 False"""
+    global _sse_active
+    cond = _get_sse_cond()
+    async with cond:
+        try:
+            await asyncio.wait_for(cond.wait_for(lambda: _sse_active < SSE_MAX_STREAMS), timeout)
+        except asyncio.TimeoutError:
+            # 超时时可能恰好收到了释放通知，转交给下一个等待者
+            cond.notify(1)
+            return False
+        _sse_active += 1
+        return True
+
+
+async def release_sse_slot():
+    """释放 SSE 流式响应名额并唤醒一个等待者"""
+    global _sse_active
+    cond = _get_sse_cond()
+    async with cond:
+        _sse_active -= 1
+        cond.notify(1)
+
+
+def close_sse_streams() -> int:
+    """
+    服务停止时取消所有进行中的 SSE 流，使其发送结束事件后退出，而不是等待超时后被强制断开
+    :return: 被取消的流数量
+    """
+    global _sse_shutting_down
+    _sse_shutting_down = True
+    tasks = [task for task in _sse_tasks if not task.done()]
+    for task in tasks:
+        task.cancel()
+    return len(tasks)
+
+
+class SSEResponseStream(ResponseStream):
+    """
+    SSE 流式响应：每次写出后让出事件循环，使分片及时下发而不是攒批发送；
+    默认附带禁止缓存/代理缓冲的响应头，并受 SSE_MAX_STREAMS 准入控制
+    """
+
+    __slots__ = ()
+
+    def __init__(self, streaming_fn, status: int = 200, headers=None, content_type: str = "text/event-stream"):
+        sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        if headers:
+            sse_headers.update(headers)
+        super().__init__(streaming_fn, status=status, headers=sse_headers, content_type=content_type)
+
+    async def stream(self):
+        if not await acquire_sse_slot():
+            logging.warning(f"SSE 并发已达上限（{SSE_MAX_STREAMS}），排队超过 {SSE_QUEUE_TIMEOUT}s，返回 503")
+            self.response = await self.request.respond(
+                status=503, headers={"Retry-After": "5"}, content_type="application/json"
+            )
+            await self.response.send(json_dumps({"code": 503, "msg": "服务繁忙，请稍后重试", "data": None}))
+            return self.response
+        task = asyncio.current_task()
+        _sse_tasks.add(task)
+        try:
+            return await super().stream()
+        except asyncio.CancelledError:
+            # 服务停止导致的取消：尽量通知客户端流已结束（无 data 行，前端解析时会忽略）
+            http_response = getattr(self, "response", None)
+            if _sse_shutting_down and http_response is not None:
+                try:
+                    await http_response.send(SSE_CLOSE_EVENT)
+                except Exception:
+                    pass
+            raise
+        finally:
+            _sse_tasks.discard(task)
+            await release_sse_slot()
+
+    async def write(self, message: str):
+        await self.response.send(message)
+        await asyncio.sleep(0)
+
+
 def async_json_resp(func):
     """
     Decorator for asynchronous json response
@@ -90,7 +219,7 @@ def async_json_resp(func):
                 "msg": SysCodeEnum.c_200.value[1],
                 "data": data,
             }
-            res = response.json(body, dumps=CustomJSONEncoder().encode)
+            res = response.json(body, dumps=json_dumps)
 
             # 验证日志配置
             root_logger = logging.getLogger()
@@ -108,7 +237,7 @@ def async_json_resp(func):
                 "data": data,
             }
 
-            res = response.json(body, dumps=CustomJSONEncoder().encode)
+            res = response.json(body, dumps=json_dumps)
 
             # 验证日志配置
             root_logger = logging.getLogger()
@@ -124,7 +253,7 @@ def async_json_resp(func):
                 "msg": SysCodeEnum.c_9999.value[1],
                 "data": data,
             }
-            res = response.json(body, dumps=CustomJSONEncoder().encode)
+            res = response.json(body, dumps=json_dumps)
 
             # 验证日志配置
             root_logger = logging.getLogger()
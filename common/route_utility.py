@@ -1,5 +1,5 @@
 from glob import glob
-import importlib.util
+import importlib
 import inspect
 import os
 from pathlib import Path
@@ -9,6 +9,17 @@ from typing import Union
 from sanic.blueprints import Blueprint
 
 
+def _import_by_path(package: ModuleType, base: Path, path: str) -> ModuleType:
+    """
+    按包内的点分模块名导入文件，模块登记在 sys.modules 中，已导入过的模块（如主进程预加载后 fork）直接复用
+    """
+    relative = Path(path).relative_to(base).with_suffix("")
+    parts = list(relative.parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return importlib.import_module(".".join([package.__name__, *parts]))
+
+
 def autodiscover(app, *module_names: Union[str, ModuleType], recursive: bool = False):
     """
     自动扫描目录添加蓝图/路由信息
@@ -38,14 +49,8 @@ def autodiscover(app, *module_names: Union[str, ModuleType], recursive: bool = F
             pattern = os.path.join(base, "**", "*.py")
             for path in glob(pattern, recursive=True):
                 if path not in _imported:
-                    name = "module"
-                    if "__init__.py" in path:
-                        *_, name, _ = path.split(os.sep)  # 使用os.sep作为路径分隔符
-                    spec = importlib.util.spec_from_file_location(name, path)
-                    speckled = importlib.util.module_from_spec(spec)
                     _imported.add(path)
-                    spec.loader.exec_module(speckled)
-                    _find_bps(speckled)
+                    _find_bps(_import_by_path(module, base, path))
 
     for bp in blueprints:
         app.blueprint(bp)
@@ -1,10 +1,62 @@
+import hashlib
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 
 import jwt
 from sanic import response
 
+# 已校验 token 的 payload 缓存，避免同一 token 在每个请求中重复做签名校验
+# 缓存时间不超过 token 剩余有效期
+JWT_CACHE_TTL = int(os.getenv("JWT_CACHE_TTL", "30"))
+JWT_CACHE_SIZE = 10000
+_jwt_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_jwt_cache_lock = threading.Lock()
+
+
+def _token_cache_key(token: str) -> bytes:
+    """缓存键使用 token 的 sha256 摘要，不在内存中保留 token 原文"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def decode_token(token: str) -> dict:
+    """
+    校验并解析 JWT token，成功结果按 token 缓存
+
+    :param token: 不带 Bearer 前缀的 token
+    :return: payload 字典（副本，可自由修改）
+    :raises jwt.ExpiredSignatureError: token 已过期
+    :raises jwt.InvalidTokenError: token 无效
+    """
+    key = _token_cache_key(token)
+    now = time.monotonic()
+    with _jwt_cache_lock:
+        cached = _jwt_cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                _jwt_cache.move_to_end(key)
+                return dict(cached[1])
+            del _jwt_cache[key]
+
+    payload = jwt.decode(token, key=os.getenv("JWT_SECRET_KEY", "550e8400-e29b-41d4-a716-446655440000"), algorithms=["HS256"])
+    # 检查 token 是否过期
+    ttl = JWT_CACHE_TTL
+    if "exp" in payload:
+        remaining = payload["exp"] - time.time()
+        if remaining < 0:
+            raise jwt.ExpiredSignatureError("Token has expired")
+        ttl = min(ttl, remaining)
+
+    if ttl > 0:
+        with _jwt_cache_lock:
+            _jwt_cache[key] = (now + ttl, payload)
+            _jwt_cache.move_to_end(key)
+            if len(_jwt_cache) > JWT_CACHE_SIZE:
+                _jwt_cache.popitem(last=False)
+    return dict(payload)
+
 
 def check_token(f):
     """
@@ -21,11 +73,8 @@ def check_token(f):
             if token.startswith("Bearer "):
                 token = token.split(" ")[1]
 
-            # 解码 JWT token
-            payload = jwt.decode(token, key=os.getenv("JWT_SECRET_KEY", "550e8400-e29b-41d4-a716-446655440000"), algorithms=["HS256"])
-            # 检查 token 是否过期
-            if "exp" in payload and datetime.utcfromtimestamp(payload["exp"]) < datetime.utcnow():
-                return response.json({"message": "Token已过期", "code": 401}, status=401)
+            # 解码 JWT token（含过期检查，结果带缓存）
+            payload = decode_token(token)
 
             request.ctx.user_payload = payload
         except jwt.ExpiredSignatureError as e:
@@ -1,10 +1,20 @@
+import atexit
 import logging
 import logging.config
 import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 from dotenv import load_dotenv
 
+# 异步日志：业务线程只把日志记录放入队列，由后台监听线程写控制台/文件，避免事件循环阻塞在 I/O 上
+_queue_listener = None
+_listener_pid = None
+
+# .env 文件是否已在本进程加载
+_dotenv_loaded = False
+
 
 def load_env():
     """
@@ -130,7 +140,51 @@ def load_env():
         )
         logging.warning(f"Failed to load logging.conf: {e}, using basicConfig instead")
 
-    # 根据环境变量 ENV 的值选择加载哪个 .env 文件
-    dotenv_path = f'.env.{os.getenv("ENV","dev")}'
-    logging.info(f"""====当前配置文件是:{dotenv_path}====""")
-    load_dotenv(dotenv_path)
+    # 根据环境变量 ENV 的值选择加载哪个 .env 文件（每个进程只解析一次，重复调用仅重新加载日志配置）
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        dotenv_path = f'.env.{os.getenv("ENV","dev")}'
+        logging.info(f"""====当前配置文件是:{dotenv_path}====""")
+        load_dotenv(dotenv_path)
+        _dotenv_loaded = True
+
+    if os.getenv("LOG_QUEUE_ENABLED", "true").lower() in ("1", "true", "yes"):
+        enable_queue_logging()
+
+
+def enable_queue_logging():
+    """
+    将 root logger 的 handlers 挪到后台 QueueListener 线程中执行，root 只保留一个 QueueHandler
+
+    可重复调用：本进程已启用时直接返回；fork 出的子进程没有监听线程，会换新队列并重新启动监听
+    """
+    global _queue_listener, _listener_pid
+
+    root_logger = logging.getLogger()
+    queue_handler = next((h for h in root_logger.handlers if isinstance(h, QueueHandler)), None)
+    if queue_handler is not None and _listener_pid == os.getpid():
+        return
+
+    if queue_handler is None:
+        handlers = root_logger.handlers[:]
+        if not handlers:
+            return
+        if _queue_listener is not None and _listener_pid == os.getpid():
+            # 日志配置被重新加载，旧监听线程的 handlers 已失效
+            _queue_listener.stop()
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(queue_handler)
+    else:
+        handlers = list(_queue_listener.handlers)
+        queue_handler.queue = queue.SimpleQueue()
+
+    # 格式中未使用线程名/进程名，跳过采集
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+
+    _queue_listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(_queue_listener.stop)
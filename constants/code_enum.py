@@ -10,7 +10,7 @@ class SysCodeEnum(Enum):
 
     c_401 = (401, "登录异常", "登录异常")
 
-    c_400 = (401, "无效Token", "无效Token")
+    c_400 = (400, "无效Token", "无效Token")
 
     c_9999 = (9999, "系统异常", "系统异常")
 
@@ -35,6 +35,10 @@ class IntentEnum(Enum):
     REPORT_QA = ("REPORT_QA", "深度搜索")
 
 
+# 枚举成员名称 -> 中文名称，导入时预先计算
+_QATYPE_NAME = {member.name: member.value[1] for member in IntentEnum}
+
+
 def get_qatype_name(member_name):
     """
     根据IntentEnum枚举成员名称获取对应的中文名称
@@ -43,8 +47,7 @@ def get_qatype_name(member_name):
     :return: 对应的中文名称字符串
     """
     try:
-        enum_member = IntentEnum[member_name]
-        return enum_member.value[1]
+        return _QATYPE_NAME[member_name]
     except KeyError:
         raise ValueError(f"'{member_name}' 不是有效的IntentEnum枚举成员")
 
@@ -4,11 +4,10 @@
 import logging
 from sanic import Blueprint, Request
 from sanic_ext import openapi
-from sanic.response import ResponseStream
 import json
 import asyncio
 
-from common.res_decorator import async_json_resp
+from common.res_decorator import SSEResponseStream, async_json_resp
 from common.token_decorator import check_token
 from common.param_parser import parse_params
 from services.embedding_migration_service import (
@@ -115,7 +114,7 @@ async def recalculate_embeddings(request: Request):
             }
             await response.write(f"data: {json.dumps(error_data)}\n\n")
     
-    return ResponseStream(stream_fn, content_type="text/event-stream")
+    return SSEResponseStream(stream_fn)
 
 
 @bp.post("/recalculate-sync")
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Optional
 
@@ -70,10 +71,10 @@ async def read_file(request: Request, file_qa_str: Optional[str] = None, body: O
     if not file_key and body:
         file_key = body.file_qa_str
 
-    file_key = file_key.split("|")[0]  # 取文档地址
+    file_key = file_key.partition("|")[0]  # 取文档地址
 
-    file_url = minio_utils.get_file_url_by_key(object_key=file_key)
-    result = await read_excel(file_url)
+    file_url = await asyncio.to_thread(minio_utils.get_file_url_by_key, object_key=file_key)
+    result = await read_excel(file_url, nrows=1)
     return result
 
 
@@ -120,9 +121,9 @@ async def read_file_column(req: Request, file_qa_str: Optional[str] = None, body
     if not file_key and body:
         file_key = body.file_qa_str
 
-    file_key = file_key.split("|")[0]  # 取文档地址
+    file_key = file_key.partition("|")[0]  # 取文档地址
 
-    file_url = minio_utils.get_file_url_by_key(object_key=file_key)
+    file_url = await asyncio.to_thread(minio_utils.get_file_url_by_key, object_key=file_key)
     result = await read_file_columns(file_url)
     return result
 
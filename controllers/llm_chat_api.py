@@ -1,11 +1,10 @@
 import logging
 
 from sanic import Blueprint, Request
-from sanic.response import ResponseStream
 from sanic_ext import openapi
 
 from common.exception import MyException
-from common.res_decorator import async_json_resp
+from common.res_decorator import SSEResponseStream, async_json_resp
 from common.token_decorator import check_token
 from constants.code_enum import SysCodeEnum
 from common.param_parser import parse_params
@@ -98,7 +97,7 @@ async def get_answer(req: Request, body: LLMGetAnswerRequest):
         async def stream_fn(response):
             await llm.exec_query(response, req_obj=req_dict, token=token)
 
-        response = ResponseStream(stream_fn, content_type="text/event-stream")
+        response = SSEResponseStream(stream_fn)
         return response
     except MyException:
         # 权限异常直接抛出，由异常处理器返回 JSON 响应
@@ -138,7 +137,7 @@ async def resume_chat(req: Request, body: ResumeChatRequest):
             user_token=token,
         )
 
-    response = ResponseStream(stream_fn, content_type="text/event-stream")
+    response = SSEResponseStream(stream_fn)
     return response
 
 
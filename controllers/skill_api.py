@@ -13,10 +13,9 @@ import json
 import logging
 
 from sanic import Blueprint, Request
-from sanic.response import ResponseStream
 from sanic_ext import openapi
 
-from common.res_decorator import async_json_resp
+from common.res_decorator import SSEResponseStream, async_json_resp
 from common.token_decorator import check_token
 from common.llm_util import get_llm
 from model.schemas import BaseResponse, get_schema
@@ -396,4 +395,4 @@ async def get_skill_tutorial(request: Request):
             error_data = json.dumps({"error": f"AI 生成教程失败: {str(e)}"})
             await response.write(f"data: {error_data}\n\n")
 
-    return ResponseStream(stream_fn, content_type="text/event-stream")
+    return SSEResponseStream(stream_fn)
@@ -129,7 +129,7 @@ async def query_user_qa_record(request: Request, body: QueryUserRecordRequest):
     search_text = body.search_text
     chat_id = body.chat_id
     user_info = await get_user_info(request)
-    return await query_user_record(user_info["id"], page, limit, search_text, chat_id)
+    return await query_user_record(user_info["id"], page, limit, search_text, chat_id, body.cursor)
 
 
 @bp.post("/query_user_record_list", name="query_user_record_list")
@@ -138,6 +138,14 @@ COMMENT ON COLUMN t_user_qa_record.file_key IS '文件minio/key';
 COMMENT ON COLUMN t_user_qa_record.sql_statement IS 'SQL语句（数据问答时保存）';
 COMMENT ON COLUMN t_user_qa_record.create_time IS '创建时间';
 
+CREATE INDEX IF NOT EXISTS ix_qa_user_id ON t_user_qa_record (user_id, id);
+CREATE INDEX IF NOT EXISTS ix_qa_user_chat ON t_user_qa_record (user_id, chat_id, id);
+CREATE INDEX IF NOT EXISTS ix_qa_chat_id ON t_user_qa_record (chat_id, id);
+
+-- 答案/业务数据等大文本列使用 lz4 压缩（PostgreSQL 14+），TOAST 解压比默认 pglz 更快
+ALTER TABLE t_user_qa_record ALTER COLUMN to2_answer SET COMPRESSION lz4;
+ALTER TABLE t_user_qa_record ALTER COLUMN to4_answer SET COMPRESSION lz4;
+
 -- t_ai_model definition
 DROP TABLE IF EXISTS t_ai_model CASCADE;
 CREATE TABLE t_ai_model (
@@ -165,6 +173,9 @@ COMMENT ON COLUMN t_ai_model.api_key IS 'API Key';
 COMMENT ON COLUMN t_ai_model.api_domain IS 'API Domain';
 COMMENT ON COLUMN t_ai_model.protocol IS '协议: 1:OpenAI, 2:Ollama';
 COMMENT ON COLUMN t_ai_model.config IS '配置JSON';
+
+-- 配置 JSON 使用 lz4 压缩（PostgreSQL 14+）
+ALTER TABLE t_ai_model ALTER COLUMN config SET COMPRESSION lz4;
 COMMENT ON COLUMN t_ai_model.status IS '状态: 1:正常';
 COMMENT ON COLUMN t_ai_model.create_time IS '创建时间';
 
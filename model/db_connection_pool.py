@@ -4,15 +4,33 @@
 
 import logging
 import os
+import threading
 import traceback
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 logger = logging.getLogger(__name__)
 
+# 同步驱动 -> 异步驱动映射（异步引擎供事件循环中的查询使用，避免阻塞 worker）
+# PostgreSQL 使用 psycopg 3 的异步模式（已是项目依赖）
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg_async",
+}
+
+# 连接池容量（每个 worker 进程独立持有）：
+# 单个 worker 最多占用 DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE 个数据库连接（默认 10 + 20 + 5 = 35），
+# 总连接数约为 该值 × SERVER_WORKERS，需小于数据库 max_connections（PostgreSQL 默认 100）
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "5"))
+
 
 class Base(DeclarativeBase):
     pass
@@ -42,8 +60,8 @@ class DBConnectionPool:
 
             self.engine = create_engine(
                 database_uri,
-                pool_size=10,  # 连接池大小
-                max_overflow=20,  # 连接池最大溢出大小
+                pool_size=DB_POOL_SIZE,  # 连接池大小
+                max_overflow=DB_MAX_OVERFLOW,  # 连接池最大溢出大小
                 pool_recycle=3600,  # 连接回收时间（秒），避免长时间连接失效
                 pool_timeout=30,  # 连接池等待超时时间（秒）
                 pool_pre_ping=True,  # 启用连接预检测，确保连接有效性
@@ -51,6 +69,11 @@ class DBConnectionPool:
             )
             self.SessionLocal = sessionmaker(bind=self.engine)
             self.Base = Base
+            self._database_uri = database_uri
+            self._async_engine = None
+            self._async_session_factory = None
+            self._async_init_done = False
+            self._async_lock = threading.Lock()
             DBConnectionPool._initialized = True
 
             logger.info("Database connection pool initialized.")
@@ -77,6 +100,62 @@ class DBConnectionPool:
         finally:
             session.close()
 
+    def _init_async_engine(self) -> None:
+        """按需创建异步引擎，数据库类型不支持或驱动缺失时保持为 None"""
+        with self._async_lock:
+            if self._async_init_done:
+                return
+            try:
+                url = make_url(self._database_uri)
+                driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+                if driver:
+                    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+                    self._async_engine = create_async_engine(
+                        url.set(drivername=driver),
+                        pool_size=DB_ASYNC_POOL_SIZE,  # 连接池大小（计入每个 worker 的连接总数）
+                        max_overflow=0,  # 不允许溢出，限制并发连接数
+                        pool_recycle=3600,
+                        pool_timeout=30,
+                        pool_pre_ping=True,
+                        echo=False,
+                    )
+                    self._async_session_factory = async_sessionmaker(self._async_engine, expire_on_commit=False)
+                    logger.info("Async database engine initialized.")
+            except Exception as e:
+                logger.warning(f"Async database engine unavailable, falling back to sync sessions: {e}")
+                self._async_engine = None
+                self._async_session_factory = None
+            finally:
+                self._async_init_done = True
+
+    def has_async_engine(self) -> bool:
+        """是否可以使用异步会话"""
+        if not self._async_init_done:
+            self._init_async_engine()
+        return self._async_session_factory is not None
+
+    @asynccontextmanager
+    async def get_async_session(self) -> AsyncGenerator["AsyncSession", None]:
+        """
+        获取异步数据库会话的上下文管理器（调用前应先确认 has_async_engine()）
+        用法:
+        async with db_pool.get_async_session() as session:
+            result = await session.execute(...)
+        """
+        if not self.has_async_engine():
+            raise RuntimeError("Async database engine is not available")
+        session = self._async_session_factory()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Async session error: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
     def get_engine(self):
         """
         获取数据库引擎
@@ -5,6 +5,7 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Float,
+    Index,
     Integer,
     String,
     TIMESTAMP,
@@ -37,7 +38,15 @@ class TUser(Base):
 
 class TUserQaRecord(Base):
     __tablename__ = "t_user_qa_record"
-    __table_args__ = {"comment": "问答记录表"}
+    __table_args__ = (
+        # 按用户 + id 做游标分页
+        Index("ix_qa_user_id", "user_id", "id"),
+        # 按用户 + 对话查询、删除，以及按 chat_id 分组取最小 id
+        Index("ix_qa_user_chat", "user_id", "chat_id", "id"),
+        # 按 chat_id 查询对话记录（历史记录、MCP 查询）
+        Index("ix_qa_chat_id", "chat_id", "id"),
+        {"comment": "问答记录表"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     user_id: Mapped[Optional[int]] = mapped_column(Integer, comment="用户id")
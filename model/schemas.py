@@ -3,13 +3,28 @@ API 请求和响应 Schema 定义
 用于 Swagger 文档生成
 """
 
+from functools import lru_cache
 from typing import Any, Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, Field
 
 
+def _clone(obj):
+    """复制只包含 dict/list/基本类型的 JSON 结构，比 copy.deepcopy 快得多"""
+    if isinstance(obj, dict):
+        return {k: _clone(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_clone(v) for v in obj]
+    return obj
+
+
+@lru_cache(maxsize=None)
 def get_schema(model: type[BaseModel]) -> dict:
-    """将 Pydantic 模型转换为 OpenAPI schema，并展开所有 $defs 引用"""
+    """
+    将 Pydantic 模型转换为 OpenAPI schema，并展开所有 $defs 引用
+
+    结果按模型类缓存，多个接口共用同一个 dict，调用方不要修改返回值
+    """
     schema = model.model_json_schema()
 
     # 如果存在 $defs，需要展开所有引用
@@ -25,11 +40,9 @@ def get_schema(model: type[BaseModel]) -> dict:
                     if ref_path.startswith("#/$defs/"):
                         model_name = ref_path.replace("#/$defs/", "")
                         if model_name in defs_dict:
-                            # 递归解析引用的模型（深拷贝避免修改原对象）
-                            import copy
-
+                            # 递归解析引用的模型（复制避免修改原对象）
                             resolved = resolve_refs(
-                                copy.deepcopy(defs_dict[model_name]), defs_dict
+                                _clone(defs_dict[model_name]), defs_dict
                             )
                             # 合并其他属性（如 description, title 等）
                             other_props = {k: v for k, v in obj.items() if k != "$ref"}
@@ -82,6 +95,7 @@ class PaginatedResponse(BaseModel, Generic[T]):
     total_count: int = Field(description="总记录数")
     current_page: int = Field(description="当前页码")
     total_pages: int = Field(description="总页数")
+    next_cursor: Optional[int] = Field(None, description="下一页游标（支持游标分页的接口返回），为空表示没有更多数据")
 
 
 # ==================== 数据源相关模型 ====================
@@ -330,6 +344,7 @@ class QueryUserRecordRequest(PaginationParams):
 
     search_text: Optional[str] = Field(None, description="搜索关键词，可选")
     chat_id: Optional[str] = Field(None, description="聊天ID，可选")
+    cursor: Optional[int] = Field(None, description="游标（上一页返回的 next_cursor），传入时按游标分页并忽略 page，可选")
 
 
 class QueryUserRecordResponse(BaseResponse):
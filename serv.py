@@ -1,9 +1,26 @@
+import asyncio
 import os
+import sys
 
 # 避免本地向量/Embedding 库重复初始化 OpenMP 导致崩溃或卡死
 # 参考错误: "OMP: Error #15: Initializing libomp.dylib, but found libomp.dylib already initialized."
 os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 
+
+def _resolve_worker_count() -> int:
+    """
+    worker 数：使用 SERVER_WORKERS，默认 2
+    每个 worker 独立持有数据库连接池（见 model/db_connection_pool.py），增加 worker 前需核算数据库连接总数
+    """
+    return int(os.getenv("SERVER_WORKERS", 2))
+
+
+# 按 worker 数限制每个进程的 BLAS/OpenMP 线程数，使总线程数与核数匹配，避免多 worker 下线程超额争抢；
+# 必须在导入 numpy/torch 之前设置（这些库在首次导入时读取线程数）
+_omp_threads = str(max(1, (os.cpu_count() or 2) // _resolve_worker_count()))
+for _thread_env in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS"):
+    os.environ.setdefault(_thread_env, _omp_threads)
+
 from sanic import Sanic
 from sanic.response import empty
 from sanic.worker.manager import WorkerManager
@@ -33,7 +50,15 @@ if not root_logger.handlers:
         force=True,
     )
 
-app = Sanic("Aix-DB", configure_logging=False)
+try:
+    import orjson
+
+    # 请求体 JSON 解析使用 orjson，比标准库 json 更快
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = None
+
+app = Sanic("Aix-DB", configure_logging=False, loads=_json_loads)
 
 
 # 确保在每个 worker 启动时都重新加载日志配置
@@ -64,6 +89,86 @@ async def ensure_logging_config(app, loop):
             root_logger.level,
         )
 
+    # fork 启动的 worker 不会继承主进程的日志监听线程，需要在本进程重新启动
+    if os.getenv("LOG_QUEUE_ENABLED", "true").lower() in ("1", "true", "yes"):
+        from config.load_env import enable_queue_logging
+
+        enable_queue_logging()
+
+    logging.info("[SERV] Event loop: %s.%s", type(loop).__module__, type(loop).__name__)
+
+
+@app.before_server_start
+async def pin_worker_cpus(app, loop):
+    """
+    按 worker 序号把进程绑定到一组固定 CPU 核，减少跨核迁移导致的缓存失效
+
+    仅在 WORKER_CPU_AFFINITY 开启且平台支持 sched_setaffinity（Linux）时生效；
+    每个 worker 分得 核数 // worker数 个核，与 OMP_NUM_THREADS 的计算保持一致
+    """
+    if os.getenv("WORKER_CPU_AFFINITY", "false").lower() not in ("1", "true", "yes"):
+        return
+    if not hasattr(os, "sched_setaffinity"):
+        return
+
+    import logging
+    import re
+
+    logger = logging.getLogger(__name__)
+
+    match = re.search(r"Server-(\d+)", os.getenv("SANIC_WORKER_NAME", ""))
+    if not match:
+        return
+
+    cores = sorted(os.sched_getaffinity(0))
+    workers = _resolve_worker_count()
+    per_worker = max(1, len(cores) // workers)
+    start = (int(match.group(1)) * per_worker) % len(cores)
+    worker_cores = set(cores[start : start + per_worker])
+    try:
+        os.sched_setaffinity(0, worker_cores)
+        logger.info(f"✅ [SERV] Worker pinned to CPUs {sorted(worker_cores)}")
+    except OSError as e:
+        logger.warning(f"⚠️ [SERV] Failed to set CPU affinity: {e}")
+
+
+@app.before_server_start
+async def warmup_local_embedding(app, loop):
+    """
+    在每个 worker 启动时预加载本地 embedding 模型并执行一次推理，
+    避免首个请求承担模型加载与算子初始化的耗时
+
+    仅在 LOCAL_EMBEDDING_WARMUP 开启时执行（配置了在线 embedding 模型时无需常驻本地模型）
+    """
+    if os.getenv("LOCAL_EMBEDDING_WARMUP", "false").lower() not in ("1", "true", "yes"):
+        return
+
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+    try:
+        from common.local_embedding import generate_embedding_local_sync
+
+        embedding = await loop.run_in_executor(None, generate_embedding_local_sync, "warmup")
+        if embedding:
+            logger.info("✅ [SERV] Local embedding model warmed up")
+        else:
+            logger.warning("⚠️ [SERV] Local embedding model warmup returned no embedding")
+    except Exception as e:
+        # 预热失败不阻止服务启动，首次请求时仍会按需加载
+        logger.warning(f"⚠️ [SERV] Local embedding warmup failed: {e}")
+
+
+@app.before_server_start
+async def init_dify_client(app, loop):
+    """
+    在每个 worker 启动时创建共享的 Dify HTTP 客户端
+    """
+    from common.http_client import get_dify_client
+
+    get_dify_client()
+
 
 @app.main_process_start
 async def init_minio(app, loop):
@@ -81,19 +186,64 @@ async def init_minio(app, loop):
         from common.minio_util import MinioUtils
 
         minio_utils = MinioUtils()
-        minio_utils.ensure_bucket(default_bucket)
+        # 同步客户端在线程池中执行，并限制等待时间，避免 MinIO 不可达时阻塞主进程启动
+        await asyncio.wait_for(
+            loop.run_in_executor(None, minio_utils.ensure_bucket, default_bucket),
+            timeout=MINIO_INIT_TIMEOUT,
+        )
         logger.info(f"✅ [SERV] MinIO bucket '{default_bucket}' initialized successfully")
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"⚠️ [SERV] MinIO initialization timed out after {MINIO_INIT_TIMEOUT}s. File upload features may not work."
+        )
     except Exception as e:
         # MinIO 初始化失败不阻止服务启动，只记录警告
         logger.warning(f"⚠️ [SERV] MinIO initialization failed: {e}. File upload features may not work.")
 
 
+@app.before_server_stop
+async def close_sse_streams(app, loop):
+    """
+    服务停止前主动结束进行中的 SSE 流，避免长连接拖到 GRACEFUL_SHUTDOWN_TIMEOUT 后被强制断开
+    """
+    import logging
+
+    from common.res_decorator import close_sse_streams as _close_sse_streams
+
+    closed = _close_sse_streams()
+    if closed:
+        logging.getLogger(__name__).info(f"[SERV] Closed {closed} active SSE streams before shutdown")
+
+
+@app.after_server_stop
+async def dispose_datasource_engines(app, loop):
+    """
+    服务停止时释放数据源 SQLAlchemy engine 和原生驱动连接池
+    """
+    from common.datasource_util import DatasourceConnectionUtil
+
+    DatasourceConnectionUtil.dispose_all_engines()
+
+
+@app.after_server_stop
+async def close_dify_client(app, loop):
+    """
+    服务停止时关闭共享的 Dify HTTP 客户端
+    """
+    from common.http_client import close_dify_client as _close_dify_client
+
+    await _close_dify_client()
+
+
 autodiscover(
     app,
     controllers,
     recursive=True,
 )
 
+# 主进程初始化 MinIO bucket 的超时时间（秒）
+MINIO_INIT_TIMEOUT = int(os.getenv("MINIO_INIT_TIMEOUT", 10))
+
 # 设置 worker 状态 TTL，优先使用环境变量
 app.config.SANIC_WORKER_STATE_TTL = int(os.getenv("SANIC_WORKER_STATE_TTL", 120))
 
@@ -102,10 +252,16 @@ app.config.SANIC_WORKER_STATE_TTL = int(os.getenv("SANIC_WORKER_STATE_TTL", 120)
 app.config.RESPONSE_TIMEOUT = int(os.getenv("SANIC_RESPONSE_TIMEOUT", 2100))  # 35分钟
 app.config.REQUEST_TIMEOUT = int(os.getenv("SANIC_REQUEST_TIMEOUT", 300))  # 5分钟
 app.config.KEEP_ALIVE_TIMEOUT = int(os.getenv("SANIC_KEEP_ALIVE_TIMEOUT", 120))  # 2分钟
+app.config.GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("SANIC_GRACEFUL_SHUTDOWN_TIMEOUT", 10))  # 停止时等待连接结束的上限
 
-# 添加api docs
+# 显式启用 uvloop（requirements 已包含），Sanic 会在每个 worker 中安装 uvloop 事件循环策略；
+# 未安装 uvloop 时 Sanic 记录警告并回退到标准 asyncio
+app.config.USE_UVLOOP = os.getenv("SANIC_USE_UVLOOP", "true").lower() in ("1", "true", "yes")
+
+# 添加api docs（OAS_ENABLED=false 时不生成 OpenAPI 文档，也不注册 /docs 路由）
 app.extend(
     config={
+        "OAS": os.getenv("OAS_ENABLED", "true").lower() in ("1", "true", "yes"),
         "OAS_PATH_TO_REDOC_HTML": "docs/redoc.html",
         "OAS_PATH_TO_SWAGGER_HTML": "docs/swagger.html",
         "OAS_UI_DEFAULT": "swagger",
@@ -121,11 +277,13 @@ app.route("/")(lambda _: empty())
 
 def get_server_config():
     """获取服务器配置参数"""
-    workers = int(os.getenv("SERVER_WORKERS", 2))
+    workers = _resolve_worker_count()
     config = {
         "host": os.getenv("SERVER_HOST", "0.0.0.0"),
         "port": int(os.getenv("SERVER_PORT", 8088)),
         "auto_reload": False,
+        # 所有 worker 共享主进程绑定的监听 socket，突发连接时加大 accept 队列（Sanic 默认 100）
+        "backlog": int(os.getenv("SERVER_BACKLOG", 1024)),
     }
     if workers == 1:
         # 单进程模式：开发环境推荐，PyCharm 可正确管理进程生命周期
@@ -135,6 +293,58 @@ def get_server_config():
     return config
 
 
+# forkserver 模板进程预先导入的模块（导入失败时 multiprocessing 会静默跳过）
+FORKSERVER_PRELOAD_MODULES = (
+    "sanic",
+    "orjson",
+    "numpy",
+    "pandas",
+    "common.minio_util",
+    "common.local_embedding",
+    "controllers",
+)
+
+
+def preload_shared_libs():
+    """
+    在主进程中预先导入重量级依赖并加载本地 embedding 模型权重，
+    配合 fork 启动方式让各 worker 通过写时复制共享只读内存页，而不是每个 worker 各自加载一份
+    """
+    import importlib
+
+    logger = logging.getLogger(__name__)
+
+    for module_name in ("numpy", "pandas", "common.minio_util", "common.local_embedding"):
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            logger.warning(f"⚠️ [SERV] Preload of {module_name} skipped: {e}")
+
+    if os.getenv("LOCAL_EMBEDDING_WARMUP", "false").lower() in ("1", "true", "yes"):
+        try:
+            from common.local_embedding import preload_local_embedding_model
+
+            if preload_local_embedding_model():
+                logger.info("✅ [SERV] Local embedding model preloaded in main process")
+        except Exception as e:
+            logger.warning(f"⚠️ [SERV] Local embedding preload failed: {e}")
+
+
 if __name__ == "__main__":
     config = get_server_config()
+    # 多 worker 时可选的启动方式（Sanic 默认 spawn，worker 会重新导入全部模块）：
+    #   fork       —— 主进程预加载库与模型后直接 fork，worker 通过写时复制共享内存页
+    #   forkserver —— 由预加载了重量级模块的模板进程 fork 出 worker，避免继承主进程的线程与连接状态
+    start_method = os.getenv("SANIC_START_METHOD", "spawn").lower()
+    if os.getenv("SANIC_PRELOAD_FORK", "false").lower() in ("1", "true", "yes"):
+        start_method = "fork"
+    if config.get("workers", 1) > 1 and sys.platform != "win32":
+        if start_method == "fork":
+            Sanic.start_method = "fork"
+            preload_shared_libs()
+        elif start_method == "forkserver":
+            import multiprocessing
+
+            Sanic.start_method = "forkserver"
+            multiprocessing.set_forkserver_preload(list(FORKSERVER_PRELOAD_MODULES))
     app.run(**config)
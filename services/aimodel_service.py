@@ -7,6 +7,7 @@ from typing import List, Optional
 from sqlalchemy import desc
 
 from common.exception import MyException
+from common.llm_util import clear_default_model_cache
 from constants.code_enum import SysCodeEnum
 from model.db_connection_pool import get_db_pool
 from model.db_models import TAiModel
@@ -85,6 +86,7 @@ async def add_model(data: dict) -> bool:
         )
         session.add(new_model)
         session.commit()
+        clear_default_model_cache()
         return True
 
 async def update_model(model_id: int, data: dict) -> bool:
@@ -117,6 +119,7 @@ async def update_model(model_id: int, data: dict) -> bool:
             model.config = json.dumps(data['config_list'])
             
         session.commit()
+        clear_default_model_cache()
         return True
 
 async def delete_model(model_id: int) -> bool:
@@ -130,6 +133,7 @@ async def delete_model(model_id: int) -> bool:
              
         session.delete(model)
         session.commit()
+        clear_default_model_cache()
         return True
 
 async def set_default_model(model_id: int) -> bool:
@@ -152,6 +156,7 @@ async def set_default_model(model_id: int) -> bool:
         
         model.default_model = True
         session.commit()
+        clear_default_model_cache()
         return True
 
 async def get_default_model() -> Optional[dict]:
@@ -144,6 +144,14 @@ class DatasourceService:
             total_count = len(tables)
             logger.warning(f"无法获取数据库总表数，使用传入的表数量: {total_count}")
 
+        # 并发预取所有表的字段（网络 IO），后续数据库会话操作仍在当前线程中进行
+        table_names = [
+            t.get("table_name") or t.get("tableName")
+            for t in tables
+            if t.get("table_name") or t.get("tableName")
+        ]
+        fields_by_table = DatasourceConnectionUtil.get_fields_for_tables(datasource.type, config, table_names)
+
         for table_info in tables:
             table_name = table_info.get("table_name") or table_info.get("tableName")
             table_comment = table_info.get("table_comment") or table_info.get("tableComment") or ""
@@ -176,10 +184,7 @@ class DatasourceService:
             keep_table_ids.append(table.id)
 
             # 同步字段
-            try:
-                fields = DatasourceConnectionUtil.get_fields(datasource.type, config, table_name)
-            except Exception:
-                fields = []
+            fields = fields_by_table.get(table_name, [])
 
             keep_field_ids: List[int] = []
             for field in fields:
@@ -439,15 +444,16 @@ class DatasourceService:
 
                 logger.info(f"✅ 批量表 embedding 计算并保存成功（维度: {len(data[0].embedding) if data else 'unknown'}）")
             else:
-                # 使用离线模型逐个计算
+                # 使用离线模型分批计算
                 logger.info(f"批量计算 {len(docs)} 个表的 embedding（离线模型）...")
                 from common.local_embedding import \
-                    generate_embedding_local_sync
+                    generate_embeddings_local_batch_sync
 
+                vectors = generate_embeddings_local_batch_sync(docs) or []
                 success_count = 0
                 for idx, table in enumerate(tables_for_embedding):
                     try:
-                        embedding_vec = generate_embedding_local_sync(docs[idx])
+                        embedding_vec = vectors[idx] if idx < len(vectors) else None
                         if embedding_vec:
                             embedding_json = json.dumps(embedding_vec)
                             table.embedding = embedding_json
@@ -490,6 +496,10 @@ class DatasourceService:
         if "status" in data:
             datasource.status = data["status"]
 
+        # 连接配置可能已变更，丢弃旧的表/字段元数据缓存
+        from common.datasource_util import DatasourceConnectionUtil
+        DatasourceConnectionUtil.invalidate_metadata_cache()
+
         # 同步表/字段
         tables = data.get("tables")
         if tables is not None:
@@ -497,6 +507,9 @@ class DatasourceService:
 
         session.commit()
         session.refresh(datasource)
+
+        from agent.text2sql.database.db_service import clear_database_service_cache
+        clear_database_service_cache(ds_id)
         return datasource
 
     @staticmethod
@@ -518,6 +531,8 @@ class DatasourceService:
                                             DatasourceConnectionUtil)
         try:
             config = DatasourceConfigUtil.decrypt_config(datasource.configuration)
+            # 显式同步时读取最新的表结构，本次同步内的后续查询复用该结果
+            DatasourceConnectionUtil.invalidate_metadata_cache(datasource.type, config)
             all_db_tables = DatasourceConnectionUtil.get_tables(datasource.type, config)
             total_db_table_count = len(all_db_tables)
             selected_table_count = len(tables)
@@ -533,6 +548,10 @@ class DatasourceService:
         # 处理用户选择的表
         DatasourceService._save_tables_and_fields(session, datasource, tables, is_select_all)
         session.commit()
+
+        # 表结构与 embedding 已更新，丢弃检索服务中按旧数据构建的索引
+        from agent.text2sql.database.db_service import clear_database_service_cache
+        clear_database_service_cache(ds_id)
         return True
 
     @staticmethod
@@ -555,6 +574,9 @@ class DatasourceService:
         session.query(DatasourceTable).filter(DatasourceTable.ds_id == ds_id).delete()
         session.delete(datasource)
         session.commit()
+
+        from agent.text2sql.database.db_service import clear_database_service_cache
+        clear_database_service_cache(ds_id)
         return True
 
     @staticmethod
@@ -644,6 +666,10 @@ class DatasourceService:
             logger.warning(f"更新表 {table.table_name} 的 embedding 失败: {e}", exc_info=True)
 
         session.commit()
+
+        # 表注释与 embedding 已更新，丢弃检索服务中按旧数据构建的索引
+        from agent.text2sql.database.db_service import clear_database_service_cache
+        clear_database_service_cache(table.ds_id)
         return True
 
     @staticmethod
@@ -682,6 +708,10 @@ class DatasourceService:
                 logger.warning(f"更新表 {table.table_name} 的 embedding 失败: {e}", exc_info=True)
 
         session.commit()
+
+        # 字段注释与 embedding 已更新，丢弃检索服务中按旧数据构建的索引
+        from agent.text2sql.database.db_service import clear_database_service_cache
+        clear_database_service_cache(field.ds_id)
         return True
 
     @staticmethod
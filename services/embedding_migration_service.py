@@ -359,6 +359,10 @@ async def recalculate_table_embeddings(progress_callback: Optional[Callable[[int
                     try:
                         DatasourceService._compute_and_save_table_embeddings_batch(session, items)
                         session.commit()
+
+                        # embedding 已重新计算，丢弃检索服务中按旧 embedding 构建的索引
+                        from agent.text2sql.database.db_service import clear_database_service_cache
+                        clear_database_service_cache(ds.id)
                         
                         # 检查成功数量
                         updated_tables = session.query(DatasourceTable).filter(
@@ -14,9 +14,11 @@ logger = logging.getLogger(__name__)
 """
 
 
-async def read_excel(file_url: str):
+async def read_excel(file_url: str, nrows: int | None = None):
     """
     读取excel前两行内容
+    :param file_url: 文件的URL或路径
+    :param nrows: 每个工作表最多解析的数据行数，None 表示解析全部数据
     :return:
     """
     try:
@@ -24,9 +26,11 @@ async def read_excel(file_url: str):
         extension = file_url.split("/")[-1].split(".")[-1].split("?")[0]
         if extension in ["xlsx", "xls"]:
             with pd.ExcelFile(file_url) as xls:
-                sheets_data = {sheet_name: xls.parse(sheet_name).head(1) for sheet_name in xls.sheet_names}
+                sheets_data = {
+                    sheet_name: xls.parse(sheet_name, nrows=nrows).head(1) for sheet_name in xls.sheet_names
+                }
         elif extension in "csv":
-            xls = pd.read_csv(file_url)
+            xls = pd.read_csv(file_url, nrows=nrows)
             sheets_data = {"sheet1": xls.head(1)}
         else:
             raise ValueError("Unsupported file extension")
@@ -5,7 +5,6 @@ import re
 import traceback
 
 import aiohttp
-import requests
 
 # ClaudeSDKAgent 已不再使用，改用 CommonReactAgent
 # from agent.claude_sdk_agent import ClaudeSDKAgent
@@ -14,6 +13,7 @@ from agent.deepagent.deep_research_agent import DeepAgent
 from agent.excel.excel_agent import ExcelAgent
 from agent.text2sql.text2_sql_agent import Text2SqlAgent
 from common.exception import MyException
+from common.http_client import get_dify_client
 from constants.code_enum import DataTypeEnum, DiFyCodeEnum, IntentEnum, SysCodeEnum
 from constants.dify_rest_api import DiFyRestApi
 from services.db_qadata_process import process
@@ -557,7 +557,7 @@ async def query_dify_suggested(chat_id) -> dict:
     api_key = os.getenv("DIFY_DATABASE_QA_API_KEY")
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
 
-    response = requests.get(url + "?user=abc-123", headers=headers)
+    response = await get_dify_client().get(url, params={"user": "abc-123"}, headers=headers)
 
     # 检查请求是否成功
     if response.status_code == 200:
@@ -642,11 +642,7 @@ async def stop_dify_chat(request, task_id, qa_type) -> dict:
 
         logger.info(url)
 
-        """
-        data：若传入字典或元组列表，requests 库会把数据编码为表单数据格式（key1=value1&key2=value2）；若传入字节或类文件对象，则直接发送。
-        json：requests 库会自动把传入的 Python 对象序列化为 JSON 字符串，然后发送。
-        """
-        response = requests.post(url, json=body, headers=headers)
+        response = await get_dify_client().post(url, json=body, headers=headers)
 
         # 检查请求是否成功
         if response.status_code == 200:
@@ -1,17 +1,23 @@
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Any
 
 import bcrypt
 import jwt
-import requests
-from sqlalchemy import text
+from sqlalchemy import delete, text
 from sqlalchemy.orm import Session
 
 from common.exception import MyException
+from common.http_client import get_dify_client
+from common.token_decorator import decode_token
 from constants.code_enum import SysCodeEnum, IntentEnum, DataTypeEnum
 from constants.dify_rest_api import DiFyRestApi
 from model.db_connection_pool import get_db_pool
@@ -26,6 +32,49 @@ PASSWORD_SALT = b'$2b$12$rmnFss1KlnSgcRKCv/Q8e.'
 
 pool = get_db_pool()
 
+# 批量删除时单条 IN 语句的最大参数个数，避免超出数据库参数数量限制
+DELETE_BATCH_SIZE = 1000
+
+# 登录校验结果短时缓存：前端重复/并发登录时跳过 bcrypt 计算与数据库查询
+LOGIN_CACHE_TTL = int(os.getenv("LOGIN_CACHE_TTL", "10"))
+LOGIN_CACHE_SIZE = 2048
+_login_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_login_cache_lock = threading.Lock()
+# 用户变更代数：清空缓存时递增，变更前开始的校验结果不再写入缓存
+_login_cache_generation = 0
+
+# Dify 反馈微批：窗口期（秒）内的反馈合并发送
+FEEDBACK_BATCH_WINDOW = float(os.getenv("DIFY_FEEDBACK_BATCH_WINDOW", "0.05"))
+_feedback_pending: dict = {}
+_feedback_flush_task = None
+
+
+def _bind_sql_params(sql: str, params: tuple = None):
+    """将 %s 占位符转换为命名参数，返回 (TextClause, 参数字典)"""
+    if not params:
+        return text(sql), {}
+    param_dict = {f"param_{i}": val for i, val in enumerate(params)}
+    # 替换 %s 为命名参数
+    sql_with_params = sql
+    for i in range(len(params)):
+        sql_with_params = sql_with_params.replace("%s", f":param_{i}", 1)
+    return text(sql_with_params), param_dict
+
+
+def _rows_to_dicts(rows, columns) -> List[dict]:
+    """将查询结果行转换为字典列表，日期时间格式化为字符串"""
+    result_list = []
+    for row in rows:
+        row_dict = {}
+        for i, col in enumerate(columns):
+            value = row[i]
+            # 处理日期时间类型
+            if isinstance(value, datetime):
+                value = value.strftime("%Y-%m-%d %H:%M:%S")
+            row_dict[col] = value
+        result_list.append(row_dict)
+    return result_list
+
 
 def execute_sql_dict(sql: str, params: tuple = None) -> List[dict]:
     """
@@ -35,30 +84,28 @@ def execute_sql_dict(sql: str, params: tuple = None) -> List[dict]:
     :return: 字典列表
     """
     with pool.get_session() as session:
-        if params:
-            # 将 %s 占位符转换为命名参数
-            param_dict = {f"param_{i}": val for i, val in enumerate(params)}
-            # 替换 %s 为命名参数
-            sql_with_params = sql
-            for i in range(len(params)):
-                sql_with_params = sql_with_params.replace("%s", f":param_{i}", 1)
-            result = session.execute(text(sql_with_params), param_dict)
-        else:
-            result = session.execute(text(sql))
+        statement, param_dict = _bind_sql_params(sql, params)
+        result = session.execute(statement, param_dict)
         rows = result.fetchall()
-        columns = result.keys()
+        return _rows_to_dicts(rows, result.keys())
+
 
-        result_list = []
-        for row in rows:
-            row_dict = {}
-            for i, col in enumerate(columns):
-                value = row[i]
-                # 处理日期时间类型
-                if isinstance(value, datetime):
-                    value = value.strftime("%Y-%m-%d %H:%M:%S")
-                row_dict[col] = value
-            result_list.append(row_dict)
-        return result_list
+async def execute_sql_dict_async(sql: str, params: tuple = None) -> List[dict]:
+    """
+    execute_sql_dict 的异步版本，不阻塞事件循环
+    优先使用异步引擎；数据库不支持异步驱动时在线程池中执行同步查询
+    :param sql: SQL 查询语句（支持 %s 占位符）
+    :param params: 参数元组（可选）
+    :return: 字典列表
+    """
+    if not pool.has_async_engine():
+        return await asyncio.to_thread(execute_sql_dict, sql, params)
+
+    async with pool.get_async_session() as session:
+        statement, param_dict = _bind_sql_params(sql, params)
+        result = await session.execute(statement, param_dict)
+        rows = result.fetchall()
+        return _rows_to_dicts(rows, result.keys())
 
 
 def execute_sql_update(sql: str, params: tuple = None):
@@ -83,8 +130,52 @@ def execute_sql_update(sql: str, params: tuple = None):
         return result.rowcount
 
 
+def _login_cache_key(username, password) -> bytes:
+    """登录缓存键：用户名、盐值与密码的 sha256 摘要，不在内存中保留明文密码"""
+    digest = hashlib.sha256()
+    for part in (str(username).encode("utf-8"), PASSWORD_SALT, str(password).encode("utf-8")):
+        digest.update(len(part).to_bytes(4, "big"))
+        digest.update(part)
+    return digest.digest()
+
+
+def _clear_login_cache():
+    """用户新增/修改/删除后清空登录缓存（缓存键为摘要，无法按用户定位）"""
+    global _login_cache_generation
+    with _login_cache_lock:
+        _login_cache.clear()
+        _login_cache_generation += 1
+
+
 async def authenticate_user(username, password):
-    """验证用户凭据并返回用户信息或 None"""
+    """验证用户凭据并返回用户信息或 False（成功结果短时缓存，校验在线程池中执行）"""
+    if LOGIN_CACHE_TTL <= 0:
+        return await asyncio.to_thread(_authenticate_user_sync, username, password)
+
+    key = _login_cache_key(username, password)
+    now = time.monotonic()
+    with _login_cache_lock:
+        cached = _login_cache.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                return dict(cached[1])
+            del _login_cache[key]
+        generation = _login_cache_generation
+
+    user = await asyncio.to_thread(_authenticate_user_sync, username, password)
+    if not user:
+        # 失败结果不缓存：避免新建账号或修改密码后仍被旧的失败结果拒绝
+        return user
+    with _login_cache_lock:
+        if generation == _login_cache_generation:
+            _login_cache[key] = (now + LOGIN_CACHE_TTL, dict(user))
+            if len(_login_cache) > LOGIN_CACHE_SIZE:
+                _login_cache.popitem(last=False)
+    return user
+
+
+def _authenticate_user_sync(username, password):
+    """验证用户凭据并返回用户信息或 False"""
     with pool.get_session() as session:
         session: Session = session
         user = session.query(TUser).filter(TUser.userName == username).first()
@@ -130,12 +221,8 @@ async def generate_jwt_token(user_id, username, role="user"):
 async def decode_jwt_token(token):
     """解析 JWT token 并返回 payload"""
     try:
-        # 使用与生成 token 时相同的密钥和算法来解码 token
-        payload = jwt.decode(token, key=os.getenv("JWT_SECRET_KEY", "550e8400-e29b-41d4-a716-446655440000"), algorithms=["HS256"])
-        # 检查 token 是否过期
-        if "exp" in payload and datetime.utcfromtimestamp(payload["exp"]) < datetime.utcnow():
-            raise jwt.ExpiredSignatureError("Token has expired")
-        return payload
+        # 使用与生成 token 时相同的密钥和算法来解码 token（含过期检查，结果带缓存）
+        return decode_token(token)
     except jwt.ExpiredSignatureError as e:
         # 处理过期的 token
         return None, 401, str(e)
@@ -169,6 +256,11 @@ async def get_user_info(request) -> dict:
         logging.error("Token is empty or whitespace")
         raise MyException(SysCodeEnum.c_400)
 
+    # check_token 已校验过的请求直接复用其 payload，无需再次解码
+    user_payload = getattr(request.ctx, "user_payload", None)
+    if user_payload is not None:
+        return user_payload
+
     try:
         # 解码 JWT token
         user_info = await decode_jwt_token(token)
@@ -312,29 +404,61 @@ async def delete_user_record(user_id, record_ids):
     if not isinstance(record_ids, list) or not record_ids:
         raise ValueError("record_ids 必须是非空列表")
 
-    # 创建 IN 子句和对应的参数列表
-    in_clause = ", ".join(["%s"] * len(record_ids))
-    sql = f"""
-        DELETE FROM t_user_qa_record
-        WHERE user_id = %s AND chat_id IN ({in_clause})
-    """
+    # 每批一条 DELETE ... WHERE chat_id IN (...)，所有批次在同一事务中提交
+    deleted = 0
+    with pool.get_session() as session:
+        for start in range(0, len(record_ids), DELETE_BATCH_SIZE):
+            stmt = delete(TUserQaRecord).where(
+                TUserQaRecord.user_id == user_id,
+                TUserQaRecord.chat_id.in_(record_ids[start : start + DELETE_BATCH_SIZE]),
+            )
+            deleted += session.execute(stmt).rowcount
+        session.commit()
+    logger.info(f"用户 {user_id} 删除问答记录 {deleted} 条")
 
-    # 将 user_id 添加到参数列表的开头
-    params = tuple([user_id] + record_ids)
 
-    # 执行更新操作
-    execute_sql_update(sql=sql, params=params)
+# 分页查询中窗口函数总数列的列名
+_TOTAL_COUNT_COLUMN = "total_count__"
 
+# 问答记录列表（按 chat_id 去重）返回的摘要字段
+_QA_RECORD_SUMMARY_COLUMNS = (
+    "t.id, t.uuid, t.user_id, t.chat_id, t.question, t.qa_type, t.datasource_id, t.file_key, t.create_time"
+)
 
-async def query_user_record(user_id, page, size, search_text, chat_id):
+
+async def _query_page_with_total(records_sql: str, count_sql: str, offset: int, use_window: bool = True):
+    """
+    执行带 COUNT(*) OVER() 总数列的分页查询，一次往返同时得到当前页数据与总数
+    当前页为空（如页码越界）时结果中没有总数，回退执行 count_sql
+    :param use_window: records_sql 是否带有总数列；游标分页时不带，总数由 count_sql 查询
+    :return: (当前页记录列表, 总数)
+    """
+    records = await execute_sql_dict_async(records_sql)
+    if not use_window:
+        total_count_result = await execute_sql_dict_async(count_sql)
+        total_count = total_count_result[0]["count"] if total_count_result else 0
+    elif records:
+        total_count = records[0][_TOTAL_COUNT_COLUMN]
+        for row in records:
+            del row[_TOTAL_COUNT_COLUMN]
+    elif offset > 0:
+        total_count_result = await execute_sql_dict_async(count_sql)
+        total_count = total_count_result[0]["count"] if total_count_result else 0
+    else:
+        total_count = 0
+    return records, total_count
+
+
+async def query_user_record(user_id, page, size, search_text, chat_id, cursor=None):
     """
     根据用户id查询用户问答记录
-    如果chat_id不为空，则查询该chat_id的所有记录；否则根据chat_id去重，取id最小的那条
+    如果chat_id不为空，则查询该chat_id的所有记录；否则根据chat_id去重，取id最小的那条（只返回摘要字段）
     :param page
     :param size
     :param user_id
     :param search_text
     :param chat_id
+    :param cursor: 游标（上一页返回的 next_cursor），传入时按 id 做 keyset 分页，忽略 page
     :return:
     """
     conditions = []
@@ -346,20 +470,22 @@ async def query_user_record(user_id, page, size, search_text, chat_id):
     elif user_id:
         conditions.append(f"user_id = {user_id}")
 
-    # 计算偏移量
-    offset = (page - 1) * size
+    # 计算偏移量；游标分页时按 id 定位，无需跳过前面的行
+    use_cursor = cursor is not None
+    offset = 0 if use_cursor else (page - 1) * size
+    page_clause = f"LIMIT {size}" if use_cursor else f"LIMIT {size} OFFSET {offset}"
+    total_column = "" if use_cursor else f", COUNT(*) OVER() AS {_TOTAL_COUNT_COLUMN}"
 
     # 如果chat_id不为空，则不需要去重，直接查询
     if chat_id:
         count_sql = "SELECT COUNT(1) as count FROM t_user_qa_record"
         if conditions:
             count_sql += " WHERE " + " AND ".join(conditions)
-        total_count_result = execute_sql_dict(count_sql)
-        total_count = total_count_result[0]["count"] if total_count_result else 0
-        total_pages = (total_count + size - 1) // size
 
-        records_sql = f"SELECT t.*, d.name as datasource_name FROM t_user_qa_record t LEFT JOIN t_datasource d ON t.datasource_id = d.id"
-        if conditions:
+        records_sql = f"SELECT t.*, d.name as datasource_name{total_column} FROM t_user_qa_record t LEFT JOIN t_datasource d ON t.datasource_id = d.id"
+        # 按 id 升序，游标之后的记录 id 更大
+        record_conditions = conditions + [f"id > {int(cursor)}"] if use_cursor else conditions
+        if record_conditions:
             # Note: We need to adjust column references if they are ambiguous, but here conditions are simple
             # However, since we aliased t_user_qa_record as t, we should probably update conditions or just use the table name in WHERE if not ambiguous
             # Actually, the conditions constructed earlier use simple column names. 
@@ -371,10 +497,10 @@ async def query_user_record(user_id, page, size, search_text, chat_id):
             # `id` is in both. `name` is in datasource.
             # The conditions list is built before.
             # Let's rebuild conditions with 't.' prefix or just use table alias in query.
-            where_clause = " WHERE " + " AND ".join([f"t.{c}" if "id" in c or "question" in c or "chat_id" in c or "user_id" in c else c for c in conditions])
+            where_clause = " WHERE " + " AND ".join([f"t.{c}" if "id" in c or "question" in c or "chat_id" in c or "user_id" in c else c for c in record_conditions])
             records_sql += where_clause
-        records_sql += f" ORDER BY t.id ASC LIMIT {size} OFFSET {offset}"
-        records = execute_sql_dict(records_sql)
+        records_sql += f" ORDER BY t.id ASC {page_clause}"
+        records, total_count = await _query_page_with_total(records_sql, count_sql, offset, not use_cursor)
     else:
         # 如果chat_id为空，则需要去重，根据chat_id取id最小的记录
         base_condition = ""
@@ -389,13 +515,14 @@ async def query_user_record(user_id, page, size, search_text, chat_id):
                 GROUP BY chat_id
             ) as distinct_chats
         """
-        total_count_result = execute_sql_dict(count_sql)
-        total_count = total_count_result[0]["count"] if total_count_result else 0
-        total_pages = (total_count + size - 1) // size
+
+        # 按 id 降序，游标之后的记录 id 更小
+        cursor_condition = f"WHERE t.id < {int(cursor)}" if use_cursor else ""
 
         # 查询去重后的记录，根据chat_id分组并取id最小的记录
+        # 列表场景只需摘要字段，不读取答案、业务数据等大字段
         records_sql = f"""
-            SELECT t.*, d.name as datasource_name FROM t_user_qa_record t
+            SELECT {_QA_RECORD_SUMMARY_COLUMNS}, d.name as datasource_name{total_column} FROM t_user_qa_record t
             INNER JOIN (
                 SELECT chat_id, MIN(id) as min_id 
                 FROM t_user_qa_record 
@@ -403,16 +530,20 @@ async def query_user_record(user_id, page, size, search_text, chat_id):
                 GROUP BY chat_id
             ) tm ON t.chat_id = tm.chat_id AND t.id = tm.min_id
             LEFT JOIN t_datasource d ON t.datasource_id = d.id
+            {cursor_condition}
             ORDER BY t.id DESC 
-            LIMIT {size} OFFSET {offset}
+            {page_clause}
         """
-        records = execute_sql_dict(records_sql)
+        records, total_count = await _query_page_with_total(records_sql, count_sql, offset, not use_cursor)
 
+    total_pages = (total_count + size - 1) // size
     return PaginatedResponse(
         records=records,
         current_page=page,
         total_count=total_count,
         total_pages=total_pages,
+        # 当前页已满时返回最后一条记录的 id 作为下一页游标
+        next_cursor=records[-1]["id"] if len(records) == size else None,
     )
 
 
@@ -449,11 +580,8 @@ async def query_user_record_list(user_id, page, size, search_text):
             GROUP BY chat_id
         ) as distinct_chats
     """
-    total_count_result = execute_sql_dict(count_sql)
-    total_count = total_count_result[0]["count"] if total_count_result else 0
-    total_pages = (total_count + size - 1) // size
 
-    # 查询去重后的记录，只选择必要字段
+    # 查询去重后的记录，只选择必要字段，总数通过窗口函数在同一次查询中返回
     records_sql = f"""
         SELECT 
             t.uuid,
@@ -461,7 +589,8 @@ async def query_user_record_list(user_id, page, size, search_text):
             t.chat_id,
             t.qa_type,
             t.datasource_id,
-            d.name as datasource_name
+            d.name as datasource_name,
+            COUNT(*) OVER() AS {_TOTAL_COUNT_COLUMN}
         FROM t_user_qa_record t
         INNER JOIN (
             SELECT chat_id, MIN(id) as min_id 
@@ -473,7 +602,8 @@ async def query_user_record_list(user_id, page, size, search_text):
         ORDER BY t.id DESC 
         LIMIT {size} OFFSET {offset}
     """
-    records = execute_sql_dict(records_sql)
+    records, total_count = await _query_page_with_total(records_sql, count_sql, offset)
+    total_pages = (total_count + size - 1) // size
 
     return PaginatedResponse(
         records=records,
@@ -529,29 +659,69 @@ async def get_record_sql(record_id: int, user_id: int) -> dict:
         return {"sql_statement": ""}
 
 
+async def _post_dify_feedback(message_id, rating):
+    """发送单条消息反馈"""
+    url = DiFyRestApi.replace_path_params(DiFyRestApi.DIFY_REST_FEEDBACK, {"message_id": message_id})
+    api_key = os.getenv("DIFY_DATABASE_QA_API_KEY")
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    payload = {"rating": rating, "user": "abc-123"}
+
+    response = await get_dify_client().post(url, headers=headers, json=payload)
+
+    # 检查请求是否成功
+    if response.status_code == 200:
+        logger.info("Feedback successfully sent.")
+    else:
+        logger.error(f"Failed to send feedback. Status code: {response.status_code},Response body: {response.text}")
+        raise MyException(SysCodeEnum.c_9999)
+
+
+async def _flush_dify_feedback():
+    """等待一个窗口期后，将积攒的反馈按消息合并发送，并唤醒所有等待方"""
+    global _feedback_flush_task
+    await asyncio.sleep(FEEDBACK_BATCH_WINDOW)
+    pending = dict(_feedback_pending)
+    _feedback_pending.clear()
+    # 发送期间到达的新反馈由新的刷新任务处理
+    _feedback_flush_task = None
+
+    results = await asyncio.gather(
+        *(_post_dify_feedback(message_id, rating) for message_id, (rating, _) in pending.items()),
+        return_exceptions=True,
+    )
+    for (_, waiters), result in zip(pending.values(), results):
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if isinstance(result, BaseException):
+                waiter.set_exception(result)
+            else:
+                waiter.set_result(None)
+
+
 async def send_dify_feedback(chat_id, rating):
     """
     发送反馈给指定的消息ID。
 
+    窗口期内对同一消息的多次反馈只保留最后一次评级，合并为一次请求。
+
     :param chat_id: 消息的唯一标识符。
     :param rating: 反馈评级（例如："like" 或 "dislike"）。
     :return: 返回服务器响应。
     """
+    global _feedback_flush_task
     # 查询对话记录
     qa_record = query_user_qa_record(chat_id)
-    url = DiFyRestApi.replace_path_params(DiFyRestApi.DIFY_REST_FEEDBACK, {"message_id": qa_record[0]["message_id"]})
-    api_key = os.getenv("DIFY_DATABASE_QA_API_KEY")
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    payload = {"rating": rating, "user": "abc-123"}
+    message_id = qa_record[0]["message_id"]
 
-    response = requests.post(url, headers=headers, json=payload)
+    waiter = asyncio.get_running_loop().create_future()
+    _, waiters = _feedback_pending.get(message_id, (None, []))
+    waiters.append(waiter)
+    _feedback_pending[message_id] = (rating, waiters)
 
-    # 检查请求是否成功
-    if response.status_code == 200:
-        logger.info("Feedback successfully sent.")
-    else:
-        logger.error(f"Failed to send feedback. Status code: {response.status_code},Response body: {response.text}")
-        raise
+    if _feedback_flush_task is None:
+        _feedback_flush_task = asyncio.create_task(_flush_dify_feedback())
+    await waiter
 
 
 async def query_user_list(page, size, name=None):
@@ -615,7 +785,8 @@ async def add_user(username, password, mobile, role="user"):
         )
         session.add(new_user)
         session.commit()
-        return True
+    _clear_login_cache()
+    return True
 
 
 async def init_super_admin():
@@ -680,7 +851,8 @@ async def update_user(user_id, username, mobile, password=None):
             user.password = bcrypt.hashpw(password.encode('utf-8'), PASSWORD_SALT).decode('utf-8')
         user.updateTime = datetime.now()
         session.commit()
-        return True
+    _clear_login_cache()
+    return True
 
 
 async def delete_user(user_id):
@@ -695,4 +867,5 @@ async def delete_user(user_id):
             raise MyException(SysCodeEnum.PARAM_ERROR, "用户不存在")
         session.delete(user)
         session.commit()
-        return True
+    _clear_login_cache()
+    return True